@@ -0,0 +1,82 @@
+"""
+Parser throughput benchmark.
+
+Usage:
+    python -m benchmarks.parsers [--messages 100000] [--payload-keys 10]
+"""
+
+import argparse
+import json
+import logging
+import time
+
+from logger import logger
+from models.lazy_message import LazyMessage
+from parsers.kafka_parser import KafkaParser
+from parsers.sqs_parser import SQSParser
+
+
+def make_messages(count: int, payload_keys: int) -> list:
+  return [
+    json.dumps(
+      {
+        "id": f"message-{index}",
+        "payload": {
+          f"key_{key}": f"value-{index}-{key}" for key in range(payload_keys)
+        },
+        "timestamp": "2025-06-01T10:00:00",
+      }
+    )
+    for index in range(count)
+  ]
+
+
+def measure(parser, raw_messages: list, route: bool = False) -> float:
+  """
+  Return parsed messages per second. With route=True every message also reads
+  one payload key, like a processor that only routes messages.
+  """
+  parse = parser.parse
+  start = time.perf_counter()
+  if route:
+    for raw_message in raw_messages:
+      message = parse(raw_message)
+      if isinstance(message, LazyMessage):
+        message.payload_value("key_0")
+      else:
+        message.payload.get("key_0")
+  else:
+    for raw_message in raw_messages:
+      parse(raw_message)
+  return len(raw_messages) / (time.perf_counter() - start)
+
+
+def run(messages: int = 100_000, payload_keys: int = 10) -> dict:
+  raw_messages = make_messages(messages, payload_keys)
+  results = {}
+  for parser_class in (SQSParser, KafkaParser):
+    for fast in (False, True):
+      name = f"{parser_class.__name__}(fast={fast})"
+      results[name] = measure(parser_class(fast=fast), raw_messages)
+    name = f"{parser_class.__name__}(lazy=True)"
+    results[name] = measure(parser_class(lazy=True), raw_messages)
+    for lazy in (False, True):
+      name = f"{parser_class.__name__}(lazy={lazy}) routing"
+      results[name] = measure(parser_class(lazy=lazy), raw_messages, route=True)
+  return results
+
+
+def main():
+  argument_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  argument_parser.add_argument("--messages", type=int, default=100_000)
+  argument_parser.add_argument("--payload-keys", type=int, default=10)
+  args = argument_parser.parse_args()
+
+  # Measure parsing, not the per-message debug log line.
+  logger.setLevel(logging.WARNING)
+  for name, rate in run(args.messages, args.payload_keys).items():
+    print(f"{name:<36} {rate:>12,.0f} messages/sec")
+
+
+if __name__ == "__main__":
+  main()
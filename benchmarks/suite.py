@@ -0,0 +1,413 @@
+"""
+End-to-end benchmark suite against the in-process SQS stand-in.
+
+Runs parsing, MessageHandler, SqsProducer, SqsBatchProducer, SqsConsumer,
+SqsBridge and FileSource scenarios and reports messages/sec, p50/p99 latency per message and peak traced
+memory. Results are written as JSON so that runs can be compared.
+
+Usage:
+    python -m benchmarks.suite [--messages 5000] [--payload-bytes 1024]
+        [--latency 0.001] [--workers 4] [--repeat 3] [--only consumer]
+        [--no-memory] [--output results.json]
+        [--compare previous.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from core.handler import MessageHandler
+from core.metrics import MetricsRegistry
+from logger import logger
+from parsers.kafka_parser import KafkaParser
+from parsers.sqs_parser import SQSParser
+from sources.file_source import FileSource
+from sources.in_memory_sqs import InMemorySqs
+from sources.sqs_batch_producer import SqsBatchProducer
+from sources.sqs_bridge import SqsBridge
+from sources.sqs_consumer import SqsConsumer
+from sources.sqs_producer import SqsProducer
+
+QUEUE_URL = "http://localhost:4566/000000000000/benchmark"
+FIFO_QUEUE_URL = QUEUE_URL + ".fifo"
+FIFO_GROUPS = 20
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def make_body(index: int, payload_bytes: int) -> dict:
+  return {
+    "id": f"message-{index}",
+    "payload": {"type": "order", "index": index, "data": "x" * payload_bytes},
+    "timestamp": "2025-06-01T10:00:00",
+  }
+
+
+def make_messages(count: int, payload_bytes: int) -> list:
+  return [json.dumps(make_body(index, payload_bytes)) for index in range(count)]
+
+
+class Measurement:
+  """
+  Marks the measured section of a scenario, excluding its setup.
+
+  Attributes:
+      seconds (float): Duration of the section.
+      peak_bytes (int): Peak traced memory during the section, or None when
+          tracemalloc is not running.
+  """
+
+  def __init__(self):
+    self.seconds = None
+    self.peak_bytes = None
+
+  def __enter__(self):
+    if tracemalloc.is_tracing():
+      tracemalloc.reset_peak()
+      self._baseline = tracemalloc.get_traced_memory()[0]
+    self._start = time.perf_counter()
+    return self
+
+  def __exit__(self, exc_type, exc, traceback):
+    self.seconds = time.perf_counter() - self._start
+    if tracemalloc.is_tracing():
+      self.peak_bytes = tracemalloc.get_traced_memory()[1] - self._baseline
+
+
+def timed_calls(function, arguments: list, measurement: Measurement) -> list:
+  """
+  Call function once per argument and return the duration of every call.
+  """
+  durations = []
+  clock = time.perf_counter
+  with measurement:
+    for argument in arguments:
+      start = clock()
+      function(argument)
+      durations.append(clock() - start)
+  return durations
+
+
+def parse_scenario(parser):
+  def scenario(config, measurement):
+    raw_messages = make_messages(config.messages, config.payload_bytes)
+    return timed_calls(parser.parse, raw_messages, measurement)
+
+  return scenario
+
+
+def handler_scenario(config, measurement):
+  handler = MessageHandler(SQSParser(), lambda message: None, metrics=MetricsRegistry())
+  raw_messages = make_messages(config.messages, config.payload_bytes)
+  return timed_calls(handler.handle, raw_messages, measurement)
+
+
+def producer_scenario(config, measurement):
+  producer = SqsProducer(
+    QUEUE_URL, client=InMemorySqs(latency=config.latency), metrics=MetricsRegistry()
+  )
+  bodies = [make_body(index, config.payload_bytes) for index in range(config.messages)]
+  return timed_calls(producer.send_message, bodies, measurement)
+
+
+def batch_producer_scenario(config, measurement):
+  sqs = InMemorySqs(latency=config.latency)
+  bodies = [make_body(index, config.payload_bytes) for index in range(config.messages)]
+  latencies = []
+
+  with (
+    measurement,
+    SqsBatchProducer(QUEUE_URL, client=sqs, metrics=MetricsRegistry()) as producer,
+  ):
+    for body in bodies:
+      start = time.perf_counter()
+      future = producer.send_message(body)
+      future.add_done_callback(
+        lambda _, start=start: latencies.append(time.perf_counter() - start)
+      )
+  return latencies
+
+
+def consumer_scenario(config, measurement, queue_url: str = QUEUE_URL, groups: int = 0):
+  sqs = InMemorySqs(latency=config.latency)
+  for start in range(0, config.messages, 10):
+    entries = [
+      {"Id": str(index), "MessageBody": raw_message}
+      for index, raw_message in enumerate(
+        make_messages(min(10, config.messages - start), config.payload_bytes)
+      )
+    ]
+    if groups:
+      for index, entry in enumerate(entries):
+        entry["MessageGroupId"] = f"group-{(start + index) % groups}"
+    sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+
+  latencies = []
+  lock = threading.Lock()
+  handler = MessageHandler(SQSParser(), lambda message: None, metrics=MetricsRegistry())
+  consumer = SqsConsumer(
+    queue_url,
+    number_of_messages=10,
+    handler=handler,
+    batch_acks=True,
+    wait_time_seconds=0,
+    max_workers=config.workers,
+    client=sqs,
+    metrics=MetricsRegistry(),
+  )
+
+  handle = handler.handle
+
+  def timed_handle(raw_message):
+    start = time.perf_counter()
+    handle(raw_message)
+    with lock:
+      latencies.append(time.perf_counter() - start)
+      if len(latencies) == config.messages:
+        consumer.stop()
+
+  handler.handle = timed_handle
+  with measurement:
+    consumer.poll_sqs()
+  if sqs.count(queue_url):
+    raise RuntimeError(f"{sqs.count(queue_url)} messages were not acknowledged")
+  return latencies
+
+
+def fifo_consumer_scenario(config, measurement):
+  return consumer_scenario(config, measurement, FIFO_QUEUE_URL, groups=FIFO_GROUPS)
+
+
+def file_source_scenario(config, measurement):
+  latencies = []
+  lock = threading.Lock()
+  handler = MessageHandler(SQSParser(), lambda message: None, metrics=MetricsRegistry())
+  handle_batch = handler.handle_batch
+
+  def timed_handle_batch(raw_messages):
+    start = time.perf_counter()
+    results = handle_batch(raw_messages)
+    latency = (time.perf_counter() - start) / len(raw_messages)
+    with lock:
+      latencies.extend([latency] * len(raw_messages))
+    return results
+
+  handler.handle_batch = timed_handle_batch
+  with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "messages.jsonl")
+    with open(path, "w") as messages_file:
+      for raw_message in make_messages(config.messages, config.payload_bytes):
+        messages_file.write(raw_message + "\n")
+    source = FileSource(path, handler, max_workers=config.workers)
+    with measurement:
+      source.run()
+  return latencies
+
+
+def bridge_scenario(config, measurement):
+  sqs = InMemorySqs(latency=config.latency)
+  output_queue_url = QUEUE_URL + "-output"
+  raw_messages = make_messages(config.messages, config.payload_bytes)
+  for start in range(0, config.messages, 10):
+    sqs.send_message_batch(
+      QueueUrl=QUEUE_URL,
+      Entries=[
+        {"Id": str(index), "MessageBody": raw_message}
+        for index, raw_message in enumerate(raw_messages[start : start + 10])
+      ],
+    )
+
+  latencies = []
+  lock = threading.Lock()
+  producer = SqsBatchProducer(
+    output_queue_url, linger=0.01, client=sqs, metrics=MetricsRegistry()
+  )
+  bridge = SqsBridge(
+    QUEUE_URL,
+    lambda message: message.model_dump(),
+    producer,
+    max_workers=config.workers,
+    wait_time_seconds=0,
+    client=sqs,
+    metrics=MetricsRegistry(),
+  )
+
+  forward = bridge.forward
+
+  def timed_forward(messages):
+    start = time.perf_counter()
+    results = forward(messages)
+    latency = (time.perf_counter() - start) / len(messages)
+    with lock:
+      latencies.extend([latency] * len(messages))
+      if len(latencies) == config.messages:
+        bridge.stop()
+    return results
+
+  bridge.handler.batch_processor = timed_forward
+  with measurement, producer:
+    bridge.run()
+  if sqs.count(output_queue_url) != config.messages:
+    raise RuntimeError(f"{sqs.count(output_queue_url)} messages were published")
+  return latencies
+
+
+SCENARIOS = {
+  "parse_sqs": parse_scenario(SQSParser()),
+  "parse_sqs_fast": parse_scenario(SQSParser(fast=True)),
+  "parse_sqs_lazy": parse_scenario(SQSParser(lazy=True)),
+  "parse_kafka": parse_scenario(KafkaParser()),
+  "handler": handler_scenario,
+  "producer": producer_scenario,
+  "batch_producer": batch_producer_scenario,
+  "consumer": consumer_scenario,
+  "fifo_consumer": fifo_consumer_scenario,
+  "file_source": file_source_scenario,
+  "bridge": bridge_scenario,
+}
+
+
+def run_scenario(scenario, config, memory: bool = True) -> dict:
+  """
+  Run a scenario config.repeat times and summarize the fastest run.
+
+  Timed runs happen without tracemalloc, which slows allocation-heavy code
+  considerably. Peak memory is measured in one more, traced run.
+
+  Returns:
+      dict: messages, seconds, messages_per_sec, p50_ms, p99_ms and peak_kib.
+  """
+  best = None
+  for _ in range(config.repeat):
+    measurement = Measurement()
+    latencies = scenario(config, measurement)
+    if best is None or measurement.seconds < best[1].seconds:
+      best = (latencies, measurement)
+  latencies, measurement = best
+
+  peak_kib = None
+  if memory:
+    tracemalloc.start()
+    try:
+      traced = Measurement()
+      scenario(config, traced)
+      peak_kib = traced.peak_bytes / 1024
+    finally:
+      tracemalloc.stop()
+
+  quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+  return {
+    "messages": len(latencies),
+    "seconds": round(measurement.seconds, 4),
+    "messages_per_sec": round(len(latencies) / measurement.seconds, 1),
+    "p50_ms": round(quantiles[49] * 1000, 4),
+    "p99_ms": round(quantiles[98] * 1000, 4),
+    "peak_kib": None if peak_kib is None else round(peak_kib, 1),
+  }
+
+
+def run(config) -> dict:
+  """
+  Run the selected scenarios.
+
+  Returns:
+      dict: The configuration, environment and one summary per scenario.
+  """
+  names = config.only or list(SCENARIOS)
+  return {
+    "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "config": {
+      "messages": config.messages,
+      "payload_bytes": config.payload_bytes,
+      "latency": config.latency,
+      "workers": config.workers,
+      "repeat": config.repeat,
+    },
+    "results": {
+      name: run_scenario(SCENARIOS[name], config, memory=not config.no_memory)
+      for name in names
+    },
+  }
+
+
+def compare(current: dict, previous: dict) -> list:
+  """
+  Return report lines comparing the throughput and p99 of two runs.
+  """
+  lines = []
+  for name, result in current["results"].items():
+    before = previous["results"].get(name)
+    if before is None:
+      continue
+    rate = _change(result["messages_per_sec"], before["messages_per_sec"])
+    p99 = _change(result["p99_ms"], before["p99_ms"])
+    lines.append(f"{name:<16} throughput {rate:>8}   p99 {p99:>8}")
+  return lines
+
+
+def _change(value: float, before: float) -> str:
+  if not before:
+    return "n/a"
+  return f"{(value - before) / before * 100:+.1f}%"
+
+
+def main(argv: list = None):
+  argument_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  argument_parser.add_argument("--messages", type=int, default=5000)
+  argument_parser.add_argument("--payload-bytes", type=int, default=1024)
+  argument_parser.add_argument(
+    "--latency", type=float, default=0.001, help="Seconds added to every SQS call."
+  )
+  argument_parser.add_argument("--workers", type=int, default=4)
+  argument_parser.add_argument(
+    "--repeat", type=int, default=1, help="Report the fastest of this many runs."
+  )
+  argument_parser.add_argument("--only", action="append", choices=sorted(SCENARIOS))
+  argument_parser.add_argument("--no-memory", action="store_true")
+  argument_parser.add_argument("--output", help="Defaults to benchmarks/results/.")
+  argument_parser.add_argument("--compare", help="A previous results file.")
+  config = argument_parser.parse_args(argv)
+
+  # Measure the pipeline, not the per-message log lines.
+  logger.setLevel(logging.WARNING)
+  report = run(config)
+
+  print(
+    f"{'scenario':<16} {'msgs/sec':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak KiB':>10}"
+  )
+  for name, result in report["results"].items():
+    peak = "-" if result["peak_kib"] is None else f"{result['peak_kib']:,.0f}"
+    print(
+      f"{name:<16} {result['messages_per_sec']:>12,.0f} {result['p50_ms']:>10.3f} "
+      f"{result['p99_ms']:>10.3f} {peak:>10}"
+    )
+
+  output = config.output
+  if output is None:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output = os.path.join(RESULTS_DIR, f"{stamp}.json")
+  with open(output, "w") as results_file:
+    json.dump(report, results_file, indent=2)
+  print(f"Results written to {output}", file=sys.stderr)
+
+  if config.compare:
+    with open(config.compare) as previous_file:
+      previous = json.load(previous_file)
+    print(f"\nCompared with {config.compare}:")
+    for line in compare(report, previous):
+      print(line)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,88 @@
+import inspect
+import time
+
+from core.metrics import MetricsRegistry, registry
+from logger import message_logger
+from models.message import Message
+
+
+class AsyncMessageHandler:
+  """
+  The asyncio counterpart of MessageHandler.
+
+  Parsing runs inline on the event loop (it is CPU-bound and fast), while the
+  processor may be an ``async def`` coroutine function, so I/O-bound processors
+  can run concurrently on one loop. Plain callables are accepted as well.
+
+  Attributes:
+      parser: An object implementing a parse(raw_message) method.
+      processor: A coroutine function or callable that processes parsed Message objects.
+
+  Example:
+      >>> async def processor(message):
+      ...   await client.post(message.payload)
+      >>> handler = AsyncMessageHandler(SQSParser(), processor)
+      >>> await handler.handle('{"id": "123", "payload": {}}')
+  """
+
+  def __init__(self, parser, processor, metrics: MetricsRegistry = None):
+    """
+    Initialize a new AsyncMessageHandler instance.
+
+    Args:
+        parser: An object with a parse(raw_message) method that converts raw messages
+               into Message objects.
+        processor: A coroutine function or callable that takes a Message object.
+        metrics (MetricsRegistry, optional): Registry for the latency histograms and
+               counters, as for MessageHandler. Defaults to core.metrics.registry.
+    """
+    self.parser = parser
+    self.processor = processor
+
+    metrics = metrics or registry
+    source = getattr(parser, "source", None) or type(parser).__name__
+    self._parse_seconds = metrics.histogram(
+      "message_handler_parse_seconds", "Time spent in parser.parse.", source=source
+    )
+    self._process_seconds = metrics.histogram(
+      "message_handler_process_seconds", "Time spent in the processor.", source=source
+    )
+    self._processed = metrics.counter(
+      "message_handler_processed_total", "Messages handled successfully.", source=source
+    )
+    self._failed = metrics.counter(
+      "message_handler_failed_total",
+      "Messages that failed parsing or processing.",
+      source=source,
+    )
+
+  async def handle(self, raw_message) -> Message:
+    """
+    Parse a raw message and await the processor with the result.
+
+    Args:
+        raw_message: A string containing the raw message to be processed.
+
+    Raises:
+        Exception: Any exception that occurs during parsing or processing is
+                  logged and re-raised.
+
+    Returns:
+        Message: The parsed message.
+    """
+    try:
+      start = time.perf_counter()
+      parsed = self.parser.parse(raw_message)
+      parsed_at = time.perf_counter()
+      self._parse_seconds.observe(parsed_at - start)
+      result = self.processor(parsed)
+      if inspect.isawaitable(result):
+        await result
+      self._process_seconds.observe(time.perf_counter() - parsed_at)
+      self._processed.inc()
+      message_logger.info("Message processed successfully: %s", parsed)
+      return parsed
+    except Exception as e:
+      self._failed.inc()
+      message_logger.exception("Error processing message: %s", e)
+      raise
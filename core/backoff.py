@@ -0,0 +1,69 @@
+import random
+
+
+class ExponentialBackoff:
+  """
+  Computes exponentially growing delays for repeated attempts.
+
+  The delay for attempt n (starting at 1) is initial * multiplier ** (n - 1),
+  capped at maximum. With jitter > 0 the delay is randomly reduced by up to
+  that fraction so that many workers backing off together do not synchronize.
+
+  Example:
+      >>> backoff = ExponentialBackoff(initial=0.1, maximum=5.0)
+      >>> backoff.delay(1), backoff.delay(3)
+      (0.1, 0.4)
+  """
+
+  def __init__(
+    self,
+    initial: float = 0.1,
+    maximum: float = 20.0,
+    multiplier: float = 2.0,
+    jitter: float = 0.0,
+  ):
+    """
+    Initialize the backoff.
+
+    Args:
+        initial (float): Delay in seconds for the first attempt.
+        maximum (float): Upper bound for any delay.
+        multiplier (float): Growth factor between consecutive attempts.
+        jitter (float): Fraction (0-1) of the delay that may be randomly removed.
+
+    Raises:
+        ValueError: If any argument is out of range.
+    """
+    if initial < 0 or maximum < initial:
+      raise ValueError("Expected 0 <= initial <= maximum")
+    if multiplier < 1:
+      raise ValueError("multiplier must be >= 1")
+    if not 0 <= jitter <= 1:
+      raise ValueError("jitter must be between 0 and 1")
+
+    self.initial = initial
+    self.maximum = maximum
+    self.multiplier = multiplier
+    self.jitter = jitter
+
+  def delay(self, attempt: int) -> float:
+    """
+    Return the delay in seconds for the given attempt number.
+
+    Args:
+        attempt (int): The attempt number, starting at 1.
+
+    Returns:
+        float: The delay, between 0 and maximum.
+    """
+    if attempt < 1:
+      return 0.0
+
+    try:
+      delay = min(self.initial * self.multiplier ** (attempt - 1), self.maximum)
+    except OverflowError:
+      delay = self.maximum
+
+    if self.jitter:
+      delay -= delay * self.jitter * random.random()
+    return delay
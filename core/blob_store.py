@@ -0,0 +1,83 @@
+import os
+from abc import ABC, abstractmethod
+from uuid import uuid4 as uuid
+
+
+class BlobStore(ABC):
+  """
+  Storage for message bodies that are too large to send inline.
+
+  Implementations must be thread-safe. A shared backend (for example S3) is
+  needed when producers and consumers run on different hosts.
+  """
+
+  @abstractmethod
+  def put(self, data: bytes) -> str:
+    """
+    Store data and return the key to fetch it with.
+    """
+
+  @abstractmethod
+  def get(self, key: str) -> bytes:
+    """
+    Return the data stored under key.
+
+    Raises:
+        KeyError: If there is no data under key.
+    """
+
+  @abstractmethod
+  def delete(self, key: str):
+    """
+    Remove the data stored under key, if any.
+    """
+
+
+class FileBlobStore(BlobStore):
+  """
+  A BlobStore keeping every blob in a file of a local directory.
+
+  Blobs are written to a temporary file first and renamed, so readers never
+  see a partially written blob.
+
+  Example:
+      >>> store = FileBlobStore("/var/lib/message-handler/blobs")
+      >>> key = store.put(b"...")
+      >>> store.get(key)
+  """
+
+  def __init__(self, directory: str):
+    """
+    Initialize the store, creating the directory if needed.
+
+    Args:
+        directory (str): Where blobs are written.
+    """
+    self.directory = directory
+    os.makedirs(directory, exist_ok=True)
+
+  def put(self, data: bytes) -> str:
+    key = uuid().hex
+    path = self._path(key)
+    with open(path + ".tmp", "wb") as blob_file:
+      blob_file.write(data)
+    os.replace(path + ".tmp", path)
+    return key
+
+  def get(self, key: str) -> bytes:
+    try:
+      with open(self._path(key), "rb") as blob_file:
+        return blob_file.read()
+    except FileNotFoundError:
+      raise KeyError(key) from None
+
+  def delete(self, key: str):
+    try:
+      os.remove(self._path(key))
+    except FileNotFoundError:
+      pass
+
+  def _path(self, key: str) -> str:
+    if not key.isalnum():
+      raise KeyError(key)
+    return os.path.join(self.directory, key)
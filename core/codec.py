@@ -0,0 +1,258 @@
+import base64
+import gzip
+import json
+
+from core.blob_store import BlobStore
+
+try:  # Python 3.14+
+  from compression import zstd as _zstd
+
+  def _zstd_compress(data: bytes, level: int) -> bytes:
+    return _zstd.compress(data, level=level)
+
+  _zstd_decompress = _zstd.decompress
+except ImportError:  # pragma: no cover - depends on the environment
+  try:
+    import zstandard
+
+    def _zstd_compress(data: bytes, level: int) -> bytes:
+      return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def _zstd_decompress(data: bytes) -> bytes:
+      return zstandard.ZstdDecompressor().decompress(data)
+  except ImportError:
+    _zstd_compress = _zstd_decompress = None
+
+# Message attributes marking encoded bodies, for consumers that want to tell
+# encoded messages apart without reading them.
+ENCODING_ATTRIBUTE = "BodyEncoding"
+CLAIM_CHECK_ATTRIBUTE = "ClaimCheck"
+
+# Encoded bodies are JSON objects starting with this key.
+_CODEC_KEY = "$codec"
+_MARKER = '{"' + _CODEC_KEY + '"'
+_DEFAULT_LEVELS = {"gzip": 6, "zstd": 3}
+# Envelope fields copied into claim checks, so that lazy parsers can build the
+# message without fetching the body.
+_ENVELOPE_FIELDS = ("id", "timestamp")
+
+
+class EncodedBody:
+  """
+  A decoded codec wrapper: how a body was encoded and where its data is.
+
+  Attributes:
+      encoding (str): "gzip", "zstd" or "identity".
+      data (str): The base64 encoded body, for bodies sent inline.
+      blob_key (str): The blob store key, for offloaded bodies.
+      envelope (dict): id and timestamp of an offloaded message, when known.
+  """
+
+  __slots__ = ("encoding", "data", "blob_key", "envelope")
+
+  def __init__(
+    self, encoding: str, data: str = None, blob_key: str = None, envelope: dict = None
+  ):
+    self.encoding = encoding
+    self.data = data
+    self.blob_key = blob_key
+    self.envelope = envelope or {}
+
+  @property
+  def offloaded(self) -> bool:
+    """
+    Whether the body is in the blob store.
+    """
+    return self.blob_key is not None
+
+
+class BodyCodec:
+  """
+  Compresses large message bodies and offloads very large ones to a blob store.
+
+  Bodies of at least compress_above bytes are compressed and base64 encoded,
+  unless that does not make them smaller. When the encoded body and its message
+  attributes still take at least offload_above bytes, the body is written to
+  the blob store and replaced by a claim check holding the blob key (the
+  claim-check pattern). Both are sent as small JSON wrappers, so a parser with
+  the same codec recognizes and decodes them from the body alone; bodies
+  without a wrapper pass through unchanged. encode() also returns message
+  attributes marking the encoding.
+
+  Blobs are not deleted when their message is consumed; expire them in the
+  blob store.
+
+  Example:
+      >>> codec = BodyCodec(compression="zstd", blob_store=FileBlobStore("/tmp/blobs"))
+      >>> producer = SqsProducer(QUEUE_URL, codec=codec)
+      >>> parser = SQSParser(lazy=True, codec=codec)
+  """
+
+  def __init__(
+    self,
+    compression: str = "gzip",
+    compress_above: int = 1024,
+    level: int = None,
+    blob_store: BlobStore = None,
+    offload_above: int = 192 * 1024,
+  ):
+    """
+    Initialize the BodyCodec.
+
+    Args:
+        compression (str): "gzip", "zstd" (Python 3.14+ or the zstandard
+            package) or None to disable compression.
+        compress_above (int): Minimum body size in bytes to compress.
+        level (int, optional): Compression level. Defaults to 6 for gzip and 3
+            for zstd.
+        blob_store (BlobStore, optional): Where bodies above offload_above are
+            stored. If None, bodies are never offloaded.
+        offload_above (int): Minimum size in bytes of the encoded body plus
+            its message attributes to offload. Defaults to 192 KiB, below the
+            256 KiB SQS message limit.
+
+    Raises:
+        ValueError: If the compression is unknown or unavailable.
+    """
+    if compression not in (None, "gzip", "zstd"):
+      raise ValueError(f"Unknown compression: {compression}")
+    if compression == "zstd" and _zstd_compress is None:
+      raise ValueError("zstd needs Python 3.14 or the zstandard package")
+
+    self.compression = compression
+    self.compress_above = compress_above
+    self.level = level if level is not None else _DEFAULT_LEVELS.get(compression)
+    self.blob_store = blob_store
+    self.offload_above = offload_above
+
+  def encode(self, body: str, envelope: dict = None) -> tuple:
+    """
+    Encode a message body for sending.
+
+    Args:
+        body (str): The message body.
+        envelope (dict, optional): The message the body was serialized from.
+            Its id and timestamp are copied into claim checks.
+
+    Returns:
+        tuple: The body to send and a dict of SQS message attributes marking
+            the encoding (empty when the body is sent unchanged).
+    """
+    data = body.encode("utf-8")
+    encoding = "identity"
+    if self.compression is not None and len(data) >= self.compress_above:
+      compressed = self._compress(data)
+      # Base64 adds a third, so weakly compressible bodies would grow.
+      if len(compressed) * 4 // 3 + 32 < len(data):
+        data = compressed
+        encoding = self.compression
+
+    if encoding == "identity":
+      encoded, attributes = body, {}
+    else:
+      wrapper = {_CODEC_KEY: encoding, "data": base64.b64encode(data).decode("ascii")}
+      encoded = json.dumps(wrapper)
+      attributes = _string_attribute(ENCODING_ATTRIBUTE, encoding)
+
+    if (
+      self.blob_store is not None
+      and _message_size(encoded, attributes) >= self.offload_above
+    ):
+      key = self.blob_store.put(data)
+      wrapper = {_CODEC_KEY: encoding, "blob": key}
+      for field in _ENVELOPE_FIELDS:
+        value = (envelope or {}).get(field)
+        if type(value) is str:
+          wrapper[field] = value
+      return json.dumps(wrapper), {
+        **_string_attribute(ENCODING_ATTRIBUTE, encoding),
+        **_string_attribute(CLAIM_CHECK_ATTRIBUTE, key),
+      }
+    return encoded, attributes
+
+  def unwrap(self, body) -> EncodedBody:
+    """
+    Return the codec wrapper of an encoded body, without fetching or
+    decompressing anything.
+
+    Args:
+        body: A received message body, as str or UTF-8 bytes.
+
+    Returns:
+        EncodedBody: The wrapper, or None if the body is not encoded.
+
+    Raises:
+        ValueError: If the wrapper is malformed.
+    """
+    if type(body) is bytes:
+      body = body.decode("utf-8")
+    if not body.startswith(_MARKER):
+      return None
+
+    wrapper = json.loads(body)
+    encoding = wrapper.get(_CODEC_KEY)
+    if encoding not in ("identity", "gzip", "zstd"):
+      raise ValueError(f"Unknown body encoding: {encoding}")
+    if "blob" not in wrapper and "data" not in wrapper:
+      raise ValueError("Encoded body has neither data nor a blob key")
+    envelope = {field: wrapper[field] for field in _ENVELOPE_FIELDS if field in wrapper}
+    return EncodedBody(encoding, wrapper.get("data"), wrapper.get("blob"), envelope)
+
+  def resolve(self, encoded: EncodedBody) -> str:
+    """
+    Return the original body of a wrapper, fetching it from the blob store and
+    decompressing it as needed.
+
+    Raises:
+        ValueError: If the body cannot be fetched or decoded.
+    """
+    if encoded.offloaded:
+      if self.blob_store is None:
+        raise ValueError("Received a claim check, but the codec has no blob store")
+      try:
+        data = self.blob_store.get(encoded.blob_key)
+      except KeyError:
+        raise ValueError(f"Blob {encoded.blob_key} not found") from None
+    else:
+      data = base64.b64decode(encoded.data)
+
+    if encoded.encoding == "gzip":
+      data = gzip.decompress(data)
+    elif encoded.encoding == "zstd":
+      if _zstd_decompress is None:
+        raise ValueError("zstd needs Python 3.14 or the zstandard package")
+      data = _zstd_decompress(data)
+    return data.decode("utf-8")
+
+  def decode(self, body):
+    """
+    Return the original body of a received message body.
+
+    Args:
+        body: A received message body, as str or UTF-8 bytes.
+
+    Returns:
+        The original body; bodies that are not encoded are returned unchanged.
+
+    Raises:
+        ValueError: If the body cannot be fetched or decoded.
+    """
+    encoded = self.unwrap(body)
+    return body if encoded is None else self.resolve(encoded)
+
+  def _compress(self, data: bytes) -> bytes:
+    if self.compression == "gzip":
+      return gzip.compress(data, compresslevel=self.level, mtime=0)
+    return _zstd_compress(data, self.level)
+
+
+def _string_attribute(name: str, value: str) -> dict:
+  return {name: {"DataType": "String", "StringValue": value}}
+
+
+def _message_size(body: str, attributes: dict) -> int:
+  # SQS counts the body and the name, type and value of every attribute.
+  size = len(body.encode("utf-8"))
+  for name, attribute in attributes.items():
+    size += len(name) + len(attribute["DataType"]) + len(attribute["StringValue"])
+  return size
@@ -0,0 +1,153 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from models.message import Message
+
+
+class DedupStore(ABC):
+  """
+  Storage of the keys of already processed messages.
+
+  Implementations may be shared between handlers and must be thread-safe. A
+  shared backend (for example Redis, with SET NX and an expiry) lets several
+  consumer processes skip each other's duplicates.
+  """
+
+  @abstractmethod
+  def contains(self, key: str) -> bool:
+    """
+    Return whether key has been added and has not expired.
+    """
+
+  @abstractmethod
+  def add(self, key: str):
+    """
+    Remember key as processed.
+    """
+
+
+class InMemoryDedupStore(DedupStore):
+  """
+  A bounded, in-process DedupStore with LRU eviction and a time to live.
+
+  Keys expire ttl seconds after they were added. When max_size keys are stored,
+  adding a key evicts the least recently used one.
+
+  Example:
+      >>> store = InMemoryDedupStore(max_size=100_000, ttl=3600)
+  """
+
+  def __init__(self, max_size: int = 100_000, ttl: float = 3600.0):
+    """
+    Initialize the store.
+
+    Args:
+        max_size (int): Maximum number of keys kept.
+        ttl (float): Seconds a key is remembered. None keeps keys until evicted.
+
+    Raises:
+        ValueError: If max_size or ttl is not positive.
+    """
+    if max_size < 1:
+      raise ValueError("max_size must be at least 1")
+    if ttl is not None and ttl <= 0:
+      raise ValueError("ttl must be positive")
+
+    self.max_size = max_size
+    self.ttl = ttl
+    self._expiries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def contains(self, key: str) -> bool:
+    with self._lock:
+      expires_at = self._expiries.get(key)
+      if expires_at is None:
+        return False
+      if expires_at < time.monotonic():
+        del self._expiries[key]
+        return False
+      self._expiries.move_to_end(key)
+      return True
+
+  def add(self, key: str):
+    expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+    with self._lock:
+      self._expiries[key] = expires_at
+      self._expiries.move_to_end(key)
+      while len(self._expiries) > self.max_size:
+        self._expiries.popitem(last=False)
+
+  def __len__(self) -> int:
+    return len(self._expiries)
+
+
+class Deduplicator:
+  """
+  Detects messages that have already been processed.
+
+  MessageHandler checks seen() after parsing and skips the processor for
+  duplicates, and calls mark() once a message has been processed successfully,
+  so failed messages are still retried. Two copies of a message handled at the
+  same time can both be processed; deduplication is best effort.
+
+  Attributes:
+      hits (int): Messages reported as duplicates.
+      misses (int): Messages reported as new.
+
+  Example:
+      >>> deduplicator = Deduplicator(key_fn=lambda message: message.payload["order_id"])
+      >>> handler = MessageHandler(SQSParser(), message_processor, dedup=deduplicator)
+  """
+
+  def __init__(self, store: DedupStore = None, key_fn=None):
+    """
+    Initialize the Deduplicator.
+
+    Args:
+        store (DedupStore, optional): Defaults to an InMemoryDedupStore.
+        key_fn (optional): A callable returning the dedup key of a Message.
+            Defaults to the message id.
+    """
+    self.store = store or InMemoryDedupStore()
+    self.key_fn = key_fn or _message_id
+    self.hits = 0
+    self.misses = 0
+    self._lock = threading.Lock()
+
+  def seen(self, message: Message) -> bool:
+    """
+    Return whether the message has already been processed.
+    """
+    duplicate = self.store.contains(self.key_fn(message))
+    with self._lock:
+      if duplicate:
+        self.hits += 1
+      else:
+        self.misses += 1
+    return duplicate
+
+  def mark(self, message: Message):
+    """
+    Remember the message as processed.
+    """
+    self.store.add(self.key_fn(message))
+
+  def stats(self) -> dict:
+    """
+    Return the duplicate counters.
+
+    Returns:
+        dict: hits, misses and hit_rate (None before the first check).
+    """
+    checks = self.hits + self.misses
+    return {
+      "hits": self.hits,
+      "misses": self.misses,
+      "hit_rate": self.hits / checks if checks else None,
+    }
+
+
+def _message_id(message: Message) -> str:
+  return message.id
@@ -1,4 +1,10 @@
-from logger import logger
+import time
+
+from core.dedup import Deduplicator
+from core.limits import AimdLimiter, TokenBucket
+from core.metrics import MetricsRegistry, registry
+from core.schemas import SchemaRegistry
+from logger import message_logger
 from models.message import Message
 
 
@@ -21,7 +27,17 @@ class MessageHandler:
       >>> handler.handle('{"id": "123", "payload": {}}')
   """
 
-  def __init__(self, parser, processor):
+  def __init__(
+    self,
+    parser,
+    processor,
+    metrics: MetricsRegistry = None,
+    batch_processor=None,
+    dedup: Deduplicator = None,
+    schemas: SchemaRegistry = None,
+    limiter: AimdLimiter = None,
+    rate_limit: TokenBucket = None,
+  ):
     """
     Initialize a new MessageHandler instance.
 
@@ -29,12 +45,65 @@ class MessageHandler:
         parser: An object with a parse(raw_message) method that converts raw messages
                into Message objects.
         processor: A callable that takes a Message object as input and processes it.
+        metrics (MetricsRegistry, optional): Registry for the parse and process
+               latency histograms and the processed/failed counters. Defaults to
+               core.metrics.registry.
+        batch_processor (optional): A callable that takes a list of Message objects
+               and returns one truthy/falsy success flag per message, in order
+               (or None when every message succeeded). When set, handle_batch
+               passes whole batches to it instead of calling processor per message.
+        dedup (Deduplicator, optional): Skips the processor for messages that
+               have already been processed successfully. Duplicates count as
+               handled, so consumers acknowledge them.
+        schemas (SchemaRegistry, optional): Validates every payload against the
+               model of its message type. The validated payload is then passed
+               as a second argument: processor(message, payload) and
+               batch_processor(messages, payloads). Invalid payloads fail like
+               parse errors.
+        limiter (AimdLimiter, optional): Bounds the processor calls running at
+               once, adapting the bound to their latency and failures. Calls
+               wait for a free slot. SqsConsumer also sizes its receives by
+               the limit.
+        rate_limit (TokenBucket, optional): Bounds the rate of processed
+               messages. Calls wait for tokens, one per message.
 
     Raises:
         TypeError: If parser or processor are not of the correct type.
     """
     self.parser = parser
     self.processor = processor
+    self.batch_processor = batch_processor
+    self.dedup = dedup
+    self.schemas = schemas
+    self.limiter = limiter
+    self.rate_limit = rate_limit
+
+    metrics = metrics or registry
+    source = getattr(parser, "source", None) or type(parser).__name__
+    self._parse_seconds = metrics.histogram(
+      "message_handler_parse_seconds", "Time spent in parser.parse.", source=source
+    )
+    self._process_seconds = metrics.histogram(
+      "message_handler_process_seconds", "Time spent in the processor.", source=source
+    )
+    self._processed = metrics.counter(
+      "message_handler_processed_total", "Messages handled successfully.", source=source
+    )
+    self._failed = metrics.counter(
+      "message_handler_failed_total",
+      "Messages that failed parsing or processing.",
+      source=source,
+    )
+    self._duplicates = metrics.counter(
+      "message_handler_duplicates_total",
+      "Messages skipped because they were already processed.",
+      source=source,
+    )
+    self._batch_seconds = metrics.histogram(
+      "message_handler_process_batch_seconds",
+      "Time spent in the batch processor, per batch.",
+      source=source,
+    )
 
   def handle(self, raw_message) -> Message:
     """
@@ -55,9 +124,154 @@ class MessageHandler:
         None
     """
     try:
+      start = time.perf_counter()
       parsed = self.parser.parse(raw_message)
-      self.processor(parsed)
-      logger.info(f"Message processed successfully: {parsed}")
+      self._parse_seconds.observe(time.perf_counter() - start)
+      if self.dedup is not None and self.dedup.seen(parsed):
+        self._duplicates.inc()
+        message_logger.info("Skipping duplicate message: %s", parsed.id)
+        return
+      if self.schemas is None:
+        arguments = (parsed,)
+      else:
+        arguments = (parsed, self.schemas.validate(parsed))
+      self._call(self.processor, arguments, self._process_seconds)
+      self._processed.inc()
+      if self.dedup is not None:
+        self.dedup.mark(parsed)
+      message_logger.info("Message processed successfully: %s", parsed)
     except Exception as e:
-      logger.exception(f"Error processing message: {e}")
+      self._failed.inc()
+      message_logger.exception("Error processing message: %s", e)
       raise
+
+  def handle_batch(self, raw_messages: list) -> list:
+    """
+    Parse and process a batch of raw messages, reporting success per message.
+
+    Messages that fail to parse or, with schemas, fail validation are reported
+    as failed and left out of the batch. Duplicates (see dedup) are reported as
+    handled and left out too. With a batch_processor, the remaining messages
+    are passed to it in a single call; if it raises, or returns the wrong
+    number of flags, every message of the call is reported as failed. Without
+    one, each message is passed to processor individually. Errors are logged,
+    not raised.
+
+    Args:
+        raw_messages (list): The raw messages to handle.
+
+    Returns:
+        list: One bool per raw message, in order, True if it was handled.
+
+    Example:
+        >>> def save_orders(messages):
+        ...   results = database.bulk_insert([message.payload for message in messages])
+        ...   return [result.ok for result in results]
+        >>> handler = MessageHandler(SQSParser(), None, batch_processor=save_orders)
+        >>> handler.handle_batch(raw_messages)
+        [True, True, False]
+    """
+    if self.batch_processor is None:
+      return [self._handle_quietly(raw_message) for raw_message in raw_messages]
+
+    results = [False] * len(raw_messages)
+    parsed = []
+    indexes = []
+    for index, raw_message in enumerate(raw_messages):
+      try:
+        start = time.perf_counter()
+        message = self.parser.parse(raw_message)
+        self._parse_seconds.observe(time.perf_counter() - start)
+      except Exception as e:
+        self._failed.inc()
+        message_logger.error("Error parsing message: %s", e)
+        continue
+      if self.dedup is not None and self.dedup.seen(message):
+        self._duplicates.inc()
+        results[index] = True
+        continue
+      parsed.append(message)
+      indexes.append(index)
+
+    if self.schemas is not None:
+      parsed, indexes, payloads = self._validate_batch(parsed, indexes)
+
+    if not parsed:
+      return results
+
+    try:
+      arguments = (parsed,) if self.schemas is None else (parsed, payloads)
+      outcomes = self._call(
+        self.batch_processor, arguments, self._batch_seconds, len(parsed)
+      )
+      if outcomes is None:
+        outcomes = [True] * len(parsed)
+      else:
+        outcomes = list(outcomes)
+      if len(outcomes) != len(parsed):
+        raise ValueError(
+          f"batch_processor returned {len(outcomes)} results for {len(parsed)} messages"
+        )
+    except Exception as e:
+      self._failed.inc(len(parsed))
+      message_logger.exception("Error processing message batch: %s", e)
+      return results
+
+    succeeded = 0
+    for index, message, outcome in zip(indexes, parsed, outcomes):
+      results[index] = bool(outcome)
+      if outcome:
+        succeeded += 1
+        if self.dedup is not None:
+          self.dedup.mark(message)
+    self._processed.inc(succeeded)
+    self._failed.inc(len(parsed) - succeeded)
+    message_logger.info(
+      "Message batch processed: %d succeeded, %d failed",
+      succeeded,
+      len(parsed) - succeeded,
+    )
+    return results
+
+  def _validate_batch(self, messages: list, indexes: list) -> tuple:
+    valid_messages = []
+    valid_indexes = []
+    payloads = []
+    validated = self.schemas.validate_batch(messages, return_exceptions=True)
+    for message, index, payload in zip(messages, indexes, validated):
+      if isinstance(payload, Exception):
+        self._failed.inc()
+        message_logger.error("Invalid payload in message %s: %s", message.id, payload)
+        continue
+      valid_messages.append(message)
+      valid_indexes.append(index)
+      payloads.append(payload)
+    return valid_messages, valid_indexes, payloads
+
+  def _call(self, processor, arguments: tuple, histogram, messages: int = 1):
+    # Waiting for the rate limit or the limiter is not processing time.
+    if self.rate_limit is not None:
+      self.rate_limit.acquire(messages)
+    if self.limiter is not None:
+      self.limiter.acquire()
+    start = time.perf_counter()
+    succeeded = False
+    try:
+      result = processor(*arguments)
+      succeeded = True
+      return result
+    finally:
+      latency = time.perf_counter() - start
+      # The per-message histogram times successful calls, the batch one every call.
+      if succeeded or histogram is self._batch_seconds:
+        histogram.observe(latency)
+      if self.limiter is not None:
+        self.limiter.release(latency, succeeded)
+
+  def _handle_quietly(self, raw_message) -> bool:
+    try:
+      self.handle(raw_message)
+    except Exception:
+      # handle() has logged and counted the failure.
+      return False
+    return True
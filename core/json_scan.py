@@ -0,0 +1,199 @@
+import json
+import re
+from json import JSONDecodeError
+from json.decoder import scanstring
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_WHITESPACE_CHARS = frozenset(" \t\n\r")
+# A member name without escapes, followed by the colon.
+_MEMBER_NAME = re.compile(r'[ \t\n\r]*"([^"\\\x00-\x1f]*)"[ \t\n\r]*:[ \t\n\r]*')
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}])[ \t\n\r]*")
+# A member with a scalar value, preceded by a comma, matched against the
+# reversed end of a document: `, "name": "value"` reads `"eulav" :"eman" ,`.
+_TRAILING_MEMBER = re.compile(
+  r'[ \t\n\r]*(?:"([^"\\\x00-\x1f]*)"|([0-9a-zA-Z.+\-]+))'
+  r'[ \t\n\r]*:[ \t\n\r]*"([^"\\\x00-\x1f]*)"[ \t\n\r]*,'
+)
+# How far from the end split_object looks for members after the lazy one.
+_TRAILING_WINDOW = 1024
+_scan_once = json.JSONDecoder().scan_once
+
+
+def skip_whitespace(text: str, pos: int) -> int:
+  """
+  Return the index of the first non-whitespace character at or after pos.
+  """
+  if text[pos : pos + 1] not in _WHITESPACE_CHARS:
+    # Compact JSON has no whitespace; skip the regex call.
+    return pos
+  return _WHITESPACE.match(text, pos).end()
+
+
+def decode_value(text: str, pos: int):
+  """
+  Decode the JSON value starting at pos with the C scanner.
+
+  Args:
+      text (str): The JSON document.
+      pos (int): Index of the first character of the value.
+
+  Returns:
+      tuple: The decoded value and the index just past it.
+
+  Raises:
+      json.JSONDecodeError: If no valid value starts at pos.
+  """
+  try:
+    return _scan_once(text, pos)
+  except StopIteration:
+    raise JSONDecodeError("Expecting value", text, pos) from None
+
+
+def iter_members(text: str, pos: int = 0):
+  """
+  Decode the members of the JSON object starting at pos one at a time.
+
+  Stopping the iteration early leaves the remaining members undecoded.
+
+  Args:
+      text (str): The JSON document.
+      pos (int): Index at or before the opening brace.
+
+  Yields:
+      tuple: (name, value) for every member, in document order.
+
+  Raises:
+      json.JSONDecodeError: If the object is malformed.
+  """
+  pos = skip_whitespace(text, pos)
+  if text[pos : pos + 1] != "{":
+    raise JSONDecodeError("Expecting '{'", text, pos)
+
+  pos = skip_whitespace(text, pos + 1)
+  if text[pos : pos + 1] == "}":
+    return
+
+  while True:
+    name, pos = _member_name(text, pos)
+    value, pos = decode_value(text, pos)
+    yield name, value
+
+    pos, more = _next_member(text, pos)
+    if not more:
+      return
+
+
+def split_object(text: str, lazy_name: str) -> tuple:
+  """
+  Decode the members of a top-level JSON object except one, which is left raw.
+
+  Members before `lazy_name` are decoded front to back with the C scanner;
+  the lazy member's value is not read at all. Members after it are decoded back
+  to front as long as their values are strings, numbers, booleans or null. A
+  nested value after the lazy member stops the backward scan, so the result may
+  be missing members. Callers that need a specific member should fall back to
+  json.loads when it is absent.
+
+  The lazy value itself is not validated. Decode it with decode_value(text, start).
+
+  Args:
+      text (str): The JSON document, an object.
+      lazy_name (str): The name of the member to leave undecoded.
+
+  Returns:
+      tuple: (members, start) where members maps names to decoded values and
+          start is the index of the lazy member's value, or None if the object
+          has no such member (members is then complete).
+
+  Raises:
+      json.JSONDecodeError: If the text is not a JSON object.
+
+  Example:
+      >>> text = '{"id": "1", "payload": {"a": [1, 2]}, "timestamp": "t"}'
+      >>> members, start = split_object(text, "payload")
+      >>> members, decode_value(text, start)[0]
+      ({'id': '1', 'timestamp': 't'}, {'a': [1, 2]})
+  """
+  members = {}
+  pos = skip_whitespace(text, 0)
+  if text[pos : pos + 1] != "{":
+    raise JSONDecodeError("Expecting '{'", text, pos)
+
+  pos = skip_whitespace(text, pos + 1)
+  if text[pos : pos + 1] == "}":
+    _expect_end(text, pos + 1)
+    return members, None
+
+  while True:
+    name, pos = _member_name(text, pos)
+    if name == lazy_name:
+      start = pos
+      break
+    members[name], pos = decode_value(text, pos)
+
+    pos, more = _next_member(text, pos)
+    if not more:
+      _expect_end(text, pos)
+      return members, None
+
+  end = len(text.rstrip(" \t\n\r")) - 1
+  if end <= start or text[end] != "}":
+    raise JSONDecodeError("Expecting '}'", text, end)
+
+  tail = text[max(start, end - _TRAILING_WINDOW) : end][::-1]
+  trailing = {}
+  pos = 0
+  while True:
+    match = _TRAILING_MEMBER.match(tail, pos)
+    if match is None:
+      break
+    string, scalar, name = match.groups()
+    name = name[::-1]
+    if name == lazy_name:
+      # The lazy member itself has a scalar value; leave it to the caller.
+      break
+    if string is not None:
+      value = string[::-1]
+    else:
+      token = scalar[::-1]
+      try:
+        value, stop = _scan_once(token, 0)
+      except StopIteration:
+        break
+      if stop != len(token):
+        break
+    # Like json.loads, the last duplicate name wins.
+    trailing.setdefault(name, value)
+    pos = match.end()
+
+  members.update(trailing)
+  return members, start
+
+
+def _member_name(text: str, pos: int) -> tuple:
+  match = _MEMBER_NAME.match(text, pos)
+  if match is not None:
+    return match.group(1), match.end()
+
+  if text[pos : pos + 1] != '"':
+    raise JSONDecodeError(
+      "Expecting property name enclosed in double quotes", text, pos
+    )
+  name, pos = scanstring(text, pos + 1)
+  pos = skip_whitespace(text, pos)
+  if text[pos : pos + 1] != ":":
+    raise JSONDecodeError("Expecting ':' delimiter", text, pos)
+  return name, skip_whitespace(text, pos + 1)
+
+
+def _next_member(text: str, pos: int) -> tuple:
+  match = _SEPARATOR.match(text, pos)
+  if match is None:
+    raise JSONDecodeError("Expecting ',' delimiter", text, skip_whitespace(text, pos))
+  return match.end(), match.group(1) == ","
+
+
+def _expect_end(text: str, pos: int):
+  pos = skip_whitespace(text, pos)
+  if pos != len(text):
+    raise JSONDecodeError("Extra data", text, pos)
@@ -0,0 +1,207 @@
+import threading
+import time
+
+
+class AimdLimiter:
+  """
+  Limits concurrent processor calls, adapting the limit to how the downstream
+  system copes (additive increase, multiplicative decrease).
+
+  Callers acquire() a slot before calling the processor and release() it with
+  the call's latency and outcome. Every successful call faster than
+  latency_threshold grows the limit by increase / limit, so the limit grows by
+  about `increase` per round of `limit` calls. A failed or slower call
+  multiplies the limit by backoff_ratio. Calls that were already in flight when
+  the limit was reduced reflect the old limit, so their overloads do not reduce
+  it again.
+
+  Example:
+      >>> limiter = AimdLimiter(initial=4, maximum=64, latency_threshold=0.5)
+      >>> handler = MessageHandler(SQSParser(), processor, limiter=limiter)
+  """
+
+  def __init__(
+    self,
+    initial: int = 4,
+    minimum: int = 1,
+    maximum: int = 100,
+    increase: float = 1.0,
+    backoff_ratio: float = 0.5,
+    latency_threshold: float = None,
+  ):
+    """
+    Initialize the AimdLimiter.
+
+    Args:
+        initial (int): The starting limit.
+        minimum (int): The lowest limit.
+        maximum (int): The highest limit.
+        increase (float): Limit added per round of successful calls.
+        backoff_ratio (float): Factor (0-1) applied to the limit after a
+            failed or slow call.
+        latency_threshold (float, optional): Calls slower than this many
+            seconds count as overload. If None, only failures reduce the limit.
+
+    Raises:
+        ValueError: If any argument is out of range.
+    """
+    if not 1 <= minimum <= initial <= maximum:
+      raise ValueError("Expected 1 <= minimum <= initial <= maximum")
+    if increase <= 0:
+      raise ValueError("increase must be positive")
+    if not 0 < backoff_ratio < 1:
+      raise ValueError("backoff_ratio must be between 0 and 1")
+
+    self.minimum = minimum
+    self.maximum = maximum
+    self.increase = increase
+    self.backoff_ratio = backoff_ratio
+    self.latency_threshold = latency_threshold
+
+    self.in_flight = 0
+    self.increases = 0
+    self.decreases = 0
+    self._limit = float(initial)
+    self._stale_calls = 0
+    self._changed = threading.Condition()
+
+  @property
+  def limit(self) -> int:
+    """
+    The current number of calls allowed at once.
+    """
+    return int(self._limit)
+
+  def acquire(self, timeout: float = None) -> bool:
+    """
+    Wait for a free slot and take it.
+
+    Args:
+        timeout (float, optional): Maximum seconds to wait. If None, waits
+            until a slot is free.
+
+    Returns:
+        bool: True if a slot was taken, False on timeout.
+    """
+    with self._changed:
+      if not self._changed.wait_for(lambda: self.in_flight < self.limit, timeout):
+        return False
+      self.in_flight += 1
+      return True
+
+  def release(self, latency: float, succeeded: bool):
+    """
+    Free a slot and adapt the limit to the outcome of its call.
+
+    Args:
+        latency (float): Seconds the call took.
+        succeeded (bool): Whether the call succeeded.
+    """
+    overloaded = not succeeded or (
+      self.latency_threshold is not None and latency > self.latency_threshold
+    )
+    with self._changed:
+      self.in_flight -= 1
+      # Calls complete roughly in start order, so the next in_flight releases
+      # after a decrease are those of calls started before it.
+      stale = self._stale_calls > 0
+      if stale:
+        self._stale_calls -= 1
+      if overloaded:
+        if not stale:
+          self._limit = max(self.minimum, self._limit * self.backoff_ratio)
+          self._stale_calls = self.in_flight
+          self.decreases += 1
+      elif self._limit < self.maximum:
+        self._limit = min(self.maximum, self._limit + self.increase / self._limit)
+        self.increases += 1
+      self._changed.notify_all()
+
+  def stats(self) -> dict:
+    """
+    Return the limiter state.
+
+    Returns:
+        dict: The current limit, calls in flight, and the number of limit
+            increases and decreases.
+    """
+    return {
+      "limit": self.limit,
+      "in_flight": self.in_flight,
+      "limit_increases": self.increases,
+      "limit_decreases": self.decreases,
+    }
+
+
+class TokenBucket:
+  """
+  Limits the rate of processor calls to `rate` per second, allowing bursts of
+  up to `burst` calls.
+
+  acquire() takes tokens and sleeps while the bucket is in debt. Taking more
+  tokens than the bucket holds (for example, for a large batch) is allowed:
+  the caller then waits until they have been refilled. The bucket is
+  thread-safe and waiting callers are served in arrival order.
+
+  Example:
+      >>> bucket = TokenBucket(rate=100, burst=10)
+      >>> handler = MessageHandler(SQSParser(), processor, rate_limit=bucket)
+  """
+
+  def __init__(self, rate: float, burst: float = None):
+    """
+    Initialize the TokenBucket, full.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (float, optional): Capacity of the bucket. Defaults to rate, or
+            1 when rate is below 1.
+
+    Raises:
+        ValueError: If rate or burst is not positive.
+    """
+    if rate <= 0:
+      raise ValueError("rate must be positive")
+    burst = burst if burst is not None else max(rate, 1.0)
+    if burst <= 0:
+      raise ValueError("burst must be positive")
+
+    self.rate = rate
+    self.burst = burst
+    self.throttled = 0
+    self.throttled_seconds = 0.0
+    self._tokens = burst
+    self._updated = time.monotonic()
+    self._lock = threading.Lock()
+
+  def acquire(self, tokens: float = 1) -> float:
+    """
+    Take tokens, sleeping until the bucket can afford them.
+
+    Args:
+        tokens (float): Tokens to take, usually the number of messages.
+
+    Returns:
+        float: Seconds slept.
+    """
+    with self._lock:
+      now = time.monotonic()
+      self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+      self._updated = now
+      self._tokens -= tokens
+      delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+      if delay:
+        self.throttled += 1
+        self.throttled_seconds += delay
+    if delay:
+      time.sleep(delay)
+    return delay
+
+  def stats(self) -> dict:
+    """
+    Return the bucket counters.
+
+    Returns:
+        dict: Calls that had to wait and the total seconds waited.
+    """
+    return {"throttled": self.throttled, "throttled_seconds": self.throttled_seconds}
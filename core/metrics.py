@@ -0,0 +1,301 @@
+import bisect
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond parsing to long polls.
+DEFAULT_BUCKETS = (
+  0.0001,
+  0.0005,
+  0.001,
+  0.0025,
+  0.005,
+  0.01,
+  0.025,
+  0.05,
+  0.1,
+  0.25,
+  0.5,
+  1.0,
+  2.5,
+  5.0,
+  10.0,
+  25.0,
+)
+
+
+class Counter:
+  """
+  A monotonically increasing, thread-safe counter.
+
+  Attributes:
+      name (str): The metric name.
+      labels (dict): The metric labels.
+      value (float): The current value.
+  """
+
+  def __init__(self, name: str, labels: dict = None):
+    self.name = name
+    self.labels = labels or {}
+    self.value = 0
+    self._lock = threading.Lock()
+
+  def inc(self, amount: float = 1):
+    """
+    Increase the counter.
+
+    Args:
+        amount (float): The increment, which must not be negative.
+    """
+    with self._lock:
+      self.value += amount
+
+
+class Histogram:
+  """
+  A thread-safe histogram of observed values, typically durations in seconds.
+
+  Observations are counted in fixed buckets, so recording one is O(log buckets)
+  and memory does not grow with traffic. Quantiles are estimated from the buckets.
+
+  Attributes:
+      name (str): The metric name.
+      labels (dict): The metric labels.
+      buckets (tuple): Upper bounds of the buckets, in increasing order.
+      count (int): Number of observations.
+      sum (float): Sum of the observed values.
+  """
+
+  def __init__(self, name: str, labels: dict = None, buckets: tuple = DEFAULT_BUCKETS):
+    if list(buckets) != sorted(buckets):
+      raise ValueError("buckets must be in increasing order")
+    self.name = name
+    self.labels = labels or {}
+    self.buckets = tuple(buckets)
+    self.count = 0
+    self.sum = 0.0
+    # One slot per bucket plus an overflow slot for values above the last bound.
+    self._counts = [0] * (len(self.buckets) + 1)
+    self._lock = threading.Lock()
+
+  def observe(self, value: float):
+    """
+    Record an observation.
+
+    Args:
+        value (float): The observed value.
+    """
+    index = bisect.bisect_left(self.buckets, value)
+    with self._lock:
+      self._counts[index] += 1
+      self.count += 1
+      self.sum += value
+
+  def time(self):
+    """
+    Return a context manager that observes the duration of its block.
+
+    Example:
+        >>> with registry.histogram("job_seconds").time():
+        ...   run_job()
+    """
+    return _Timer(self)
+
+  def cumulative_counts(self) -> list:
+    """
+    Return the number of observations at or below each bucket bound, plus the
+    total count for the implicit +Inf bucket.
+    """
+    with self._lock:
+      counts = list(self._counts)
+    total = 0
+    cumulative = []
+    for count in counts:
+      total += count
+      cumulative.append(total)
+    return cumulative
+
+  def quantile(self, q: float) -> float:
+    """
+    Estimate a quantile by linear interpolation within its bucket.
+
+    Args:
+        q (float): The quantile, between 0 and 1.
+
+    Returns:
+        float: The estimate, or None without observations. Values above the last
+            bucket are reported as the last bucket bound.
+    """
+    cumulative = self.cumulative_counts()
+    total = cumulative[-1]
+    if not total:
+      return None
+
+    rank = q * total
+    index = bisect.bisect_left(cumulative, rank)
+    if index >= len(self.buckets):
+      return self.buckets[-1]
+    lower = self.buckets[index - 1] if index else 0.0
+    below = cumulative[index - 1] if index else 0
+    in_bucket = cumulative[index] - below
+    if not in_bucket:
+      return self.buckets[index]
+    return lower + (self.buckets[index] - lower) * (rank - below) / in_bucket
+
+
+class _Timer:
+  def __init__(self, histogram: Histogram):
+    self.histogram = histogram
+
+  def __enter__(self):
+    self.start = time.perf_counter()
+    return self
+
+  def __exit__(self, exc_type, exc, traceback):
+    self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+  """
+  Holds the counters and histograms of the library and exports them.
+
+  Metrics are created on first use and identified by name and labels, so every
+  component asking for the same metric shares one instance.
+
+  Example:
+      >>> registry = MetricsRegistry()
+      >>> registry.counter("messages_processed_total", source="sqs").inc()
+      >>> print(registry.prometheus())
+  """
+
+  def __init__(self):
+    self._metrics = {}
+    self._help = {}
+    self._lock = threading.Lock()
+
+  def counter(self, name: str, help: str = "", **labels) -> Counter:
+    """
+    Return the counter with this name and labels, creating it if needed.
+
+    Args:
+        name (str): The metric name.
+        help (str): A description, exported as # HELP.
+        **labels: Label values.
+
+    Returns:
+        Counter: The counter.
+    """
+    return self._get(Counter, name, help, labels)
+
+  def histogram(
+    self, name: str, help: str = "", buckets: tuple = DEFAULT_BUCKETS, **labels
+  ) -> Histogram:
+    """
+    Return the histogram with this name and labels, creating it if needed.
+
+    Args:
+        name (str): The metric name.
+        help (str): A description, exported as # HELP.
+        buckets (tuple): Bucket upper bounds, used when the histogram is created.
+        **labels: Label values.
+
+    Returns:
+        Histogram: The histogram.
+    """
+    return self._get(Histogram, name, help, labels, buckets=buckets)
+
+  def snapshot(self) -> dict:
+    """
+    Return the current values of every metric.
+
+    Returns:
+        dict: Maps "name{labels}" to the counter value, or for histograms to a
+            dict with count, sum, mean, p50, p90 and p99.
+    """
+    snapshot = {}
+    for metric in self._all():
+      key = metric.name + _format_labels(metric.labels)
+      if isinstance(metric, Counter):
+        snapshot[key] = metric.value
+      else:
+        snapshot[key] = {
+          "count": metric.count,
+          "sum": metric.sum,
+          "mean": metric.sum / metric.count if metric.count else None,
+          "p50": metric.quantile(0.5),
+          "p90": metric.quantile(0.9),
+          "p99": metric.quantile(0.99),
+        }
+    return snapshot
+
+  def prometheus(self) -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The exposition text.
+    """
+    lines = []
+    seen = set()
+    for metric in self._all():
+      kind = "counter" if isinstance(metric, Counter) else "histogram"
+      if metric.name not in seen:
+        seen.add(metric.name)
+        if self._help.get(metric.name):
+          lines.append(f"# HELP {metric.name} {self._help[metric.name]}")
+        lines.append(f"# TYPE {metric.name} {kind}")
+
+      if kind == "counter":
+        lines.append(f"{metric.name}{_format_labels(metric.labels)} {metric.value}")
+        continue
+
+      cumulative = metric.cumulative_counts()
+      bounds = [repr(float(bound)) for bound in metric.buckets] + ["+Inf"]
+      for bound, count in zip(bounds, cumulative):
+        labels = _format_labels({**metric.labels, "le": bound})
+        lines.append(f"{metric.name}_bucket{labels} {count}")
+      labels = _format_labels(metric.labels)
+      lines.append(f"{metric.name}_sum{labels} {metric.sum}")
+      lines.append(f"{metric.name}_count{labels} {cumulative[-1]}")
+    return "\n".join(lines) + "\n"
+
+  def clear(self):
+    """
+    Remove every metric.
+    """
+    with self._lock:
+      self._metrics.clear()
+      self._help.clear()
+
+  def _get(self, kind, name: str, help: str, labels: dict, **kwargs):
+    key = (name, tuple(sorted(labels.items())))
+    metric = self._metrics.get(key)
+    if metric is None:
+      with self._lock:
+        metric = self._metrics.get(key)
+        if metric is None:
+          metric = kind(name, labels, **kwargs)
+          self._metrics[key] = metric
+          if help:
+            self._help.setdefault(name, help)
+    if not isinstance(metric, kind):
+      raise TypeError(f"Metric {name} is a {type(metric).__name__}")
+    return metric
+
+  def _all(self) -> list:
+    with self._lock:
+      return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+
+def _format_labels(labels: dict) -> str:
+  if not labels:
+    return ""
+  pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+  return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+  return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# The registry used by the library components unless they are given another one.
+registry = MetricsRegistry()
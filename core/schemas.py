@@ -0,0 +1,168 @@
+import threading
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from models.message import Message
+
+
+class SchemaRegistry:
+  """
+  Maps message types to pydantic models and validates message payloads.
+
+  The type of a message is the value of the discriminator field of its payload.
+  Validators are compiled once per type and cached: creating a TypeAdapter
+  builds a validator, which costs several times more than running it.
+  validate_batch groups a batch by type and validates each group with a single
+  list validator call, which is cheaper per message than validating them one
+  by one.
+
+  Example:
+      >>> schemas = SchemaRegistry(discriminator="type")
+      >>> @schemas.register("order")
+      ... class Order(BaseModel):
+      ...   order_id: str
+      ...   amount: float
+      >>> schemas.validate(message)
+      Order(order_id='123', amount=9.5)
+  """
+
+  def __init__(self, discriminator: str = "type", default: type[BaseModel] = None):
+    """
+    Initialize the SchemaRegistry.
+
+    Args:
+        discriminator (str): The payload field holding the message type.
+        default (type[BaseModel], optional): Model for payloads whose type has
+            no registered model. If None, such payloads are rejected.
+    """
+    self.discriminator = discriminator
+    self.default = default
+    self._models = {}
+    self._adapters = {}
+    self._list_adapters = {}
+    self._lock = threading.Lock()
+
+  def register(self, message_type: str, model: type[BaseModel] = None):
+    """
+    Register the model of a message type.
+
+    Can be used as a class decorator by leaving out model.
+
+    Args:
+        message_type (str): The discriminator value.
+        model (type[BaseModel], optional): The payload model.
+
+    Returns:
+        The model, or a decorator registering the decorated model.
+
+    Raises:
+        ValueError: If the message type is already registered.
+    """
+    if model is None:
+      return lambda model: self.register(message_type, model)
+
+    with self._lock:
+      if message_type in self._models:
+        raise ValueError(f"Message type {message_type!r} is already registered")
+      self._models[message_type] = model
+    return model
+
+  def model_for(self, message: Message) -> type[BaseModel]:
+    """
+    Return the model for the payload of a message.
+
+    Args:
+        message (Message): A parsed message.
+
+    Returns:
+        type[BaseModel]: The registered model, or the default model.
+
+    Raises:
+        ValueError: If the message type has no model and there is no default.
+            An unhashable type, such as a list, never has a model.
+    """
+    message_type = message.payload.get(self.discriminator)
+    try:
+      model = self._models.get(message_type, self.default)
+    except TypeError:
+      model = self.default
+    if model is None:
+      raise ValueError(f"No schema registered for message type {message_type!r}")
+    return model
+
+  def validate(self, message: Message) -> BaseModel:
+    """
+    Validate the payload of a message against the model of its type.
+
+    Args:
+        message (Message): A parsed message.
+
+    Returns:
+        BaseModel: The validated payload.
+
+    Raises:
+        ValueError: If the message type is unknown or the payload is invalid
+            (pydantic.ValidationError is a ValueError).
+    """
+    model = self.model_for(message)
+    return self._adapter(self._adapters, model, model).validate_python(message.payload)
+
+  def validate_batch(self, messages: list, return_exceptions: bool = False) -> list:
+    """
+    Validate the payloads of a batch of messages.
+
+    Messages are grouped by model and every group is validated in one call.
+    When a group contains invalid payloads, its messages are validated again
+    one by one, so every valid payload is still returned.
+
+    Args:
+        messages (list): Parsed messages.
+        return_exceptions (bool): If True, an invalid payload is returned as the
+            exception describing the problem instead of being raised.
+
+    Returns:
+        list: One validated payload (or exception) per message, in order.
+
+    Raises:
+        ValueError: The first error, unless return_exceptions is True.
+    """
+    results = [None] * len(messages)
+    groups = {}
+    for index, message in enumerate(messages):
+      try:
+        model = self.model_for(message)
+      except ValueError as e:
+        if not return_exceptions:
+          raise
+        results[index] = e
+        continue
+      groups.setdefault(model, []).append(index)
+
+    for model, indexes in groups.items():
+      payloads = [messages[index].payload for index in indexes]
+      validator = self._adapter(self._list_adapters, model, list[model])
+      try:
+        validated = validator.validate_python(payloads)
+      except ValidationError:
+        validated = [
+          self._validate_one(model, payload, return_exceptions) for payload in payloads
+        ]
+      for index, payload in zip(indexes, validated):
+        results[index] = payload
+    return results
+
+  def _validate_one(self, model, payload: dict, return_exceptions: bool):
+    try:
+      return self._adapter(self._adapters, model, model).validate_python(payload)
+    except ValidationError as e:
+      if not return_exceptions:
+        raise
+      return e
+
+  def _adapter(self, cache: dict, model, annotation) -> TypeAdapter:
+    adapter = cache.get(model)
+    if adapter is None:
+      adapter = TypeAdapter(annotation)
+      with self._lock:
+        adapter = cache.setdefault(model, adapter)
+    return adapter
@@ -8,7 +8,7 @@ def process_message(message):
     queue_url="YOUR_QUEUE_URL_HERE"  # Replace with your actual SQS queue URL
   )
 
-  message_id = sqs_producer.send_message(message_body=str(message))
+  message_id = sqs_producer.send_message(message_body=message)
 
   print(f"Message processed and sent with ID: {message_id}")
 
@@ -1,8 +1,20 @@
 # message_handler_lib/logger.py
+import atexit
 import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL_ENV = "MESSAGE_HANDLER_LOG_LEVEL"
 
 logger = logging.getLogger("message_handler")
 
+# Per-message lines (parsed, processed, sent, failed) go through this child
+# logger so they can be sampled without touching the lifecycle lines above.
+message_logger = logger.getChild("messages")
+
 formatter = logging.Formatter(
   fmt="[%(levelname)s] %(name)s.%(funcName)s:%(lineno)d - %(message)s"
 )
@@ -10,4 +22,186 @@ formatter = logging.Formatter(
 handler = logging.StreamHandler()
 handler.setFormatter(formatter)
 logger.addHandler(handler)
-logger.setLevel(logging.DEBUG)
+logger.setLevel(os.getenv(LOG_LEVEL_ENV, "DEBUG").upper())
+
+_listener = None
+_sampling_filter = None
+
+
+class SamplingFilter(logging.Filter):
+  """
+  Samples and rate-limits log records per level.
+
+  Records at a level without a rule always pass. Sampling keeps every n-th record
+  of a level (deterministic, so a rate of 0.01 keeps exactly 1 in 100). Rate
+  limiting allows at most max_per_second records of a level per second. Records
+  dropped by either rule are counted, and the count is appended to the next
+  record that passes, so dropped lines stay visible in the output.
+
+  Example:
+      >>> message_logger.addFilter(
+      ...   SamplingFilter(sample_rates={logging.INFO: 0.01}, max_per_second=100)
+      ... )
+  """
+
+  def __init__(self, sample_rates: dict = None, max_per_second: float = None):
+    """
+    Initialize the filter.
+
+    Args:
+        sample_rates (dict, optional): Maps levels (int or name) to the fraction of
+            records kept, between 0 and 1.
+        max_per_second (float, optional): Maximum records per second for each
+            level below WARNING.
+
+    Raises:
+        ValueError: If a rate is outside [0, 1] or max_per_second is not positive.
+    """
+    super().__init__()
+    self.intervals = {}
+    for level, rate in (sample_rates or {}).items():
+      if not 0 <= rate <= 1:
+        raise ValueError("sample rates must be between 0 and 1")
+      self.intervals[_level_number(level)] = round(1 / rate) if rate else 0
+    if max_per_second is not None and max_per_second <= 0:
+      raise ValueError("max_per_second must be positive")
+    self.max_per_second = max_per_second
+
+    self.dropped = 0
+    self._seen = {}
+    self._windows = {}
+    self._dropped_since_emit = {}
+    self._lock = threading.Lock()
+
+  def filter(self, record: logging.LogRecord) -> bool:
+    level = record.levelno
+    if level not in self.intervals and (
+      self.max_per_second is None or level >= logging.WARNING
+    ):
+      return True
+
+    with self._lock:
+      if not self._keep(level):
+        self.dropped += 1
+        self._dropped_since_emit[level] = self._dropped_since_emit.get(level, 0) + 1
+        return False
+      dropped = self._dropped_since_emit.pop(level, 0)
+
+    if dropped:
+      record.msg = f"{record.msg} ({dropped} similar lines dropped)"
+    return True
+
+  def _keep(self, level: int) -> bool:
+    interval = self.intervals.get(level)
+    if interval is not None:
+      seen = self._seen.get(level, 0)
+      self._seen[level] = seen + 1
+      if interval == 0 or seen % interval:
+        return False
+
+    if self.max_per_second is not None and level < logging.WARNING:
+      now = time.monotonic()
+      window_start, count = self._windows.get(level, (now, 0))
+      if now - window_start >= 1:
+        window_start, count = now, 0
+      if count >= self.max_per_second:
+        return False
+      self._windows[level] = (window_start, count + 1)
+    return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+  """
+  A QueueHandler that leaves formatting to the listener thread.
+
+  QueueHandler.prepare formats the record in the calling thread so that it can be
+  pickled. The queue here is in-process, so the record is passed as is and the
+  message is only rendered by the listener.
+  """
+
+  dropped = 0
+
+  def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+    return record
+
+  def enqueue(self, record: logging.LogRecord):
+    # Never block the caller: drop the record when the writer falls behind.
+    try:
+      self.queue.put_nowait(record)
+    except queue.Full:
+      self.dropped += 1
+
+
+def configure_logging(
+  level=None,
+  background: bool = False,
+  sample_rates: dict = None,
+  max_per_second: float = None,
+  queue_size: int = 10_000,
+):
+  """
+  Configure the library loggers.
+
+  Args:
+      level (optional): Level of the "message_handler" logger, as int or name.
+          Defaults to the MESSAGE_HANDLER_LOG_LEVEL environment variable, or DEBUG.
+      background (bool): Write records from a background thread. Callers only
+          enqueue records and never block on stderr. When the queue is full,
+          records are dropped instead of blocking. Records are not propagated
+          to the root logger's handlers in this mode, as those would format and
+          write on the calling thread again.
+      sample_rates (dict, optional): Per-level sampling of per-message lines,
+          see SamplingFilter.
+      max_per_second (float, optional): Rate limit of per-message lines below
+          WARNING, per level and second.
+      queue_size (int): Capacity of the background queue.
+
+  Example:
+      >>> configure_logging(
+      ...   level="INFO", background=True, sample_rates={"INFO": 0.01}
+      ... )
+  """
+  global _listener, _sampling_filter
+
+  logger.setLevel(
+    _level_number(level if level is not None else os.getenv(LOG_LEVEL_ENV, "DEBUG"))
+  )
+
+  if _sampling_filter is not None:
+    message_logger.removeFilter(_sampling_filter)
+    _sampling_filter = None
+  if sample_rates or max_per_second is not None:
+    _sampling_filter = SamplingFilter(sample_rates, max_per_second)
+    message_logger.addFilter(_sampling_filter)
+
+  _stop_listener()
+  for existing in list(logger.handlers):
+    logger.removeHandler(existing)
+
+  logger.propagate = not background
+  if background:
+    records = queue.Queue(maxsize=queue_size)
+    logger.addHandler(_DeferredQueueHandler(records))
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+  else:
+    logger.addHandler(handler)
+
+
+def _level_number(level) -> int:
+  if isinstance(level, int):
+    return level
+  number = logging.getLevelName(str(level).upper())
+  if not isinstance(number, int):
+    raise ValueError(f"Unknown log level: {level}")
+  return number
+
+
+def _stop_listener():
+  global _listener
+  if _listener is not None:
+    _listener.stop()
+    _listener = None
+
+
+atexit.register(_stop_listener)
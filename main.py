@@ -1,34 +1,31 @@
 import os
 
-from core.handler import MessageHandler
 from parsers.sqs_parser import SQSParser
-from sources.sqs_consumer import SqsConsumer
-from sources.sqs_producer import SqsProducer
+from sources.sqs_batch_producer import SqsBatchProducer
+from sources.sqs_bridge import SqsBridge
 
+OUTPUT_QUEUE_URL = "http://sqs.us-east-1.localhost.localstack.cloud:4566/000000000000/localstack-queue-output"
 
-def process_message(message):
-  print(f"Processing message: {message}")
-
-  sqs_producer = SqsProducer(
-    queue_url="http://sqs.us-east-1.localhost.localstack.cloud:4566/000000000000/localstack-queue-output"
-  )
-
-  message_id = sqs_producer.send_message(message_body=str(message))
 
-  print(f"Message processed and sent with ID: {message_id}")
+def transform_message(message):
+  print(f"Processing message: {message}")
 
-  return True
+  return message.model_dump()
 
 
 def run():
-  parser = SQSParser()
-  handler = MessageHandler(parser, processor=process_message)
-
-  sqs_consumer = SqsConsumer(
-    queue_url=os.getenv("LOCAL_STACK_QUEUE_URL"), number_of_messages=10, handler=handler
-  )
-
-  sqs_consumer.poll_sqs()
+  with SqsBatchProducer(
+    queue_url=os.getenv("LOCAL_STACK_OUTPUT_QUEUE_URL", OUTPUT_QUEUE_URL), linger=0.01
+  ) as sqs_producer:
+    bridge = SqsBridge(
+      queue_url=os.getenv("LOCAL_STACK_QUEUE_URL"),
+      transform=transform_message,
+      producer=sqs_producer,
+      parser=SQSParser(),
+      number_of_messages=10,
+    )
+
+    bridge.run()
 
 
 if __name__ == "__main__":
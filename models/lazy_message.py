@@ -0,0 +1,202 @@
+import json
+
+from core.json_scan import decode_value, iter_members, split_object
+from models.message import Message
+
+_NOT_DECODED = object()
+
+
+class LazyMessage:
+  """
+  A Message variant that keeps the raw body and decodes the payload on demand.
+
+  id, source and timestamp are available immediately. The payload is decoded
+  only when `payload` is first read, and payload_value() reads a single
+  top-level key by decoding payload members only up to that key. Decoded values
+  are cached.
+
+  Parsers created with lazy=True return LazyMessage objects, so routing-only
+  processors never pay for decoding and validating payloads they don't read.
+  For bodies offloaded to a blob store, the body itself is fetched only when
+  the payload is first read.
+
+  Example:
+      >>> message = SQSParser(lazy=True).parse(raw_message)
+      >>> if message.payload_value("type") == "order":
+      ...   handle_order(message.payload)
+  """
+
+  __slots__ = (
+    "id",
+    "source",
+    "timestamp",
+    "_text",
+    "_payload_start",
+    "_payload",
+    "_values",
+    "_members",
+    "_loader",
+  )
+
+  def __init__(
+    self,
+    id: str,
+    source: str,
+    timestamp: str,
+    text: str,
+    payload_start: int = None,
+    payload: dict = None,
+    loader=None,
+  ):
+    """
+    Initialize a LazyMessage.
+
+    Args:
+        id (str): The message ID.
+        source (str): The message source ("kafka", "sqs" or "http").
+        timestamp (str): The message timestamp.
+        text (str): The raw message body.
+        payload_start (int, optional): Index of the payload value in text.
+        payload (dict, optional): An already decoded payload. When neither
+            payload_start nor payload is given, the payload reads as {}.
+        loader (optional): A callable returning the raw message body, called
+            on first access instead of passing text.
+    """
+    self.id = id
+    self.source = source
+    self.timestamp = timestamp
+    self._text = text
+    self._payload_start = payload_start
+    self._loader = loader
+    if payload is None and payload_start is None and loader is None:
+      payload = {}
+    self._payload = _NOT_DECODED if payload is None else payload
+    self._values = {}
+    self._members = None
+
+  @property
+  def raw(self) -> str:
+    """
+    The raw message body.
+    """
+    if self._loader is not None:
+      self._load()
+    return self._text
+
+  @property
+  def payload_decoded(self) -> bool:
+    """
+    Whether the full payload has been decoded.
+    """
+    return self._payload is not _NOT_DECODED
+
+  @property
+  def payload(self) -> dict:
+    """
+    The decoded payload, decoded on first access.
+
+    Raises:
+        ValueError: If the payload is not a valid JSON object.
+    """
+    if self._loader is not None:
+      self._load()
+    if self._payload is _NOT_DECODED:
+      try:
+        payload = decode_value(self._text, self._payload_start)[0]
+      except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON format: {e}") from e
+      if type(payload) is not dict:
+        raise ValueError(f"Payload must be an object, got {type(payload).__name__}")
+      self._payload = payload
+      self._values = None
+      self._members = None
+    return self._payload
+
+  def payload_value(self, key: str, default=None):
+    """
+    Return a single top-level payload value.
+
+    Payload members are decoded in order up to the requested key and cached, so
+    reading a key near the start of a large payload decodes little of it.
+
+    Args:
+        key (str): The payload key.
+        default: Returned when the key is missing.
+
+    Returns:
+        The decoded value, or default.
+
+    Raises:
+        ValueError: If the payload is not a valid JSON object.
+    """
+    if self._loader is not None:
+      self._load()
+    if self._payload is not _NOT_DECODED:
+      return self._payload.get(key, default)
+    if key in self._values:
+      return self._values[key]
+
+    if self._members is None:
+      self._members = iter_members(self._text, self._payload_start)
+    try:
+      for name, value in self._members:
+        # Like json.loads, the last duplicate key wins.
+        self._values[name] = value
+        if name == key:
+          return value
+    except json.JSONDecodeError as e:
+      raise ValueError(f"Invalid JSON format: {e}") from e
+
+    # Every member has been decoded: the cache is the payload.
+    self._payload = self._values
+    self._values = None
+    self._members = None
+    return self._payload.get(key, default)
+
+  def _load(self):
+    text = self._loader()
+    try:
+      payload_start = split_object(text, "payload")[1]
+    except json.JSONDecodeError as e:
+      raise ValueError(f"Invalid JSON format: {e}") from e
+    self._text = text
+    self._payload_start = payload_start
+    if payload_start is None:
+      self._payload = {}
+    self._loader = None
+
+  def to_message(self) -> Message:
+    """
+    Decode the payload and return an equivalent, validated Message.
+
+    Returns:
+        Message: The eager Message for this message.
+    """
+    return Message(
+      id=self.id, source=self.source, payload=self.payload, timestamp=self.timestamp
+    )
+
+  def model_dump(self) -> dict:
+    """
+    Return the message as a dict, like Message.model_dump.
+    """
+    return {
+      "id": self.id,
+      "source": self.source,
+      "payload": self.payload,
+      "timestamp": self.timestamp,
+    }
+
+  def __eq__(self, other):
+    if isinstance(other, (LazyMessage, Message)):
+      return self.model_dump() == other.model_dump()
+    return NotImplemented
+
+  __hash__ = None
+
+  def __repr__(self):
+    payload = repr(self._payload) if self.payload_decoded else "<not decoded>"
+    return (
+      f"LazyMessage(id={self.id!r}, source={self.source!r}, "
+      f"timestamp={self.timestamp!r}, payload={payload})"
+    )
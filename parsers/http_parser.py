@@ -0,0 +1,45 @@
+from logger import message_logger
+from models.message import Message
+from parsers.json_parser import JsonParser
+
+
+class HttpParser(JsonParser):
+  """
+  A parser for messages posted to the HTTP source.
+
+  Raw messages have the same JSON envelope as SQS and Kafka messages. Besides
+  raw JSON strings, parse() accepts envelopes that have already been decoded to
+  a dict. The HTTP source decodes request bodies once to validate and split
+  them, so its messages are never decoded twice. Decoded envelopes always give
+  an eager Message, even with lazy=True.
+
+  Example:
+      >>> parser = HttpParser()
+      >>> message = parser.parse({"id": "123", "payload": {"key": "value"}})
+      >>> message.source
+      'http'
+  """
+
+  source = "http"
+
+  def parse(self, raw_message) -> Message:
+    """
+    Parse a raw message, or an already decoded envelope, into a Message.
+
+    Args:
+        raw_message: A JSON-formatted string (or bytes), or a decoded dict.
+
+    Returns:
+        Message: The parsed message.
+
+    Raises:
+        ValueError: If the message is not valid JSON or cannot be parsed
+    """
+    if type(raw_message) is not dict:
+      return super().parse(raw_message)
+    try:
+      message = self.build(raw_message)
+    except Exception as e:
+      raise ValueError(f"Error parsing message: {e}") from e
+    message_logger.debug("Parsed message: %s", message)
+    return message
@@ -0,0 +1,196 @@
+import json
+from datetime import datetime
+from uuid import uuid4 as uuid
+
+from core.codec import BodyCodec, EncodedBody
+from core.json_scan import split_object
+from core.parser import Parser
+from logger import message_logger
+from models.lazy_message import LazyMessage
+from models.message import Message, trusted_message
+
+try:
+  import orjson
+
+  _fast_loads = orjson.loads
+except ImportError:  # pragma: no cover - depends on the environment
+  _fast_loads = json.loads
+
+
+class JsonParser(Parser):
+  """
+  Shared implementation of the JSON envelope parsers (SQSParser, KafkaParser,
+  HttpParser).
+
+  A raw message is a JSON object with optional "id", "payload" and "timestamp"
+  fields. Missing fields get defaults, which are computed only when the field
+  is actually missing. Subclasses set `source`.
+
+  With fast=True the parser uses orjson when it is installed. When the decoded
+  fields already have the right types, it builds the Message with
+  models.message.trusted_message and skips pydantic validation. Anything else goes
+  through the validating path, so invalid messages raise the same errors.
+
+  With lazy=True the parser returns LazyMessage objects instead. Only the
+  envelope fields are decoded (and type-checked) up front. The payload stays
+  raw until it is accessed, and a malformed payload is reported then.
+
+  With a codec, bodies compressed or offloaded by a producer using the same
+  codec are decoded before parsing. A lazy parser fetches an offloaded body
+  only when the payload is first read.
+
+  Attributes:
+      source (str): The Message.source value of parsed messages.
+      fast (bool): Whether the fast path is enabled.
+      lazy (bool): Whether parse returns LazyMessage objects.
+  """
+
+  source = None
+
+  def __init__(self, fast: bool = False, lazy: bool = False, codec: BodyCodec = None):
+    """
+    Initialize the parser.
+
+    Args:
+        fast (bool): Enable the fast decoding and construction path.
+        lazy (bool): Return LazyMessage objects that decode the payload on demand.
+        codec (BodyCodec, optional): Decodes compressed and offloaded bodies.
+    """
+    self.fast = fast
+    self.lazy = lazy
+    self.codec = codec
+    self._loads = _fast_loads if fast else json.loads
+
+  def parse(self, raw_message: str) -> Message:
+    """
+    Parse a raw JSON message string into a Message object.
+
+    Args:
+        raw_message (str): A JSON-formatted string (or bytes) containing the message.
+
+    Returns:
+        Message: The parsed message.
+
+    Raises:
+        ValueError: If the message is not valid JSON or cannot be parsed
+    """
+    try:
+      if self.codec is not None:
+        encoded = self.codec.unwrap(raw_message)
+        if encoded is not None:
+          if self.lazy and _has_envelope(encoded):
+            message = self.build_claim_check(encoded)
+            message_logger.debug("Parsed message: %s", message)
+            return message
+          raw_message = self.codec.resolve(encoded)
+      if self.lazy:
+        message = self.build_lazy(raw_message)
+      else:
+        message = self.build(self._loads(raw_message))
+      message_logger.debug("Parsed message: %s", message)
+      return message
+    except json.JSONDecodeError as e:
+      raise ValueError(f"Invalid JSON format: {e}") from e
+    except Exception as e:
+      raise ValueError(f"Error parsing message: {e}") from e
+
+  def build(self, data: dict) -> Message:
+    """
+    Build a Message from an already decoded JSON object.
+
+    Args:
+        data (dict): The decoded message.
+
+    Returns:
+        Message: The message, with defaults for missing fields.
+
+    Raises:
+        TypeError: If data is not a JSON object.
+    """
+    if type(data) is not dict:
+      raise TypeError(f"Expected a JSON object, got {type(data).__name__}")
+
+    message_id = data["id"] if "id" in data else str(uuid())
+    payload = data["payload"] if "payload" in data else {}
+    timestamp = (
+      data["timestamp"]
+      if "timestamp" in data
+      else datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    )
+
+    if (
+      self.fast
+      and type(message_id) is str
+      and type(payload) is dict
+      and type(timestamp) is str
+    ):
+      return trusted_message(message_id, self.source, payload, timestamp)
+
+    return Message(
+      id=message_id, source=self.source, payload=payload, timestamp=timestamp
+    )
+
+  def build_lazy(self, raw_message) -> LazyMessage:
+    """
+    Build a LazyMessage, decoding the envelope but not the payload.
+
+    When id or timestamp cannot be located without reading the payload (for
+    example, because a nested field follows it), the whole message is decoded
+    and the LazyMessage carries the decoded payload.
+
+    Args:
+        raw_message: The raw JSON message, as str or UTF-8 bytes.
+
+    Returns:
+        LazyMessage: The message, with defaults for missing fields.
+
+    Raises:
+        json.JSONDecodeError: If the message is not a JSON object.
+        TypeError: If id or timestamp is not a string.
+    """
+    text = raw_message.decode("utf-8") if type(raw_message) is bytes else raw_message
+    fields, payload_start = split_object(text, "payload")
+    payload = None
+
+    if payload_start is not None and ("id" not in fields or "timestamp" not in fields):
+      fields = json.loads(text)
+      payload_start = None
+      payload = fields["payload"]
+      if type(payload) is not dict:
+        raise TypeError(f"Payload must be an object, got {type(payload).__name__}")
+
+    message_id = fields["id"] if "id" in fields else str(uuid())
+    timestamp = (
+      fields["timestamp"]
+      if "timestamp" in fields
+      else datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    )
+    if type(message_id) is not str or type(timestamp) is not str:
+      raise TypeError("id and timestamp must be strings")
+
+    return LazyMessage(message_id, self.source, timestamp, text, payload_start, payload)
+
+  def build_claim_check(self, encoded: EncodedBody) -> LazyMessage:
+    """
+    Build a LazyMessage for an offloaded body from the envelope fields of its
+    claim check. The body is fetched when the payload is first read.
+
+    Args:
+        encoded (EncodedBody): A claim check with id and timestamp.
+
+    Returns:
+        LazyMessage: The message.
+    """
+    return LazyMessage(
+      encoded.envelope["id"],
+      self.source,
+      encoded.envelope["timestamp"],
+      None,
+      loader=lambda: self.codec.resolve(encoded),
+    )
+
+
+def _has_envelope(encoded: EncodedBody) -> bool:
+  return (
+    encoded.offloaded and "id" in encoded.envelope and "timestamp" in encoded.envelope
+  )
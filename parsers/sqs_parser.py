@@ -1,13 +1,8 @@
-import json
-from datetime import datetime
-from uuid import uuid4 as uuid
-
-from core.parser import Parser
-from logger import logger
 from models.message import Message
+from parsers.json_parser import JsonParser
 
 
-class SQSParser(Parser):
+class SQSParser(JsonParser):
   """
   A parser implementation for handling SQS messages.
 
@@ -15,8 +10,10 @@ class SQSParser(Parser):
   It handles missing fields by providing default values and ensures proper
   error handling for malformed messages.
 
+  Pass fast=True to enable the fast path described in JsonParser.
+
   Attributes:
-      None
+      fast (bool): Whether the fast path is enabled.
 
   Example:
       >>> parser = SQSParser()
@@ -25,6 +22,8 @@ class SQSParser(Parser):
       '123'
   """
 
+  source = "sqs"
+
   def parse(self, raw_message: str) -> Message:
     """
     Parse a raw SQS message string into a Message object.
@@ -52,17 +51,4 @@ class SQSParser(Parser):
         >>> message = parser.parse(raw_msg)
         >>> assert message.source == "sqs"
     """
-    try:
-      data = json.loads(raw_message)
-      message = Message(
-        id=data.get("id", "{uuid}".format(uuid=uuid())),
-        source="sqs",
-        payload=data.get("payload", {}),
-        timestamp=data.get("timestamp", datetime.now().strftime("%Y-%m-%dT%H:%M:%S")),
-      )
-      logger.debug(f"Parsed message: {message}")
-      return message
-    except json.JSONDecodeError as e:
-      raise ValueError(f"Invalid JSON format: {e}") from e
-    except Exception as e:
-      raise ValueError(f"Error parsing message: {e}") from e
+    return super().parse(raw_message)
@@ -0,0 +1,106 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from logger import logger
+from sources.clients import DEFAULT_MAX_POOL_CONNECTIONS, client_kwargs, get_client
+
+try:
+  from aiobotocore.session import get_session
+except ImportError:  # pragma: no cover - depends on the environment
+  get_session = None
+
+
+class ThreadedAsyncSqsClient:
+  """
+  Awaitable wrapper that runs a synchronous boto3 SQS client in worker threads.
+
+  Used when aiobotocore is not installed. Calls do not block the event loop, but
+  every in-flight call occupies a thread, so concurrency is capped at
+  max_workers calls; the others wait for a free thread. The threads belong to
+  this client rather than the loop's default executor, and their number matches
+  the client's connection pool: more threads would only wait for a connection.
+  """
+
+  def __init__(self, client, max_workers: int = DEFAULT_MAX_POOL_CONNECTIONS):
+    """
+    Initialize the ThreadedAsyncSqsClient.
+
+    Args:
+        client: A boto3 SQS client.
+        max_workers (int): Maximum number of calls running at once.
+    """
+    self._client = client
+    self._executor = ThreadPoolExecutor(
+      max_workers=max_workers, thread_name_prefix="async-sqs"
+    )
+
+  def __getattr__(self, name):
+    method = getattr(self._client, name)
+
+    async def call(**kwargs):
+      return await asyncio.get_running_loop().run_in_executor(
+        self._executor, functools.partial(method, **kwargs)
+      )
+
+    return call
+
+  async def close(self):
+    """
+    Shut down the worker threads once in-flight calls have finished.
+    """
+    await asyncio.to_thread(self._executor.shutdown)
+
+
+class AsyncSqsClientOwner:
+  """
+  Base for asyncio SQS sources that own (or are given) an async SQS client.
+
+  The client is opened on ``async with`` / open() and closed on exit, unless it
+  was passed in by the caller, in which case the caller owns its lifecycle.
+  aiobotocore (the ``async`` extra) is used when installed; otherwise a boto3
+  client is wrapped in a ThreadedAsyncSqsClient, which needs a thread per
+  in-flight call.
+  """
+
+  def __init__(self, client=None):
+    self.client = client
+    self._owns_client = client is None
+    self._client_context = None
+
+  async def open(self):
+    """
+    Create the async SQS client if none was provided.
+    """
+    if self.client is not None:
+      return
+
+    if get_session is not None:
+      self._client_context = get_session().create_client("sqs", **client_kwargs())
+      self.client = await self._client_context.__aenter__()
+    else:
+      logger.warning(
+        "aiobotocore is not installed; running boto3 SQS calls in worker threads"
+      )
+      self.client = ThreadedAsyncSqsClient(get_client("sqs"))
+
+  async def close(self):
+    """
+    Close the async SQS client if it was created by open().
+    """
+    if not self._owns_client or self.client is None:
+      return
+
+    if self._client_context is not None:
+      await self._client_context.__aexit__(None, None, None)
+      self._client_context = None
+    else:
+      await self.client.close()
+    self.client = None
+
+  async def __aenter__(self):
+    await self.open()
+    return self
+
+  async def __aexit__(self, exc_type, exc, traceback):
+    await self.close()
@@ -0,0 +1,211 @@
+import asyncio
+
+from core.async_handler import AsyncMessageHandler
+from core.backoff import ExponentialBackoff
+from logger import logger, message_logger
+from sources.async_sqs_client import AsyncSqsClientOwner
+
+
+class AsyncSqsConsumer(AsyncSqsClientOwner):
+  """
+  The asyncio counterpart of SqsConsumer.
+
+  Runs `receivers` concurrent receive loops on one event loop and handles every
+  received message in its own task, with at most `max_in_flight` messages being
+  handled at once. Messages are deleted after they have been handled successfully.
+
+  Example:
+      >>> handler = AsyncMessageHandler(SQSParser(), processor)
+      >>> async with AsyncSqsConsumer(
+      ...   queue_url="YOUR_QUEUE_URL_HERE", number_of_messages=10, handler=handler,
+      ...   receivers=8, max_in_flight=500,
+      ... ) as consumer:
+      ...   await consumer.poll_sqs()
+  """
+
+  def __init__(
+    self,
+    queue_url: str,
+    number_of_messages: int,
+    handler: AsyncMessageHandler,
+    receivers: int = 1,
+    max_in_flight: int = 100,
+    wait_time_seconds: int = None,
+    idle_backoff: ExponentialBackoff = None,
+    client=None,
+  ):
+    """
+    Initialize the AsyncSqsConsumer.
+
+    Args:
+        queue_url (str): The URL of the SQS queue to poll.
+        number_of_messages (int): Maximum number of messages per receive (1-10).
+        handler (AsyncMessageHandler): Handler awaited for every received message.
+        receivers (int): Number of concurrent receive_message loops.
+        max_in_flight (int): Maximum number of messages being handled at once.
+        wait_time_seconds (int, optional): Long polling wait passed as WaitTimeSeconds.
+        idle_backoff (ExponentialBackoff, optional): Delay applied by a receive loop
+            after consecutive empty receives.
+        client (optional): An async SQS client. If None, one is created on open().
+    """
+    if receivers < 1:
+      raise ValueError("receivers must be at least 1")
+    if max_in_flight < 1:
+      raise ValueError("max_in_flight must be at least 1")
+
+    super().__init__(client)
+    self.queue_url = queue_url
+    self.number_of_messages = number_of_messages
+    self.handler = handler
+    self.receivers = receivers
+    self.max_in_flight = max_in_flight
+    self.wait_time_seconds = wait_time_seconds
+    self.idle_backoff = idle_backoff
+
+    self.empty_receives = 0
+    self.non_empty_receives = 0
+    self.deletes = 0
+    self.failed_messages = 0
+    self._stopped = False
+    self._stop_event = None
+    self._capacity = None
+    self._tasks = set()
+
+  def stats(self) -> dict:
+    """
+    Return the consumer counters.
+
+    Returns:
+        dict: Counts of empty and non-empty receives, deletes and failed messages.
+    """
+    return {
+      "empty_receives": self.empty_receives,
+      "non_empty_receives": self.non_empty_receives,
+      "deletes": self.deletes,
+      "failed_messages": self.failed_messages,
+      "in_flight": len(self._tasks),
+    }
+
+  def stop(self):
+    """
+    Ask poll_sqs to return once in-progress receives and messages have finished.
+    """
+    self._stopped = True
+    if self._stop_event is not None:
+      self._stop_event.set()
+
+  async def poll_sqs(self):
+    """
+    Poll the queue until stop() is called, handling messages concurrently.
+
+    If no client was open, the one created here is closed when polling ends.
+
+    Raises:
+        Exception: Errors from receive_message end polling and are re-raised once
+            in-progress messages have finished. Message processing errors are
+            logged and the message is left on the queue.
+    """
+    opened = self.client is None
+    await self.open()
+    try:
+      await self._poll()
+    finally:
+      if opened:
+        await self.close()
+
+  async def _poll(self):
+    logger.info(
+      f"Polling SQS queue: {self.queue_url} with {self.receivers} receivers "
+      f"and up to {self.max_in_flight} messages in flight"
+    )
+    self._stop_event = asyncio.Event()
+    if self._stopped:
+      self._stop_event.set()
+    self._capacity = asyncio.Semaphore(self.max_in_flight)
+
+    receive_loops = [
+      asyncio.create_task(self._receive_loop()) for _ in range(self.receivers)
+    ]
+    try:
+      await asyncio.gather(*receive_loops)
+    finally:
+      for task in receive_loops:
+        task.cancel()
+      if self._tasks:
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+  async def _receive_loop(self):
+    consecutive_empty_receives = 0
+    max_messages = min(self.number_of_messages or 10, 10)
+
+    while not self._stopped:
+      slots = await self._acquire_capacity(max_messages)
+      if self._stopped:
+        # Stopped while waiting for capacity: take no more messages off the
+        # queue, they are left visible for other consumers.
+        self._release_capacity(slots)
+        break
+      try:
+        messages = await self._receive(slots)
+      except BaseException:
+        self._release_capacity(slots)
+        raise
+
+      self._release_capacity(slots - len(messages))
+
+      if not messages:
+        self.empty_receives += 1
+        consecutive_empty_receives += 1
+        await self._idle(consecutive_empty_receives)
+        continue
+
+      self.non_empty_receives += 1
+      consecutive_empty_receives = 0
+      for message in messages:
+        task = asyncio.create_task(self._handle_message(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+  async def _acquire_capacity(self, max_slots: int) -> int:
+    await self._capacity.acquire()
+    slots = 1
+    while slots < max_slots and not self._capacity.locked():
+      await self._capacity.acquire()
+      slots += 1
+    return slots
+
+  def _release_capacity(self, slots: int):
+    for _ in range(slots):
+      self._capacity.release()
+
+  async def _receive(self, max_messages: int) -> list:
+    params = {"QueueUrl": self.queue_url, "MaxNumberOfMessages": max_messages}
+    if self.wait_time_seconds is not None:
+      params["WaitTimeSeconds"] = self.wait_time_seconds
+
+    response = await self.client.receive_message(**params)
+    return response.get("Messages", [])
+
+  async def _idle(self, consecutive_empty_receives: int):
+    if self.idle_backoff is None:
+      return
+
+    delay = self.idle_backoff.delay(consecutive_empty_receives)
+    try:
+      await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+    except asyncio.TimeoutError:
+      pass
+
+  async def _handle_message(self, message: dict):
+    try:
+      await self.handler.handle(message["Body"])
+      await self.client.delete_message(
+        QueueUrl=self.queue_url, ReceiptHandle=message["ReceiptHandle"]
+      )
+      self.deletes += 1
+    except Exception as e:
+      self.failed_messages += 1
+      message_logger.error("Error processing message: %s", e)
+      message_logger.error("Failed message: %s", message["Body"])
+    finally:
+      self._capacity.release()
@@ -0,0 +1,81 @@
+import asyncio
+
+from botocore.exceptions import ClientError
+
+from core.codec import BodyCodec
+from logger import message_logger
+from sources.async_sqs_client import AsyncSqsClientOwner
+from sources.sqs_producer import message_params
+
+
+class AsyncSqsProducer(AsyncSqsClientOwner):
+  """
+  The asyncio counterpart of SqsProducer.
+
+  Many send_message coroutines can be awaited concurrently (e.g. with
+  asyncio.gather) on a single event loop.
+
+  Example:
+      >>> async with AsyncSqsProducer(queue_url="YOUR_QUEUE_URL_HERE") as producer:
+      ...   message_ids = await asyncio.gather(
+      ...     *(producer.send_message(body) for body in bodies)
+      ...   )
+  """
+
+  def __init__(self, queue_url: str, client=None, codec: BodyCodec = None):
+    """
+    Initialize the AsyncSqsProducer with the specified SQS queue URL.
+
+    Args:
+      queue_url (str): The URL of the SQS queue to which messages will be sent.
+      client (optional): An async SQS client. If None, one is created on open().
+      codec (BodyCodec, optional): Compresses large bodies and offloads very
+        large ones to a blob store. Encoding runs in a worker thread, so it does
+        not block the event loop.
+    """
+    super().__init__(client)
+    self.queue_url = queue_url
+    self.codec = codec
+
+  async def send_message(
+    self,
+    message_body: dict,
+    message_group_id: str = None,
+    deduplication_id: str = None,
+    raw: bool = False,
+  ):
+    """
+    Send a message to the specified SQS queue.
+
+    Args:
+      message_body (dict): The message body to send, which will be converted to JSON.
+      message_group_id (str, optional): The message group ID for FIFO queues.
+      deduplication_id (str, optional): The deduplication ID for FIFO queues.
+      raw (bool): Send a str message_body unchanged instead of converting it to
+        JSON, like with SqsProducer.
+
+    Returns:
+      str: The ID of the sent message.
+
+    Raises:
+      ClientError: If there is an error sending the message to SQS.
+    """
+    if self.codec is None:
+      params = message_params(message_body, message_group_id, deduplication_id, raw=raw)
+    else:
+      params = await asyncio.to_thread(
+        message_params,
+        message_body,
+        message_group_id,
+        deduplication_id,
+        self.codec,
+        raw,
+      )
+    try:
+      response = await self.client.send_message(QueueUrl=self.queue_url, **params)
+      message_logger.info("Message sent to SQS: %s", response["MessageId"])
+      return response["MessageId"]
+
+    except ClientError as e:
+      message_logger.error("Failed to send message to SQS: %s", e)
+      raise
@@ -0,0 +1,129 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def client_kwargs(
+  region_name: str = None,
+  endpoint_url: str = None,
+  max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+  tcp_keepalive: bool = True,
+  max_attempts: int = 3,
+) -> dict:
+  """
+  Build the keyword arguments used to create AWS clients for the sources.
+
+  Region, endpoint and credentials default to the LOCAL_STACK_* environment
+  variables, as in the rest of the library.
+
+  Args:
+      region_name (str, optional): AWS region. Defaults to LOCAL_STACK_REGION.
+      endpoint_url (str, optional): Service endpoint. Defaults to LOCAL_STACK_URL.
+      max_pool_connections (int): Size of the client's HTTP connection pool.
+      tcp_keepalive (bool): Enable TCP keep-alive on pooled connections.
+      max_attempts (int): Retry attempts for failed requests.
+
+  Returns:
+      dict: Keyword arguments for boto3.client / aiobotocore create_client.
+  """
+  return {
+    "region_name": region_name or os.getenv("LOCAL_STACK_REGION"),
+    "endpoint_url": endpoint_url or os.getenv("LOCAL_STACK_URL"),
+    "aws_access_key_id": os.getenv("LOCAL_STACK_ACCESS_KEY_ID"),
+    "aws_secret_access_key": os.getenv("LOCAL_STACK_ACCESS_KEY_ID"),
+    "use_ssl": False,
+    "verify": False,
+    "aws_session_token": None,
+    "config": Config(
+      retries=dict(max_attempts=max_attempts),
+      max_pool_connections=max_pool_connections,
+      tcp_keepalive=tcp_keepalive,
+    ),
+  }
+
+
+def get_client(
+  service: str = "sqs",
+  region_name: str = None,
+  endpoint_url: str = None,
+  max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+  tcp_keepalive: bool = True,
+  max_attempts: int = 3,
+):
+  """
+  Return a process-wide shared boto3 client, creating it on first use.
+
+  Clients are cached by (service, region, endpoint, credentials, config), so
+  every source built with the same settings shares one client, one connection
+  pool and one credential resolution. boto3 clients are thread-safe; client
+  creation is serialized because the default boto3 session is not. The cache
+  is cleared in forked child processes, which must not reuse the parent's
+  connections.
+
+  Args:
+      service (str): The AWS service name.
+      region_name (str, optional): AWS region. Defaults to LOCAL_STACK_REGION.
+      endpoint_url (str, optional): Service endpoint. Defaults to LOCAL_STACK_URL.
+      max_pool_connections (int): Size of the client's HTTP connection pool.
+      tcp_keepalive (bool): Enable TCP keep-alive on pooled connections.
+      max_attempts (int): Retry attempts for failed requests.
+
+  Returns:
+      A boto3 client for the service.
+
+  Example:
+      >>> client = get_client("sqs", max_pool_connections=100)
+      >>> client is get_client("sqs", max_pool_connections=100)
+      True
+  """
+  kwargs = client_kwargs(
+    region_name=region_name,
+    endpoint_url=endpoint_url,
+    max_pool_connections=max_pool_connections,
+    tcp_keepalive=tcp_keepalive,
+    max_attempts=max_attempts,
+  )
+  key = (
+    service,
+    kwargs["region_name"],
+    kwargs["endpoint_url"],
+    kwargs["aws_access_key_id"],
+    max_pool_connections,
+    tcp_keepalive,
+    max_attempts,
+  )
+
+  client = _clients.get(key)
+  if client is not None:
+    return client
+
+  with _lock:
+    client = _clients.get(key)
+    if client is None:
+      client = boto3.client(service, **kwargs)
+      _clients[key] = client
+    return client
+
+
+def clear_clients():
+  """
+  Drop every cached client, so the next get_client call creates a new one.
+  """
+  with _lock:
+    _clients.clear()
+
+
+def _reset_after_fork():
+  global _lock
+  _lock = threading.Lock()
+  _clients.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,305 @@
+import json
+import mmap
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+from core.handler import MessageHandler
+from logger import logger
+
+
+class OffsetStore(ABC):
+  """
+  Storage for the progress of a FileSource, so that interrupted replays resume
+  where they stopped.
+
+  Progress is stored per file as a list of shards, each a dict with the start
+  and end byte offsets of the shard and the offset of the next unread line.
+  """
+
+  @abstractmethod
+  def load(self) -> dict:
+    """
+    Return the stored progress, mapping file paths to {"size": int,
+    "shards": list}.
+    """
+
+  @abstractmethod
+  def save(self, progress: dict):
+    """
+    Replace the stored progress.
+    """
+
+
+class FileOffsetStore(OffsetStore):
+  """
+  An OffsetStore keeping the progress in a JSON file.
+
+  The file is written to a temporary file first and renamed, so an interrupted
+  save never leaves a truncated file behind.
+
+  Example:
+      >>> offsets = FileOffsetStore("/var/lib/message-handler/replay-offsets.json")
+  """
+
+  def __init__(self, path: str):
+    """
+    Initialize the store.
+
+    Args:
+        path (str): The JSON file. It does not need to exist.
+    """
+    self.path = path
+
+  def load(self) -> dict:
+    try:
+      with open(self.path) as offsets_file:
+        return json.load(offsets_file)
+    except FileNotFoundError:
+      return {}
+
+  def save(self, progress: dict):
+    with open(self.path + ".tmp", "w") as offsets_file:
+      json.dump(progress, offsets_file)
+    os.replace(self.path + ".tmp", self.path)
+
+
+class FileSource:
+  """
+  Replays JSON-lines files through a MessageHandler, one raw message per line.
+
+  Files are memory-mapped and lines are sliced from the map as bytes, so files
+  are never read into memory as a whole or decoded up front. Lines are grouped
+  into batches of batch_size and handled with handler.handle_batch, so handlers
+  with a batch_processor receive whole batches. Every file is split into shards at
+  line boundaries; shards are handled in parallel on max_workers threads, and
+  lines of one shard in order. Blank lines are skipped.
+
+  With an OffsetStore, the offset after the last handled batch of every shard
+  is saved at most every checkpoint_interval seconds, and when run() returns.
+  A FileSource with the same store resumes every file from those offsets,
+  using the shard boundaries of the first run. Batches handled after the last
+  save are handled again (at-least-once, like the queue consumers). A file
+  whose size changed since the offsets were saved is replayed from the start.
+
+  Failed messages are counted and logged by the handler, and not retried: the
+  file offers nowhere to redeliver them.
+
+  Example:
+      >>> handler = MessageHandler(SQSParser(), message_processor)
+      >>> source = FileSource(
+      ...   ["captured/2025-06-01.jsonl"],
+      ...   handler,
+      ...   max_workers=4,
+      ...   offsets=FileOffsetStore("replay-offsets.json"),
+      ... )
+      >>> source.run()
+      {'read': 100000, 'processed': 99998, 'failed': 2, ...}
+  """
+
+  def __init__(
+    self,
+    paths,
+    handler: MessageHandler,
+    batch_size: int = 1000,
+    shards: int = None,
+    max_workers: int = 1,
+    offsets: OffsetStore = None,
+    checkpoint_interval: float = 1.0,
+  ):
+    """
+    Initialize the FileSource.
+
+    Args:
+        paths: A path, or a list of paths, of JSON-lines files.
+        handler (MessageHandler): Instance of MessageHandler to process messages.
+        batch_size (int): Lines per handle_batch call.
+        shards (int, optional): Shards per file. Defaults to max_workers.
+        max_workers (int): Shards handled in parallel.
+        offsets (OffsetStore, optional): Where progress is saved and resumed
+            from. If None, every run replays the files from the start.
+        checkpoint_interval (float): Minimum seconds between saves of the
+            progress.
+
+    Raises:
+        ValueError: If batch_size, shards or max_workers is less than 1.
+    """
+    if batch_size < 1:
+      raise ValueError("batch_size must be at least 1")
+    if max_workers < 1:
+      raise ValueError("max_workers must be at least 1")
+    shards = shards or max_workers
+    if shards < 1:
+      raise ValueError("shards must be at least 1")
+
+    self.paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+    self.handler = handler
+    self.batch_size = batch_size
+    self.shards = shards
+    self.max_workers = max_workers
+    self.offsets = offsets
+    self.checkpoint_interval = checkpoint_interval
+
+    self.read = 0
+    self.processed = 0
+    self.failed = 0
+    self.bytes_read = 0
+    self.batches = 0
+
+    self._progress = {}
+    self._last_checkpoint = 0.0
+    self._stop_event = threading.Event()
+    self._lock = threading.Lock()
+
+  def stats(self) -> dict:
+    """
+    Return the source counters.
+
+    Returns:
+        dict: read, processed and failed message counts, bytes read and
+            handle_batch calls.
+    """
+    return {
+      "read": self.read,
+      "processed": self.processed,
+      "failed": self.failed,
+      "bytes_read": self.bytes_read,
+      "batches": self.batches,
+    }
+
+  def stop(self):
+    """
+    Ask run() to return after the current batches, saving the progress.
+    """
+    self._stop_event.set()
+
+  def run(self) -> dict:
+    """
+    Handle every remaining line of the files, then save the progress.
+
+    Returns:
+        dict: The stats, see stats().
+
+    Raises:
+        OSError: If a file cannot be read.
+    """
+    start = time.perf_counter()
+    # Progress of files outside self.paths is kept, so consecutive replays of
+    # different files can share a store.
+    progress = self.offsets.load() if self.offsets is not None else {}
+    paths = [os.path.abspath(path) for path in self.paths]
+    for path in paths:
+      progress[path] = self._plan(path, progress.get(path))
+    self._progress = progress
+
+    shards = [
+      (path, shard)
+      for path in paths
+      for shard in progress[path]["shards"]
+      if shard["offset"] < shard["end"]
+    ]
+    logger.info(
+      f"Replaying {len(self.paths)} file(s) in {len(shards)} shard(s) with "
+      f"{self.max_workers} worker(s)"
+    )
+
+    try:
+      if self.max_workers == 1 or len(shards) <= 1:
+        for path, shard in shards:
+          self._handle_shard(path, shard)
+      else:
+        with ThreadPoolExecutor(
+          max_workers=self.max_workers, thread_name_prefix="file-source"
+        ) as executor:
+          # list() re-raises the first error of a shard.
+          list(executor.map(lambda item: self._handle_shard(*item), shards))
+    finally:
+      self._checkpoint(force=True)
+
+    seconds = time.perf_counter() - start
+    logger.info(
+      f"Replayed {self.read} messages ({self.bytes_read} bytes) in {seconds:.2f}s: "
+      f"{self.processed} processed, {self.failed} failed"
+    )
+    return self.stats()
+
+  def _plan(self, path: str, stored: dict) -> dict:
+    size = os.path.getsize(path)
+    if stored is not None:
+      if stored["size"] == size:
+        return stored
+      logger.warning(
+        f"{path} changed size since its offsets were saved; replaying it from the start"
+      )
+    return {"size": size, "shards": _split(path, size, self.shards)}
+
+  def _handle_shard(self, path: str, shard: dict):
+    with open(path, "rb") as shard_file:
+      with mmap.mmap(shard_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = shard["offset"]
+        end = shard["end"]
+        while position < end and not self._stop_event.is_set():
+          lines, next_position = _read_lines(data, position, end, self.batch_size)
+          results = self.handler.handle_batch(lines) if lines else []
+          succeeded = sum(1 for result in results if result)
+          with self._lock:
+            self.read += len(lines)
+            self.processed += succeeded
+            self.failed += len(lines) - succeeded
+            self.bytes_read += next_position - position
+            self.batches += 1 if lines else 0
+            shard["offset"] = next_position
+          position = next_position
+          self._checkpoint()
+
+  def _checkpoint(self, force: bool = False):
+    if self.offsets is None:
+      return
+    with self._lock:
+      now = time.monotonic()
+      if not force and now - self._last_checkpoint < self.checkpoint_interval:
+        return
+      self._last_checkpoint = now
+      self.offsets.save(self._progress)
+
+
+def _split(path: str, size: int, shards: int) -> list:
+  """
+  Split a file into up to shards byte ranges that start at line boundaries.
+  """
+  if size == 0:
+    return []
+  boundaries = [0]
+  with open(path, "rb") as split_file:
+    with mmap.mmap(split_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+      for index in range(1, shards):
+        newline = data.find(b"\n", max(size * index // shards, boundaries[-1]))
+        if newline == -1 or newline + 1 >= size:
+          break
+        if newline + 1 > boundaries[-1]:
+          boundaries.append(newline + 1)
+  boundaries.append(size)
+  return [
+    {"start": start, "end": end, "offset": start}
+    for start, end in zip(boundaries, boundaries[1:])
+  ]
+
+
+def _read_lines(data: mmap.mmap, position: int, end: int, count: int) -> tuple:
+  """
+  Read up to count non-blank lines from position, stopping at end.
+
+  Returns:
+      tuple: The lines as bytes, and the offset after the last line read.
+  """
+  lines = []
+  while position < end and len(lines) < count:
+    newline = data.find(b"\n", position, end)
+    line_end = end if newline == -1 else newline
+    line = data[position:line_end]
+    position = line_end + 1
+    if line.strip():
+      lines.append(line)
+  return lines, min(position, end)
@@ -0,0 +1,347 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from core.handler import MessageHandler
+from logger import logger, message_logger
+
+MAX_HEADER_BYTES = 16 * 1024
+
+
+class HttpSource:
+  """
+  An asyncio HTTP endpoint feeding posted messages to a MessageHandler.
+
+  POST a JSON envelope ({"id": ..., "payload": {...}, "timestamp": ...}) or a
+  JSON array of envelopes to `path`. Bodies are decoded on the event loop and
+  the envelopes are put on a bounded queue. The request is answered with 202
+  once every envelope of it is queued, and with 429 (and Retry-After) when the
+  queue has no room for all of them, so producers back off instead of piling up
+  memory. Nothing of a rejected request is queued. Malformed bodies and
+  Content-Length headers get 400. GET /health returns the stats.
+
+  Worker tasks take up to batch_size envelopes off the queue at a time and pass
+  them to handler.handle_batch on a pool of max_workers threads, so the
+  handler's processors may block without stalling the event loop. The queued
+  envelopes are already decoded: use an HttpParser (or another parser that
+  accepts dicts) in the handler.
+
+  Messages are acknowledged when they are queued, not when they are processed:
+  failed messages are counted and logged by the handler, and messages still
+  queued when the process dies are lost. stop() stops accepting requests and
+  waits for the queue to drain.
+
+  The server speaks plain HTTP/1.1 with keep-alive and Content-Length bodies;
+  put it behind a proxy for TLS.
+
+  Example:
+      >>> handler = MessageHandler(HttpParser(), message_processor)
+      >>> source = HttpSource(handler, host="0.0.0.0", port=8080, max_workers=8)
+      >>> asyncio.run(source.serve())
+      $ curl -d '{"id": "1", "payload": {"type": "order"}}' localhost:8080/messages
+  """
+
+  def __init__(
+    self,
+    handler: MessageHandler,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    path: str = "/messages",
+    queue_size: int = 10_000,
+    max_workers: int = 4,
+    batch_size: int = 100,
+    max_body_bytes: int = 1024 * 1024,
+    idle_timeout: float = 60.0,
+    retry_after: int = 1,
+  ):
+    """
+    Initialize the HttpSource.
+
+    Args:
+        handler (MessageHandler): Instance of MessageHandler to process messages.
+        host (str): The address to listen on.
+        port (int): The port to listen on; 0 picks a free port, see `port`
+            after start().
+        path (str): The path messages are posted to.
+        queue_size (int): Maximum number of messages accepted but not yet
+            handled.
+        max_workers (int): Batches handled in parallel.
+        batch_size (int): Maximum messages per handle_batch call.
+        max_body_bytes (int): Larger request bodies are rejected with 413.
+        idle_timeout (float): Seconds an idle keep-alive connection is kept.
+        retry_after (int): Seconds sent in the Retry-After header of 429
+            responses.
+
+    Raises:
+        ValueError: If queue_size, max_workers or batch_size is less than 1.
+    """
+    if queue_size < 1:
+      raise ValueError("queue_size must be at least 1")
+    if max_workers < 1:
+      raise ValueError("max_workers must be at least 1")
+    if batch_size < 1:
+      raise ValueError("batch_size must be at least 1")
+
+    self.handler = handler
+    self.host = host
+    self.port = port
+    self.path = path
+    self.queue_size = queue_size
+    self.max_workers = max_workers
+    self.batch_size = batch_size
+    self.max_body_bytes = max_body_bytes
+    self.idle_timeout = idle_timeout
+    self.retry_after = retry_after
+
+    self.requests = 0
+    self.accepted = 0
+    self.rejected_requests = 0
+    self.invalid_requests = 0
+    self.processed = 0
+    self.failed = 0
+
+    self._queue = None
+    self._server = None
+    self._loop = None
+    self._executor = None
+    self._workers = []
+    self._connections = set()
+    self._stop_event = None
+    self._stopped = False
+
+  def stats(self) -> dict:
+    """
+    Return the source counters.
+
+    Returns:
+        dict: Requests received, messages accepted, requests rejected with 429
+            or 503 and with other 4xx statuses, messages processed and failed,
+            and messages queued.
+    """
+    return {
+      "requests": self.requests,
+      "accepted": self.accepted,
+      "rejected_requests": self.rejected_requests,
+      "invalid_requests": self.invalid_requests,
+      "processed": self.processed,
+      "failed": self.failed,
+      "queued": self._queue.qsize() if self._queue is not None else 0,
+    }
+
+  def stop(self):
+    """
+    Ask serve() to stop accepting requests, drain the queue and return.
+
+    Can be called from any thread.
+    """
+    self._stopped = True
+    if self._loop is not None and self._stop_event is not None:
+      self._loop.call_soon_threadsafe(self._stop_event.set)
+
+  async def start(self):
+    """
+    Start listening and start the workers, without waiting for stop().
+    """
+    self._loop = asyncio.get_running_loop()
+    self._stop_event = asyncio.Event()
+    if self._stopped:
+      self._stop_event.set()
+    self._queue = asyncio.Queue(maxsize=self.queue_size)
+    self._executor = ThreadPoolExecutor(
+      max_workers=self.max_workers, thread_name_prefix="http-source"
+    )
+    self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_workers)]
+    self._server = await asyncio.start_server(
+      self._serve_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+    )
+    self.port = self._server.sockets[0].getsockname()[1]
+    logger.info(
+      f"Serving HTTP source on {self.host}:{self.port}{self.path} with "
+      f"{self.max_workers} workers and a queue of {self.queue_size} messages"
+    )
+
+  async def serve(self):
+    """
+    Serve requests until stop() is called, then handle the queued messages and
+    return.
+    """
+    if self._server is None:
+      await self.start()
+    try:
+      await self._stop_event.wait()
+    finally:
+      await self._shutdown()
+
+  async def _shutdown(self):
+    self._server.close()
+    for connection in list(self._connections):
+      connection.cancel()
+    await asyncio.gather(*self._connections, return_exceptions=True)
+    await self._server.wait_closed()
+    await self._queue.join()
+    for worker in self._workers:
+      worker.cancel()
+    await asyncio.gather(*self._workers, return_exceptions=True)
+    self._executor.shutdown(wait=True)
+    logger.info(
+      f"HTTP source stopped: {self.accepted} messages accepted, "
+      f"{self.processed} processed, {self.failed} failed"
+    )
+
+  async def _work(self):
+    loop = asyncio.get_running_loop()
+    while True:
+      batch = [await self._queue.get()]
+      while len(batch) < self.batch_size and not self._queue.empty():
+        batch.append(self._queue.get_nowait())
+      try:
+        results = await loop.run_in_executor(
+          self._executor, self.handler.handle_batch, batch
+        )
+        succeeded = sum(1 for result in results if result)
+        self.processed += succeeded
+        self.failed += len(batch) - succeeded
+      except Exception as e:
+        self.failed += len(batch)
+        message_logger.exception("Error handling message batch: %s", e)
+      finally:
+        for _ in batch:
+          self._queue.task_done()
+
+  async def _serve_connection(self, reader, writer):
+    task = asyncio.current_task()
+    self._connections.add(task)
+    try:
+      keep_alive = True
+      while keep_alive and not self._stop_event.is_set():
+        try:
+          head = await asyncio.wait_for(
+            reader.readuntil(b"\r\n\r\n"), timeout=self.idle_timeout
+          )
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+          return
+        except asyncio.LimitOverrunError:
+          self.invalid_requests += 1
+          writer.write(
+            _response(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {}, keep_alive=False)
+          )
+          await writer.drain()
+          return
+        response, keep_alive = await self._respond(head, reader, writer)
+        writer.write(response)
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+      pass
+    finally:
+      self._connections.discard(task)
+      writer.close()
+
+  async def _respond(self, head: bytes, reader, writer) -> tuple:
+    self.requests += 1
+    try:
+      method, target, version, headers = _parse_head(head)
+    except ValueError as e:
+      self.invalid_requests += 1
+      return _response(HTTPStatus.BAD_REQUEST, {"error": str(e)}, False), False
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = (
+      connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    )
+    path = target.split("?", 1)[0]
+
+    if method == "GET" and path == "/health":
+      return _response(HTTPStatus.OK, self.stats(), keep_alive), keep_alive
+    if path != self.path:
+      self.invalid_requests += 1
+      return _response(HTTPStatus.NOT_FOUND, {}, keep_alive), keep_alive
+    if method != "POST":
+      self.invalid_requests += 1
+      response = _response(
+        HTTPStatus.METHOD_NOT_ALLOWED, {}, keep_alive, {"Allow": "POST"}
+      )
+      return response, keep_alive
+
+    # The body is not read from here on, so the connection cannot be reused.
+    if "transfer-encoding" in headers or "content-length" not in headers:
+      self.invalid_requests += 1
+      return _response(HTTPStatus.LENGTH_REQUIRED, {}, False), False
+    length = headers["content-length"]
+    if not (length.isascii() and length.isdigit()):
+      self.invalid_requests += 1
+      return _response(HTTPStatus.BAD_REQUEST, {}, False), False
+    length = int(length)
+    if length > self.max_body_bytes:
+      self.invalid_requests += 1
+      return _response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {}, False), False
+
+    if headers.get("expect", "").lower() == "100-continue":
+      writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+    body = await reader.readexactly(length)
+    status, payload = self._accept(body)
+    extra = None
+    if status is HTTPStatus.TOO_MANY_REQUESTS:
+      extra = {"Retry-After": str(self.retry_after)}
+    return _response(status, payload, keep_alive, extra), keep_alive
+
+  def _accept(self, body: bytes) -> tuple:
+    try:
+      data = json.loads(body)
+    except ValueError as e:
+      self.invalid_requests += 1
+      return HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON format: {e}"}
+
+    messages = data if type(data) is list else [data]
+    if not messages or any(type(message) is not dict for message in messages):
+      self.invalid_requests += 1
+      return HTTPStatus.BAD_REQUEST, {
+        "error": "Expected a message object or a non-empty array of message objects"
+      }
+    if len(messages) > self.queue_size:
+      self.invalid_requests += 1
+      return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {
+        "error": f"At most {self.queue_size} messages per request"
+      }
+    if self._stopped:
+      self.rejected_requests += 1
+      return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Shutting down"}
+    if self.queue_size - self._queue.qsize() < len(messages):
+      self.rejected_requests += 1
+      message_logger.info("Queue full, rejected %d messages", len(messages))
+      return HTTPStatus.TOO_MANY_REQUESTS, {"error": "Queue full, retry later"}
+
+    for message in messages:
+      self._queue.put_nowait(message)
+    self.accepted += len(messages)
+    return HTTPStatus.ACCEPTED, {"accepted": len(messages)}
+
+
+def _parse_head(head: bytes) -> tuple:
+  lines = head.decode("latin-1").split("\r\n")
+  parts = lines[0].split(" ")
+  if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+    raise ValueError("Malformed request line")
+  headers = {}
+  for line in lines[1:]:
+    if not line:
+      continue
+    name, separator, value = line.partition(":")
+    if not separator:
+      raise ValueError("Malformed header line")
+    headers[name.strip().lower()] = value.strip()
+  return parts[0], parts[1], parts[2], headers
+
+
+def _response(
+  status: HTTPStatus, payload: dict, keep_alive: bool, headers: dict = None
+) -> bytes:
+  body = json.dumps(payload).encode("utf-8")
+  lines = [
+    f"HTTP/1.1 {status.value} {status.phrase}",
+    "Content-Type: application/json",
+    f"Content-Length: {len(body)}",
+    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+  ]
+  lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+  return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
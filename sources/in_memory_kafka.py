@@ -0,0 +1,277 @@
+import threading
+import time
+import zlib
+
+from confluent_kafka import TopicPartition
+
+
+class InMemoryKafkaMessage:
+  """
+  A stand-in for confluent_kafka.Message, which cannot be created from Python.
+  """
+
+  __slots__ = ("_topic", "_partition", "_offset", "_key", "_value", "_headers")
+
+  def __init__(self, topic, partition, offset, key, value, headers=None):
+    self._topic = topic
+    self._partition = partition
+    self._offset = offset
+    self._key = key
+    self._value = value
+    self._headers = headers
+
+  def topic(self):
+    return self._topic
+
+  def partition(self):
+    return self._partition
+
+  def offset(self):
+    return self._offset
+
+  def key(self):
+    return self._key
+
+  def value(self):
+    return self._value
+
+  def headers(self):
+    return self._headers
+
+  def error(self):
+    return None
+
+
+class InMemoryKafkaBroker:
+  """
+  An in-process Kafka broker stand-in holding partitioned topics and group offsets.
+
+  Use it with InMemoryKafkaConsumer and InMemoryKafkaProducer, which mimic the
+  subset of the confluent_kafka Consumer and Producer APIs used by the sources.
+
+  Example:
+      >>> broker = InMemoryKafkaBroker(partitions=4)
+      >>> broker.append("events", b'{"id": "1"}', key=b"user-1")
+      >>> consumer = KafkaConsumer(
+      ...   topics=["events"], handler=handler, consumer=broker.consumer("group")
+      ... )
+  """
+
+  def __init__(self, partitions: int = 1):
+    """
+    Initialize an empty broker.
+
+    Args:
+        partitions (int): Number of partitions of every auto-created topic.
+    """
+    self.partitions = partitions
+    self._topics = {}
+    self._committed = {}
+    self._lock = threading.Condition()
+
+  def append(self, topic, value, key=None, headers=None, partition=None):
+    """
+    Append a message to a topic.
+
+    Messages without an explicit partition are assigned by key hash, or
+    round-robin when the key is None.
+
+    Returns:
+        InMemoryKafkaMessage: The stored message, with its partition and offset.
+    """
+    if isinstance(value, str):
+      value = value.encode("utf-8")
+    if isinstance(key, str):
+      key = key.encode("utf-8")
+
+    with self._lock:
+      partitions = self._topic(topic)
+      if partition is None:
+        if key is None:
+          partition = sum(len(log) for log in partitions) % len(partitions)
+        else:
+          partition = zlib.crc32(key) % len(partitions)
+      log = partitions[partition]
+      message = InMemoryKafkaMessage(topic, partition, len(log), key, value, headers)
+      log.append(message)
+      self._lock.notify_all()
+    return message
+
+  def messages(self, topic, partition=None) -> list:
+    """
+    Return the stored messages of a topic, optionally of a single partition.
+    """
+    with self._lock:
+      partitions = self._topic(topic)
+      if partition is not None:
+        return list(partitions[partition])
+      return [message for log in partitions for message in log]
+
+  def committed(self, group_id, topic, partition) -> int:
+    """
+    Return the committed offset of a consumer group for a partition, or -1.
+    """
+    with self._lock:
+      return self._committed.get((group_id, topic, partition), -1)
+
+  def consumer(self, group_id="in-memory"):
+    """
+    Create an InMemoryKafkaConsumer on this broker.
+    """
+    return InMemoryKafkaConsumer(self, group_id)
+
+  def producer(self):
+    """
+    Create an InMemoryKafkaProducer on this broker.
+    """
+    return InMemoryKafkaProducer(self)
+
+  def _topic(self, topic):
+    if topic not in self._topics:
+      self._topics[topic] = [[] for _ in range(self.partitions)]
+    return self._topics[topic]
+
+
+class InMemoryKafkaConsumer:
+  """
+  A stand-in for confluent_kafka.Consumer backed by an InMemoryKafkaBroker.
+
+  Every subscribed partition is assigned to this consumer. Reading starts at the
+  group's committed offset, commits are synchronous, seek() rewinds a partition
+  and paused partitions are not read until they are resumed. revoke() simulates
+  a rebalance: the next consume() passes the partitions to the on_revoke
+  callback and reads them again from the committed offset.
+  """
+
+  def __init__(self, broker: InMemoryKafkaBroker, group_id: str):
+    self.broker = broker
+    self.group_id = group_id
+    self.topics = []
+    self.commits = 0
+    self._positions = {}
+    self._paused = set()
+    self._closed = False
+    self._on_revoke = None
+    self._revoked = []
+
+  def subscribe(self, topics, on_revoke=None, **kwargs):
+    self.topics = list(topics)
+    self._on_revoke = on_revoke
+
+  def revoke(self, partitions):
+    with self.broker._lock:
+      self._revoked.extend(partitions)
+      self.broker._lock.notify_all()
+
+  def consume(self, num_messages=1, timeout=-1):
+    self._rebalance()
+    deadline = time.monotonic() + max(timeout, 0)
+    with self.broker._lock:
+      while True:
+        messages = self._read(num_messages)
+        remaining = deadline - time.monotonic()
+        if messages or remaining <= 0 or self._closed:
+          return messages
+        self.broker._lock.wait(remaining)
+
+  def commit(self, message=None, offsets=None, asynchronous=True):
+    if message is not None:
+      offsets = [
+        TopicPartition(message.topic(), message.partition(), message.offset() + 1)
+      ]
+    with self.broker._lock:
+      for offset in offsets or []:
+        key = (self.group_id, offset.topic, offset.partition)
+        self.broker._committed[key] = offset.offset
+      self.commits += 1
+    return None if asynchronous else offsets
+
+  def seek(self, partition: TopicPartition):
+    with self.broker._lock:
+      self._positions[(partition.topic, partition.partition)] = partition.offset
+
+  def pause(self, partitions):
+    with self.broker._lock:
+      self._paused.update((tp.topic, tp.partition) for tp in partitions)
+
+  def resume(self, partitions):
+    with self.broker._lock:
+      self._paused.difference_update((tp.topic, tp.partition) for tp in partitions)
+      self.broker._lock.notify_all()
+
+  def close(self):
+    self._closed = True
+
+  def _rebalance(self):
+    with self.broker._lock:
+      revoked, self._revoked = self._revoked, []
+      for tp in revoked:
+        self._positions.pop((tp.topic, tp.partition), None)
+        self._paused.discard((tp.topic, tp.partition))
+    if revoked and self._on_revoke is not None:
+      self._on_revoke(self, revoked)
+
+  def _read(self, num_messages):
+    messages = []
+    for topic in self.topics:
+      for partition, log in enumerate(self.broker._topic(topic)):
+        key = (topic, partition)
+        if key in self._paused:
+          continue
+        if key not in self._positions:
+          committed = self.broker._committed.get((self.group_id, topic, partition), -1)
+          self._positions[key] = max(committed, 0)
+        position = self._positions[key]
+        batch = log[position : position + num_messages - len(messages)]
+        self._positions[key] = position + len(batch)
+        messages.extend(batch)
+        if len(messages) >= num_messages:
+          return messages
+    return messages
+
+
+class InMemoryKafkaProducer:
+  """
+  A stand-in for confluent_kafka.Producer backed by an InMemoryKafkaBroker.
+
+  produce() only queues the message locally; like the real client, messages are
+  appended to the broker and delivery callbacks run from poll() and flush().
+  """
+
+  def __init__(self, broker: InMemoryKafkaBroker):
+    self.broker = broker
+    self.fail_with = None
+    self._queue = []
+    self._lock = threading.Condition()
+
+  def produce(
+    self, topic, value=None, key=None, partition=None, on_delivery=None, headers=None
+  ):
+    with self._lock:
+      self._queue.append((topic, value, key, partition, on_delivery, headers))
+      self._lock.notify_all()
+
+  def poll(self, timeout=None):
+    with self._lock:
+      if not self._queue and timeout:
+        self._lock.wait(timeout)
+      queued, self._queue = self._queue, []
+
+    for topic, value, key, partition, on_delivery, headers in queued:
+      if self.fail_with is not None:
+        message = InMemoryKafkaMessage(topic, partition, -1, key, value, headers)
+        error = self.fail_with
+      else:
+        message = self.broker.append(topic, value, key, headers, partition)
+        error = None
+      if on_delivery is not None:
+        on_delivery(error, message)
+    return len(queued)
+
+  def flush(self, timeout=None):
+    self.poll(0)
+    return 0
+
+  def __len__(self):
+    with self._lock:
+      return len(self._queue)
@@ -0,0 +1,431 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from uuid import uuid4 as uuid
+
+from botocore.exceptions import ClientError
+
+DEFAULT_VISIBILITY_TIMEOUT = 30
+MISSING_GROUP_ID_MESSAGE = "The request must contain the parameter MessageGroupId."
+
+
+class _QueuedMessage:
+  __slots__ = (
+    "message_id",
+    "body",
+    "group_id",
+    "deduplication_id",
+    "message_attributes",
+    "visible_at",
+    "receive_count",
+    "receipt_handle",
+  )
+
+  def __init__(self, body, group_id, deduplication_id, message_attributes, delay):
+    self.message_id = str(uuid())
+    self.body = body
+    self.group_id = group_id
+    self.deduplication_id = deduplication_id
+    self.message_attributes = message_attributes
+    self.visible_at = time.monotonic() + delay
+    self.receive_count = 0
+    self.receipt_handle = None
+
+
+class InMemorySqs:
+  """
+  An in-process stand-in for a boto3 SQS client.
+
+  Implements the subset of the SQS API used by this library (send, receive,
+  delete and change-visibility, single and batched) with visibility timeouts,
+  receive counts and FIFO group ordering, so consumers and producers can be
+  exercised without LocalStack or AWS. Queues are created on first use; like
+  SQS, sends to a ".fifo" queue require a MessageGroupId.
+
+  Attributes:
+      latency (float): Seconds every API call sleeps before returning, to
+          emulate network round-trips.
+      calls (dict): Number of calls per API operation.
+
+  Example:
+      >>> sqs = InMemorySqs()
+      >>> sqs.send_message(QueueUrl="queue", MessageBody='{"id": "1"}')
+      >>> consumer = SqsConsumer(queue_url="queue", number_of_messages=10, handler=handler)
+      >>> consumer.client = sqs
+  """
+
+  def __init__(
+    self, latency: float = 0.0, visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT
+  ):
+    """
+    Initialize an empty in-memory SQS.
+
+    Args:
+        latency (float): Seconds each call sleeps to emulate network latency.
+        visibility_timeout (int): Default visibility timeout for received messages.
+    """
+    self.latency = latency
+    self.visibility_timeout = visibility_timeout
+    self.calls = {}
+    self._queues = {}
+    self._in_flight = {}
+    self._lock = threading.Lock()
+    self._message_sent = threading.Condition(self._lock)
+
+  def send_message(
+    self,
+    QueueUrl,
+    MessageBody,
+    MessageGroupId=None,
+    MessageDeduplicationId=None,
+    MessageAttributes=None,
+    DelaySeconds=0,
+  ):
+    self._call("send_message")
+    if _missing_group_id(QueueUrl, MessageGroupId):
+      raise _client_error("MissingParameter", MISSING_GROUP_ID_MESSAGE, "SendMessage")
+    with self._lock:
+      message = self._enqueue(
+        QueueUrl,
+        MessageBody,
+        MessageGroupId,
+        MessageDeduplicationId,
+        MessageAttributes,
+        DelaySeconds,
+      )
+    return {"MessageId": message.message_id, "MD5OfMessageBody": _md5(MessageBody)}
+
+  def send_message_batch(self, QueueUrl, Entries):
+    self._call("send_message_batch")
+    _check_batch(Entries)
+    successful = []
+    failed = []
+    with self._lock:
+      for entry in Entries:
+        if _missing_group_id(QueueUrl, entry.get("MessageGroupId")):
+          failed.append(
+            {
+              "Id": entry["Id"],
+              "SenderFault": True,
+              "Code": "MissingParameter",
+              "Message": MISSING_GROUP_ID_MESSAGE,
+            }
+          )
+          continue
+        message = self._enqueue(
+          QueueUrl,
+          entry["MessageBody"],
+          entry.get("MessageGroupId"),
+          entry.get("MessageDeduplicationId"),
+          entry.get("MessageAttributes"),
+          entry.get("DelaySeconds", 0),
+        )
+        successful.append(
+          {
+            "Id": entry["Id"],
+            "MessageId": message.message_id,
+            "MD5OfMessageBody": _md5(entry["MessageBody"]),
+          }
+        )
+    return {"Successful": successful, "Failed": failed}
+
+  def receive_message(
+    self,
+    QueueUrl,
+    MaxNumberOfMessages=1,
+    WaitTimeSeconds=0,
+    VisibilityTimeout=None,
+    AttributeNames=None,
+    MessageSystemAttributeNames=None,
+    MessageAttributeNames=None,
+  ):
+    self._call("receive_message")
+    _check_max_messages(MaxNumberOfMessages)
+
+    deadline = time.monotonic() + (WaitTimeSeconds or 0)
+    with self._lock:
+      while True:
+        messages = self._receive(QueueUrl, MaxNumberOfMessages, VisibilityTimeout)
+        remaining = deadline - time.monotonic()
+        if messages or remaining <= 0:
+          break
+        self._message_sent.wait(min(remaining, 0.05))
+
+    return {"Messages": messages} if messages else {}
+
+  def delete_message(self, QueueUrl, ReceiptHandle):
+    self._call("delete_message")
+    with self._lock:
+      if not self._delete(QueueUrl, ReceiptHandle):
+        raise _client_error(
+          "ReceiptHandleIsInvalid", "The receipt handle is invalid", "DeleteMessage"
+        )
+    return {}
+
+  def delete_message_batch(self, QueueUrl, Entries):
+    self._call("delete_message_batch")
+    _check_batch(Entries)
+    with self._lock:
+      return self._batch_result(
+        Entries, lambda entry: self._delete(QueueUrl, entry["ReceiptHandle"])
+      )
+
+  def change_message_visibility(self, QueueUrl, ReceiptHandle, VisibilityTimeout):
+    self._call("change_message_visibility")
+    with self._lock:
+      if not self._change_visibility(QueueUrl, ReceiptHandle, VisibilityTimeout):
+        raise _client_error(
+          "ReceiptHandleIsInvalid",
+          "The receipt handle is invalid",
+          "ChangeMessageVisibility",
+        )
+    return {}
+
+  def change_message_visibility_batch(self, QueueUrl, Entries):
+    self._call("change_message_visibility_batch")
+    _check_batch(Entries)
+    with self._lock:
+      return self._batch_result(
+        Entries,
+        lambda entry: self._change_visibility(
+          QueueUrl, entry["ReceiptHandle"], entry["VisibilityTimeout"]
+        ),
+      )
+
+  def count(self, queue_url: str) -> int:
+    """
+    Return the number of messages in a queue, visible or in flight.
+
+    Args:
+        queue_url (str): The queue URL.
+
+    Returns:
+        int: Messages not yet deleted.
+    """
+    with self._lock:
+      return len(self._queues.get(queue_url, ()))
+
+  def bodies(self, queue_url: str) -> list:
+    """
+    Return the bodies of all undeleted messages of a queue, in queue order.
+
+    Args:
+        queue_url (str): The queue URL.
+
+    Returns:
+        list: Message bodies.
+    """
+    with self._lock:
+      return [message.body for message in self._queues.get(queue_url, ())]
+
+  def _call(self, operation: str):
+    with self._lock:
+      self.calls[operation] = self.calls.get(operation, 0) + 1
+    if self.latency:
+      time.sleep(self.latency)
+
+  def _try_receive(self, queue_url, max_messages, visibility_timeout):
+    with self._lock:
+      return self._receive(queue_url, max_messages, visibility_timeout)
+
+  def _enqueue(self, queue_url, body, group_id, deduplication_id, attributes, delay):
+    message = _QueuedMessage(body, group_id, deduplication_id, attributes, delay)
+    self._queues.setdefault(queue_url, deque()).append(message)
+    self._message_sent.notify_all()
+    return message
+
+  def _receive(self, queue_url, max_messages, visibility_timeout):
+    now = time.monotonic()
+    queue = self._queues.get(queue_url, ())
+    fifo = queue_url.endswith(".fifo")
+    blocked_groups = set()
+    received = []
+
+    for message in queue:
+      if len(received) >= max_messages:
+        break
+      if fifo and message.group_id in blocked_groups:
+        continue
+      if message.visible_at > now:
+        # An invisible message keeps the rest of its FIFO group back.
+        blocked_groups.add(message.group_id)
+        continue
+
+      message.receive_count += 1
+      message.receipt_handle = str(uuid())
+      message.visible_at = now + (
+        self.visibility_timeout if visibility_timeout is None else visibility_timeout
+      )
+      self._in_flight[message.receipt_handle] = (queue_url, message)
+      received.append(self._to_response(message))
+
+    return received
+
+  def _to_response(self, message):
+    attributes = {"ApproximateReceiveCount": str(message.receive_count)}
+    if message.group_id is not None:
+      attributes["MessageGroupId"] = message.group_id
+    if message.deduplication_id is not None:
+      attributes["MessageDeduplicationId"] = message.deduplication_id
+
+    response = {
+      "MessageId": message.message_id,
+      "ReceiptHandle": message.receipt_handle,
+      "MD5OfBody": _md5(message.body),
+      "Body": message.body,
+      "Attributes": attributes,
+    }
+    if message.message_attributes:
+      response["MessageAttributes"] = message.message_attributes
+    return response
+
+  def _find(self, queue_url, receipt_handle):
+    found = self._in_flight.get(receipt_handle)
+    if found is None or found[0] != queue_url:
+      return None
+    message = found[1]
+    if message.receipt_handle != receipt_handle:
+      return None
+    return message
+
+  def _delete(self, queue_url, receipt_handle) -> bool:
+    message = self._find(queue_url, receipt_handle)
+    if message is None:
+      return False
+    self._queues[queue_url].remove(message)
+    del self._in_flight[receipt_handle]
+    return True
+
+  def _change_visibility(self, queue_url, receipt_handle, visibility_timeout) -> bool:
+    message = self._find(queue_url, receipt_handle)
+    if message is None:
+      return False
+    message.visible_at = time.monotonic() + visibility_timeout
+    if visibility_timeout == 0:
+      self._message_sent.notify_all()
+    return True
+
+  def _batch_result(self, entries, operation):
+    successful = []
+    failed = []
+    for entry in entries:
+      if operation(entry):
+        successful.append({"Id": entry["Id"]})
+      else:
+        failed.append(
+          {
+            "Id": entry["Id"],
+            "SenderFault": True,
+            "Code": "ReceiptHandleIsInvalid",
+            "Message": "The receipt handle is invalid",
+          }
+        )
+    return {"Successful": successful, "Failed": failed}
+
+
+class AsyncInMemorySqs:
+  """
+  An asyncio facade over InMemorySqs with the method names of an aiobotocore client.
+
+  Latency is emulated with asyncio.sleep, so hundreds of concurrent calls can be
+  in flight on one event loop, and long polls wait without blocking the loop.
+  Set latency on the facade rather than on the backing InMemorySqs, whose
+  latency is a blocking time.sleep.
+
+  Example:
+      >>> sqs = AsyncInMemorySqs(latency=0.01)
+      >>> await sqs.send_message(QueueUrl="queue", MessageBody="{}")
+  """
+
+  def __init__(self, sqs: InMemorySqs = None, latency: float = 0.0):
+    """
+    Initialize the facade.
+
+    Args:
+        sqs (InMemorySqs, optional): The backing store. A new one is created if None.
+        latency (float): Seconds each call awaits to emulate network latency.
+    """
+    self.sqs = sqs or InMemorySqs()
+    self.latency = latency
+
+  async def send_message(self, **kwargs):
+    await self._wait()
+    return self.sqs.send_message(**kwargs)
+
+  async def send_message_batch(self, **kwargs):
+    await self._wait()
+    return self.sqs.send_message_batch(**kwargs)
+
+  async def receive_message(
+    self,
+    QueueUrl,
+    MaxNumberOfMessages=1,
+    WaitTimeSeconds=0,
+    VisibilityTimeout=None,
+    **kwargs,
+  ):
+    await self._wait()
+    self.sqs._call("receive_message")
+    _check_max_messages(MaxNumberOfMessages)
+
+    deadline = time.monotonic() + (WaitTimeSeconds or 0)
+    while True:
+      messages = self.sqs._try_receive(QueueUrl, MaxNumberOfMessages, VisibilityTimeout)
+      if messages or time.monotonic() >= deadline:
+        return {"Messages": messages} if messages else {}
+      await asyncio.sleep(0.01)
+
+  async def delete_message(self, **kwargs):
+    await self._wait()
+    return self.sqs.delete_message(**kwargs)
+
+  async def delete_message_batch(self, **kwargs):
+    await self._wait()
+    return self.sqs.delete_message_batch(**kwargs)
+
+  async def change_message_visibility(self, **kwargs):
+    await self._wait()
+    return self.sqs.change_message_visibility(**kwargs)
+
+  async def change_message_visibility_batch(self, **kwargs):
+    await self._wait()
+    return self.sqs.change_message_visibility_batch(**kwargs)
+
+  async def close(self):
+    pass
+
+  async def _wait(self):
+    # Always yield to the loop, like a real network call would.
+    await asyncio.sleep(self.latency)
+
+
+def _md5(body: str) -> str:
+  return hashlib.md5(body.encode("utf-8")).hexdigest()
+
+
+def _check_max_messages(max_messages):
+  if not 1 <= max_messages <= 10:
+    raise _client_error(
+      "InvalidParameterValue",
+      "MaxNumberOfMessages must be between 1 and 10",
+      "ReceiveMessage",
+    )
+
+
+def _missing_group_id(queue_url, group_id) -> bool:
+  return queue_url.endswith(".fifo") and group_id is None
+
+
+def _check_batch(entries):
+  if not 1 <= len(entries) <= 10:
+    raise _client_error(
+      "AWS.SimpleQueueService.TooManyEntriesInBatchRequest",
+      "A batch request must contain between 1 and 10 entries",
+      "Batch",
+    )
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+  return ClientError({"Error": {"Code": code, "Message": message}}, operation)
@@ -0,0 +1,303 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from confluent_kafka import Consumer, KafkaError, KafkaException, TopicPartition
+
+from core.handler import MessageHandler
+from logger import logger, message_logger
+from sources.kafka_retry_policy import KafkaRetryPolicy
+
+# Seconds to wait for a dead-letter send to be acknowledged.
+DEAD_LETTER_TIMEOUT = 30.0
+
+
+class KafkaConsumer:
+  """
+  Consumes Kafka topics in batches and feeds every message to a MessageHandler.
+
+  Each consume() batch is split by partition. Partitions are handled in parallel
+  on a thread pool while messages of one partition are handled in order. After
+  the batch, offsets are committed once per partition, up to the last
+  successfully handled message. When a message fails, the rest of its partition's
+  batch is skipped and the partition is rewound to the failed offset and paused
+  for the retry policy's backoff delay, so the message is delivered again
+  (at-least-once, like the SQS consumer). After max_attempts failures it is
+  sent to the dead-letter producer and skipped. Tombstones (messages without a
+  value) have nothing to handle and are skipped.
+
+  Commits, seeks and resumes can fail during a rebalance, e.g. with
+  REBALANCE_IN_PROGRESS or for a partition that was just revoked. Such errors
+  are logged and the messages concerned are delivered again. The retry state
+  of revoked partitions is dropped.
+
+  Example:
+      >>> handler = MessageHandler(KafkaParser(), message_processor)
+      >>> kafka_consumer = KafkaConsumer(
+      ...   topics=["events"],
+      ...   handler=handler,
+      ...   config={"bootstrap.servers": "localhost:9092", "group.id": "processors"},
+      ... )
+      >>> kafka_consumer.poll_kafka()
+  """
+
+  def __init__(
+    self,
+    topics: list,
+    handler: MessageHandler,
+    config: dict = None,
+    batch_size: int = 500,
+    poll_timeout: float = 1.0,
+    max_workers: int = 4,
+    consumer=None,
+    retry_policy: KafkaRetryPolicy = None,
+  ):
+    """
+    Initialize the KafkaConsumer.
+
+    Args:
+        topics (list): Topics to subscribe to.
+        handler (MessageHandler): Instance of MessageHandler to process messages.
+        config (dict, optional): confluent-kafka consumer configuration.
+            bootstrap.servers and group.id default to the KAFKA_BOOTSTRAP_SERVERS
+            and KAFKA_GROUP_ID environment variables. Auto commit is always
+            disabled, as offsets are committed after successful handling.
+        batch_size (int): Maximum number of messages per consume() call.
+        poll_timeout (float): Seconds consume() waits for messages.
+        max_workers (int): Partitions handled in parallel.
+        consumer (optional): A confluent_kafka.Consumer compatible object, such as
+            an InMemoryKafkaConsumer. If None, one is created from config.
+        retry_policy (KafkaRetryPolicy, optional): Backoff and dead-lettering of
+            failed messages. Defaults to KafkaRetryPolicy(), which retries with
+            backoff and never dead-letters.
+    """
+    self.topics = topics
+    self.handler = handler
+    self.batch_size = batch_size
+    self.poll_timeout = poll_timeout
+    self.max_workers = max_workers
+    self.retry_policy = retry_policy or KafkaRetryPolicy()
+
+    if consumer is None:
+      consumer = Consumer(
+        {
+          "bootstrap.servers": os.getenv("KAFKA_BOOTSTRAP_SERVERS"),
+          "group.id": os.getenv("KAFKA_GROUP_ID"),
+          "auto.offset.reset": "earliest",
+          **(config or {}),
+          "enable.auto.commit": False,
+        }
+      )
+    self.consumer = consumer
+
+    self.consumed = 0
+    self.processed = 0
+    self.failed = 0
+    self.commits = 0
+    self.retries_scheduled = 0
+    self.dead_lettered = 0
+    self.tombstones = 0
+    # Maps (topic, partition) to (failed offset, attempts), and paused
+    # partitions to the time they are resumed.
+    self._attempts = {}
+    self._paused = {}
+    self._stop_event = threading.Event()
+
+  def stats(self) -> dict:
+    """
+    Return the consumer counters.
+
+    Returns:
+        dict: consumed, processed and failed message counts, commit calls,
+            scheduled retries, dead-lettered messages and skipped tombstones.
+    """
+    return {
+      "consumed": self.consumed,
+      "processed": self.processed,
+      "failed": self.failed,
+      "commits": self.commits,
+      "retries_scheduled": self.retries_scheduled,
+      "dead_lettered": self.dead_lettered,
+      "tombstones": self.tombstones,
+    }
+
+  def stop(self):
+    """
+    Ask poll_kafka to return after the current batch.
+    """
+    self._stop_event.set()
+
+  def poll_kafka(self):
+    """
+    Consume and handle messages until stop() is called, then close the consumer.
+
+    Raises:
+        KafkaException: For errors raised by the Kafka client, other than failed
+            commits, seeks and resumes, which are logged.
+        Exception: Message processing errors are logged, not re-raised.
+    """
+    logger.info(
+      f"Consuming Kafka topics: {self.topics} in batches of {self.batch_size}"
+    )
+    self.consumer.subscribe(self.topics, on_revoke=self._on_revoke)
+    executor = ThreadPoolExecutor(
+      max_workers=self.max_workers, thread_name_prefix="kafka-consumer"
+    )
+    try:
+      while not self._stop_event.is_set():
+        self._resume_due()
+        messages = self.consumer.consume(
+          num_messages=self.batch_size, timeout=self._consume_timeout()
+        )
+        if messages:
+          self._handle_batch(executor, messages)
+    finally:
+      executor.shutdown(wait=True)
+      self.consumer.close()
+
+  def _handle_batch(self, executor: ThreadPoolExecutor, messages: list):
+    partitions = {}
+    for message in messages:
+      error = message.error()
+      if error is not None:
+        if error.code() != KafkaError._PARTITION_EOF:
+          logger.error(f"Kafka consume error: {error}")
+        continue
+      partitions.setdefault((message.topic(), message.partition()), []).append(message)
+
+    self.consumed += sum(len(batch) for batch in partitions.values())
+
+    if len(partitions) == 1:
+      results = [self._handle_partition(next(iter(partitions.values())))]
+    else:
+      results = list(executor.map(self._handle_partition, partitions.values()))
+
+    commits = []
+    for (topic, partition), (handled, failed) in zip(partitions, results):
+      tombstones = sum(1 for message in handled if message.value() is None)
+      self.tombstones += tombstones
+      self.processed += len(handled) - tombstones
+      next_offset = handled[-1].offset() + 1 if handled else None
+      if failed is None:
+        self._attempts.pop((topic, partition), None)
+      else:
+        self.failed += 1
+        if self._retry(failed):
+          next_offset = failed.offset() + 1
+      if next_offset is not None:
+        commits.append(TopicPartition(topic, partition, next_offset))
+
+    if commits:
+      try:
+        self.consumer.commit(offsets=commits, asynchronous=False)
+      except KafkaException as e:
+        # The uncommitted messages are delivered again, here or to the new owner.
+        logger.error(f"Failed to commit Kafka offsets: {e}")
+        return
+      self.commits += 1
+
+  def _retry(self, message) -> bool:
+    # Returns True when the message was dead-lettered and can be committed.
+    key = (message.topic(), message.partition())
+    offset, attempt = self._attempts.get(key, (None, 0))
+    attempt = attempt + 1 if offset == message.offset() else 1
+
+    if self.retry_policy.exhausted(attempt) and self._dead_letter(message, attempt):
+      self._attempts.pop(key, None)
+      # The rest of the partition's batch was skipped, so read it again.
+      self._seek(TopicPartition(*key, message.offset() + 1))
+      return True
+
+    if not self._seek(TopicPartition(*key, message.offset())):
+      self._attempts.pop(key, None)
+      return False
+    self._attempts[key] = (message.offset(), attempt)
+    delay = self.retry_policy.delay(attempt)
+    if delay > 0:
+      try:
+        self.consumer.pause([TopicPartition(*key)])
+        self._paused[key] = time.monotonic() + delay
+      except KafkaException as e:
+        logger.error(f"Failed to pause Kafka partition {key[0]}[{key[1]}]: {e}")
+    self.retries_scheduled += 1
+    return False
+
+  def _seek(self, partition: TopicPartition) -> bool:
+    try:
+      self.consumer.seek(partition)
+    except KafkaException as e:
+      # Typically the partition was revoked; its new owner starts at the
+      # committed offset.
+      logger.error(
+        f"Failed to seek Kafka partition {partition.topic}[{partition.partition}]: {e}"
+      )
+      return False
+    return True
+
+  def _dead_letter(self, message, attempt: int) -> bool:
+    try:
+      result = self.retry_policy.dead_letter_producer.send_message(
+        message.value().decode("utf-8", errors="replace"), raw=True
+      )
+      if isinstance(result, Future):
+        # A KafkaProducer reports delivery errors through the future.
+        result.result(timeout=DEAD_LETTER_TIMEOUT)
+    except Exception as e:
+      message_logger.error("Failed to dead-letter message: %s", e)
+      return False
+    message_logger.warning(
+      "Message dead-lettered after %d attempts: %s[%s]@%s",
+      attempt,
+      message.topic(),
+      message.partition(),
+      message.offset(),
+    )
+    self.dead_lettered += 1
+    return True
+
+  def _resume_due(self):
+    now = time.monotonic()
+    due = [key for key, resume_at in self._paused.items() if resume_at <= now]
+    for key in due:
+      del self._paused[key]
+      try:
+        self.consumer.resume([TopicPartition(*key)])
+      except KafkaException as e:
+        logger.error(f"Failed to resume Kafka partition {key[0]}[{key[1]}]: {e}")
+
+  def _on_revoke(self, consumer, partitions: list):
+    # Called from consume() on the polling thread when a rebalance takes
+    # partitions away; their new owner starts over from the committed offsets.
+    for partition in partitions:
+      key = (partition.topic, partition.partition)
+      self._attempts.pop(key, None)
+      self._paused.pop(key, None)
+    if partitions:
+      logger.info(f"Kafka partitions revoked: {len(partitions)}")
+
+  def _consume_timeout(self) -> float:
+    # Don't wait past the moment a paused partition is due to be resumed.
+    if not self._paused:
+      return self.poll_timeout
+    resume_in = min(self._paused.values()) - time.monotonic()
+    return max(0.0, min(self.poll_timeout, resume_in))
+
+  def _handle_partition(self, messages: list):
+    for index, message in enumerate(messages):
+      value = message.value()
+      if value is None:
+        # A tombstone marks a deleted key in a compacted topic.
+        continue
+      try:
+        self.handler.handle(value.decode("utf-8"))
+      except Exception as e:
+        message_logger.error("Error processing message: %s", e)
+        message_logger.error(
+          "Failed message: %s[%s]@%s",
+          message.topic(),
+          message.partition(),
+          message.offset(),
+        )
+        return messages[:index], message
+    return messages, None
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+from concurrent.futures import Future
+
+from confluent_kafka import KafkaException, Producer
+
+from logger import logger, message_logger
+
+
+class KafkaProducer:
+  """
+  Publishes messages to a Kafka topic with confluent-kafka.
+
+  send_message takes the same arguments as SqsProducer.send_message, plus an
+  explicit key and headers, but does not wait for the broker: the message is
+  handed to librdkafka, which batches and
+  compresses it according to linger_ms, batch_size and compression_type. The
+  returned Future resolves from the delivery callback, which a background thread
+  serves by polling the producer.
+
+  Attributes:
+      sent (int): Messages acknowledged by the broker.
+      failed (int): Messages whose delivery failed.
+
+  Example:
+      >>> with KafkaProducer(topic="YOUR_TOPIC_HERE") as kafka_producer:
+      ...   futures = kafka_producer.send_many(messages)
+      >>> message_ids = [future.result() for future in futures]
+  """
+
+  def __init__(
+    self,
+    topic: str,
+    config: dict = None,
+    linger_ms: int = 5,
+    batch_size: int = 1024 * 1024,
+    compression_type: str = "lz4",
+    producer=None,
+  ):
+    """
+    Initialize the KafkaProducer.
+
+    Args:
+      topic (str): The topic to which messages will be sent.
+      config (dict, optional): confluent-kafka producer configuration.
+        bootstrap.servers defaults to the KAFKA_BOOTSTRAP_SERVERS environment
+        variable. Entries here override the tuning arguments below.
+      linger_ms (int): Milliseconds to wait for more messages before sending a batch.
+      batch_size (int): Maximum size in bytes of a batch sent to one partition.
+      compression_type (str): none, gzip, snappy, lz4 or zstd.
+      producer (optional): A confluent_kafka.Producer compatible object, such as
+        an InMemoryKafkaProducer. If None, one is created from config.
+    """
+    self.topic = topic
+
+    if producer is None:
+      producer = Producer(
+        {
+          "bootstrap.servers": os.getenv("KAFKA_BOOTSTRAP_SERVERS"),
+          "linger.ms": linger_ms,
+          "batch.size": batch_size,
+          "compression.type": compression_type,
+          "enable.idempotence": True,
+          **(config or {}),
+        }
+      )
+    self.producer = producer
+
+    self.sent = 0
+    self.failed = 0
+    self._lock = threading.Lock()
+    self._closed = threading.Event()
+    self._poller = threading.Thread(
+      target=self._poll, name="kafka-producer-poller", daemon=True
+    )
+    self._poller.start()
+
+  def send_message(
+    self,
+    message_body: dict,
+    message_group_id: str = None,
+    deduplication_id: str = None,
+    key: str = None,
+    headers: dict = None,
+    raw: bool = False,
+  ) -> Future:
+    """
+    Send a message to the topic.
+
+    Args:
+      message_body (dict): The message body to send, which will be converted to JSON.
+      message_group_id (str, optional): Used as the key when no key is given.
+        Like an SQS message group, a key keeps its messages in order, on one
+        partition.
+      deduplication_id (str, optional): Accepted for compatibility with
+        SqsProducer and ignored: the idempotent producer already drops
+        duplicates caused by its own retries.
+      key (str, optional): The message key, which selects the partition.
+      headers (dict, optional): Kafka message headers.
+      raw (bool): Send a str message_body unchanged instead of converting it to
+        JSON, like with SqsProducer.
+
+    Returns:
+      Future: Resolves to the message ID "topic:partition:offset" once the broker
+        has acknowledged the message, or raises a KafkaException.
+
+    Raises:
+      RuntimeError: If the producer has been closed.
+    """
+    if self._closed.is_set():
+      raise RuntimeError("Cannot send messages on a closed KafkaProducer")
+
+    future = Future()
+    if not (raw and isinstance(message_body, str)):
+      message_body = json.dumps(message_body)
+    value = message_body.encode("utf-8")
+    if key is None:
+      key = message_group_id
+
+    def on_delivery(error, message):
+      self._on_delivery(future, error, message)
+
+    while True:
+      try:
+        self.producer.produce(
+          self.topic, value=value, key=key, headers=headers, on_delivery=on_delivery
+        )
+        return future
+      except BufferError:
+        # The local queue is full: serve delivery reports to make room.
+        self.producer.poll(0.1)
+
+  def send_many(self, message_bodies, key=None) -> list:
+    """
+    Send many messages without waiting for any of them.
+
+    Args:
+      message_bodies: An iterable of message bodies.
+      key (optional): A key for every message, or a callable returning the key of
+        a message body.
+
+    Returns:
+      list: One Future per message, in order.
+    """
+    key_for = key if callable(key) else lambda message_body: key
+    return [
+      self.send_message(message_body, key=key_for(message_body))
+      for message_body in message_bodies
+    ]
+
+  def flush(self, timeout: float = None) -> int:
+    """
+    Wait until every queued message has been delivered or has failed.
+
+    Args:
+      timeout (float, optional): Maximum seconds to wait.
+
+    Returns:
+      int: Number of messages still queued.
+    """
+    if timeout is None:
+      return self.producer.flush()
+    return self.producer.flush(timeout)
+
+  def close(self, timeout: float = None):
+    """
+    Flush queued messages and stop the delivery report thread.
+
+    Args:
+      timeout (float, optional): Maximum seconds to wait for the flush.
+    """
+    remaining = self.flush(timeout)
+    if remaining:
+      logger.error(f"{remaining} Kafka messages were not delivered before closing")
+    self._closed.set()
+    self._poller.join()
+
+  def stats(self) -> dict:
+    """
+    Return the producer counters.
+
+    Returns:
+      dict: sent and failed message counts.
+    """
+    return {"sent": self.sent, "failed": self.failed}
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, traceback):
+    self.close()
+
+  def _poll(self):
+    while not self._closed.is_set():
+      self.producer.poll(0.1)
+
+  def _on_delivery(self, future: Future, error, message):
+    if error is not None:
+      message_logger.error("Failed to send message to Kafka: %s", error)
+      with self._lock:
+        self.failed += 1
+      future.set_exception(KafkaException(error))
+      return
+
+    with self._lock:
+      self.sent += 1
+    future.set_result(f"{message.topic()}:{message.partition()}:{message.offset()}")
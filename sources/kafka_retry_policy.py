@@ -0,0 +1,72 @@
+from core.backoff import ExponentialBackoff
+
+
+class KafkaRetryPolicy:
+  """
+  Decides when a failed Kafka message is delivered again.
+
+  Kafka has no per-message visibility timeout, so KafkaConsumer rewinds the
+  partition to the failed offset and pauses it for the backoff delay of the
+  attempt. Other partitions keep flowing and the failed one does not spin.
+  Attempts are counted by the consumer, per partition. Once a message has
+  failed max_attempts times it is sent to the dead-letter producer and its
+  offset is committed.
+
+  Example:
+      >>> policy = KafkaRetryPolicy(
+      ...   backoff=ExponentialBackoff(initial=1, maximum=60, jitter=0.2),
+      ...   max_attempts=5,
+      ...   dead_letter_producer=KafkaProducer(topic="YOUR_DLQ_TOPIC_HERE"),
+      ... )
+      >>> kafka_consumer = KafkaConsumer(["events"], handler, retry_policy=policy)
+  """
+
+  def __init__(
+    self,
+    backoff: ExponentialBackoff = None,
+    max_attempts: int = None,
+    dead_letter_producer=None,
+  ):
+    """
+    Initialize the KafkaRetryPolicy.
+
+    Args:
+        backoff (ExponentialBackoff, optional): Redelivery delay by attempt
+            number. Defaults to 0.5s doubling up to 1 minute, with jitter.
+        max_attempts (int, optional): Failed attempts after which a message is
+            dead-lettered. If None, messages are retried until they succeed.
+        dead_letter_producer (optional): A KafkaProducer (or any object with a
+            send_message(message_body, raw=True) method) for the dead-letter topic.
+            Required with max_attempts.
+
+    Raises:
+        ValueError: If max_attempts is less than 1, or given without a
+            dead_letter_producer.
+    """
+    if max_attempts is not None:
+      if max_attempts < 1:
+        raise ValueError("max_attempts must be at least 1")
+      if dead_letter_producer is None:
+        raise ValueError("max_attempts requires a dead_letter_producer")
+
+    self.backoff = backoff or ExponentialBackoff(initial=0.5, maximum=60.0, jitter=0.1)
+    self.max_attempts = max_attempts
+    self.dead_letter_producer = dead_letter_producer
+
+  def delay(self, attempt: int) -> float:
+    """
+    Return the seconds a partition is paused after a failed attempt.
+
+    Args:
+        attempt (int): How often the message has failed.
+    """
+    return self.backoff.delay(attempt)
+
+  def exhausted(self, attempt: int) -> bool:
+    """
+    Return whether a failed message has used up its attempts.
+
+    Args:
+        attempt (int): How often the message has failed.
+    """
+    return self.max_attempts is not None and attempt >= self.max_attempts
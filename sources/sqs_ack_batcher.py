@@ -0,0 +1,254 @@
+import threading
+import time
+
+from core.metrics import MetricsRegistry
+from logger import logger
+from sources.sqs_metrics import SqsMetrics
+
+MAX_BATCH_SIZE = 10
+
+
+class SqsAckBatcher:
+  """
+  Collects SQS receipt handles and deletes them with delete_message_batch.
+
+  Handles are buffered until either max_batch_size handles are pending or the
+  oldest pending handle has waited max_delay seconds. Entries reported as
+  Failed by SQS are retried in the next batch call; entries that still fail
+  after max_retries attempts fall back to an individual delete_message call.
+
+  The batcher has no timer of its own: a due handle is flushed by the next
+  ack() or flush_if_due() call. SqsConsumer calls flush_if_due() from a
+  background thread as soon as due_in() has elapsed.
+
+  Attributes:
+      batched_deletes (int): Messages deleted through delete_message_batch.
+      individual_deletes (int): Messages deleted through delete_message.
+      failed_deletes (int): Messages that could not be deleted at all.
+      batch_calls (int): Number of delete_message_batch requests issued.
+
+  Example:
+      >>> batcher = SqsAckBatcher(client, queue_url="YOUR_QUEUE_URL_HERE")
+      >>> batcher.ack(message["ReceiptHandle"])
+      >>> batcher.flush()
+  """
+
+  def __init__(
+    self,
+    client,
+    queue_url: str,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_delay: float = 1.0,
+    max_retries: int = 3,
+    metrics: MetricsRegistry = None,
+    on_deleted=None,
+  ):
+    """
+    Initialize the SqsAckBatcher.
+
+    Args:
+        client: A boto3 SQS client.
+        queue_url (str): The URL of the queue the receipt handles belong to.
+        max_batch_size (int): Handles per delete_message_batch call (1-10).
+        max_delay (float): Maximum seconds a handle may wait before being flushed.
+        max_retries (int): Batch attempts for a failed entry before falling back
+            to an individual delete_message call.
+        metrics (MetricsRegistry, optional): Registry for the delete latency and
+            counters. Defaults to core.metrics.registry.
+        on_deleted (optional): Called with the list of receipt handles of
+            every batch once its deletion has been attempted, deleted or not.
+
+    Raises:
+        ValueError: If max_batch_size is not between 1 and 10.
+    """
+    if not 1 <= max_batch_size <= MAX_BATCH_SIZE:
+      raise ValueError(f"max_batch_size must be between 1 and {MAX_BATCH_SIZE}")
+
+    self.client = client
+    self.queue_url = queue_url
+    self.max_batch_size = max_batch_size
+    self.max_delay = max_delay
+    self.max_retries = max_retries
+    self.metrics = SqsMetrics(queue_url, metrics)
+    self.on_deleted = on_deleted
+
+    self.batched_deletes = 0
+    self.individual_deletes = 0
+    self.failed_deletes = 0
+    self.batch_calls = 0
+
+    self._pending = []
+    self._oldest = None
+    self._lock = threading.Lock()
+
+  def ack(self, receipt_handle: str):
+    """
+    Queue a receipt handle for deletion, flushing if a batch is full or due.
+
+    Args:
+        receipt_handle (str): The ReceiptHandle of a successfully handled message.
+    """
+    with self._lock:
+      if not self._pending:
+        self._oldest = time.monotonic()
+      self._pending.append(receipt_handle)
+      if len(self._pending) < self.max_batch_size and not self._is_due():
+        return
+      batch = self._take(self.max_batch_size)
+
+    self._delete_batch(batch)
+
+  def flush_if_due(self):
+    """
+    Flush pending handles if the oldest one has waited longer than max_delay.
+    """
+    with self._lock:
+      if not self._pending or not self._is_due():
+        return
+      batches = self._take_all()
+
+    for batch in batches:
+      self._delete_batch(batch)
+
+  def flush(self):
+    """
+    Delete every pending receipt handle immediately.
+    """
+    with self._lock:
+      batches = self._take_all()
+
+    for batch in batches:
+      self._delete_batch(batch)
+
+  def delete_batch(self, receipt_handles: list):
+    """
+    Delete receipt handles immediately with delete_message_batch, bypassing the
+    buffer.
+
+    Args:
+        receipt_handles (list): ReceiptHandles of successfully handled messages.
+    """
+    for start in range(0, len(receipt_handles), self.max_batch_size):
+      self._delete_batch(receipt_handles[start : start + self.max_batch_size])
+
+  @property
+  def pending(self) -> int:
+    """
+    Number of receipt handles waiting to be deleted.
+    """
+    return len(self._pending)
+
+  def stats(self) -> dict:
+    """
+    Return the delete counters of this batcher.
+
+    Returns:
+        dict: batched_deletes, individual_deletes, failed_deletes and batch_calls.
+    """
+    return {
+      "batched_deletes": self.batched_deletes,
+      "individual_deletes": self.individual_deletes,
+      "failed_deletes": self.failed_deletes,
+      "batch_calls": self.batch_calls,
+    }
+
+  def due_in(self) -> float:
+    """
+    Seconds until the oldest pending handle is due to be flushed.
+
+    Returns:
+        float: 0 if it is already due, None if nothing is pending.
+    """
+    with self._lock:
+      if not self._pending:
+        return None
+      return max(0.0, self._oldest + self.max_delay - time.monotonic())
+
+  def _is_due(self) -> bool:
+    return time.monotonic() - self._oldest >= self.max_delay
+
+  def _take(self, size: int) -> list:
+    batch = self._pending[:size]
+    del self._pending[:size]
+    self._oldest = time.monotonic() if self._pending else None
+    return batch
+
+  def _take_all(self) -> list:
+    batches = []
+    while self._pending:
+      batches.append(self._take(self.max_batch_size))
+    return batches
+
+  def _delete_batch(self, receipt_handles: list):
+    try:
+      remaining = receipt_handles
+      for _ in range(self.max_retries):
+        if not remaining:
+          return
+        remaining = self._delete_batch_once(remaining)
+
+      for receipt_handle in remaining:
+        self.delete_individually(receipt_handle)
+    finally:
+      if self.on_deleted is not None:
+        self.on_deleted(receipt_handles)
+
+  def _delete_batch_once(self, receipt_handles: list) -> list:
+    entries = [
+      {"Id": str(index), "ReceiptHandle": receipt_handle}
+      for index, receipt_handle in enumerate(receipt_handles)
+    ]
+    try:
+      with self.metrics.request("delete_message_batch").time():
+        response = self.client.delete_message_batch(
+          QueueUrl=self.queue_url, Entries=entries
+        )
+    except Exception as e:
+      self.metrics.error("delete_message_batch")
+      logger.error(f"Error deleting message batch: {e}")
+      with self._lock:
+        self.batch_calls += 1
+      return receipt_handles
+
+    retry = []
+    failed = 0
+    for entry in response.get("Failed", []):
+      receipt_handle = receipt_handles[int(entry["Id"])]
+      if entry.get("SenderFault"):
+        logger.error(
+          f"Failed to delete message {receipt_handle}: {entry.get('Code')} "
+          f"{entry.get('Message', '')}"
+        )
+        failed += 1
+      else:
+        retry.append(receipt_handle)
+
+    self.metrics.deleted.inc(len(response.get("Successful", [])))
+    with self._lock:
+      self.batch_calls += 1
+      self.batched_deletes += len(response.get("Successful", []))
+      self.failed_deletes += failed
+    return retry
+
+  def delete_individually(self, receipt_handle: str):
+    """
+    Delete a single message with delete_message, bypassing the batch buffer.
+
+    Args:
+        receipt_handle (str): The ReceiptHandle of the message to delete.
+    """
+    try:
+      with self.metrics.request("delete_message").time():
+        self.client.delete_message(
+          QueueUrl=self.queue_url, ReceiptHandle=receipt_handle
+        )
+    except Exception as e:
+      self.metrics.error("delete_message")
+      logger.error(f"Failed to delete message {receipt_handle}: {e}")
+      with self._lock:
+        self.failed_deletes += 1
+      return
+
+    self.metrics.deleted.inc()
+    with self._lock:
+      self.individual_deletes += 1
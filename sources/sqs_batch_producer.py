@@ -0,0 +1,371 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from core.backoff import ExponentialBackoff
+from core.codec import BodyCodec
+from core.metrics import MetricsRegistry
+from logger import logger, message_logger
+from sources.sqs_producer import SqsProducer, message_params
+
+MAX_BATCH_SIZE = 10
+MAX_BATCH_BYTES = 256 * 1024
+
+
+class _Entry:
+  __slots__ = ("params", "size", "future", "attempts")
+
+  def __init__(self, params: dict, size: int):
+    self.params = params
+    self.size = size
+    self.future = Future()
+    self.attempts = 0
+
+
+class SqsBatchProducer(SqsProducer):
+  """
+  An SqsProducer that buffers messages and sends them with send_message_batch.
+
+  send_message returns immediately with a Future that resolves to the SQS
+  MessageId. A batch is sent as soon as it holds max_batch_size entries, would
+  exceed max_batch_bytes, or its oldest entry has waited `linger` seconds.
+  Entries reported as Failed without SenderFault are retried on their own;
+  others fail their future with a ClientError. A future cancelled before its
+  batch is sent drops the message.
+
+  Batches are sent by `flush_workers` threads. For FIFO queues (URLs ending in
+  ".fifo") a single worker is used so batches of the same group stay in order.
+
+  Attributes:
+      batch_calls (int): Number of send_message_batch requests issued.
+      sent (int): Messages accepted by SQS.
+      failed (int): Messages whose future failed.
+      retried (int): Entries re-sent after a failure.
+
+  Example:
+      >>> with SqsBatchProducer(queue_url="YOUR_QUEUE_URL_HERE", linger=0.01) as producer:
+      ...   futures = [producer.send_message({"id": str(i)}) for i in range(1000)]
+      >>> message_ids = [future.result() for future in futures]
+  """
+
+  def __init__(
+    self,
+    queue_url: str,
+    linger: float = 0.05,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_batch_bytes: int = MAX_BATCH_BYTES,
+    max_retries: int = 3,
+    flush_workers: int = 4,
+    client=None,
+    metrics: MetricsRegistry = None,
+    codec: BodyCodec = None,
+  ):
+    """
+    Initialize the SqsBatchProducer.
+
+    Args:
+      queue_url (str): The URL of the SQS queue to which messages will be sent.
+      linger (float): Maximum seconds a message waits for its batch to fill up.
+      max_batch_size (int): Maximum entries per send_message_batch call (1-10).
+      max_batch_bytes (int): Maximum total payload size of one request.
+      max_retries (int): Send attempts for an entry that keeps failing.
+      flush_workers (int): Threads sending batches concurrently. Forced to 1 for
+        FIFO queues.
+      client (optional): A boto3 SQS client. Defaults to the shared client.
+      metrics (MetricsRegistry, optional): Registry for the send latency and
+        counters. Defaults to core.metrics.registry.
+      codec (BodyCodec, optional): Compresses large bodies and offloads very
+        large ones to a blob store, on the calling thread. Batches are sized
+        by the encoded bodies.
+
+    Raises:
+      ValueError: If max_batch_size or max_batch_bytes is out of range.
+    """
+    if not 1 <= max_batch_size <= MAX_BATCH_SIZE:
+      raise ValueError(f"max_batch_size must be between 1 and {MAX_BATCH_SIZE}")
+    if not 1 <= max_batch_bytes <= MAX_BATCH_BYTES:
+      raise ValueError(f"max_batch_bytes must be between 1 and {MAX_BATCH_BYTES}")
+
+    super().__init__(queue_url, client=client, metrics=metrics, codec=codec)
+    self.linger = linger
+    self.max_batch_size = max_batch_size
+    self.max_batch_bytes = max_batch_bytes
+    self.max_retries = max_retries
+    self.flush_workers = 1 if queue_url.endswith(".fifo") else flush_workers
+    self.retry_backoff = ExponentialBackoff(initial=0.05, maximum=1.0, jitter=0.5)
+
+    self.batch_calls = 0
+    self.sent = 0
+    self.failed = 0
+    self.retried = 0
+
+    self._pending = []
+    self._pending_bytes = 0
+    self._oldest = None
+    self._unfinished = 0
+    self._closed = False
+    self._lock = threading.Lock()
+    self._changed = threading.Condition(self._lock)
+    self._executor = None
+    self._flusher = None
+
+  def send_message(
+    self,
+    message_body: dict,
+    message_group_id: str = None,
+    deduplication_id: str = None,
+    raw: bool = False,
+  ) -> Future:
+    """
+    Queue a message for the next batch.
+
+    Args:
+      message_body (dict): The message body to send, which will be converted to JSON.
+      message_group_id (str, optional): The message group ID for FIFO queues.
+      deduplication_id (str, optional): The deduplication ID for FIFO queues.
+      raw (bool): Send a str message_body unchanged instead of converting it to
+        JSON, like with SqsProducer.
+
+    Returns:
+      Future: Resolves to the ID of the sent message, or raises the send error.
+
+    Raises:
+      RuntimeError: If the producer has been closed.
+    """
+    return self._enqueue(
+      message_params(message_body, message_group_id, deduplication_id, self.codec, raw)
+    )
+
+  def flush(self, timeout: float = None) -> bool:
+    """
+    Send every buffered message and wait until all futures are resolved.
+
+    Args:
+      timeout (float, optional): Maximum seconds to wait.
+
+    Returns:
+      bool: True if everything was sent (or failed) within the timeout.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with self._changed:
+      self._oldest = float("-inf") if self._pending else None
+      self._changed.notify_all()
+      while self._unfinished:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+          return False
+        self._changed.wait(remaining)
+    return True
+
+  def close(self, timeout: float = None):
+    """
+    Flush buffered messages and stop the background threads.
+
+    Args:
+      timeout (float, optional): Maximum seconds to wait for the flush.
+    """
+    self.flush(timeout)
+    with self._changed:
+      self._closed = True
+      self._changed.notify_all()
+    if self._flusher is not None:
+      self._flusher.join(timeout)
+    if self._executor is not None:
+      self._executor.shutdown(wait=True)
+
+  def stats(self) -> dict:
+    """
+    Return the producer counters.
+
+    Returns:
+      dict: batch_calls, sent, failed and retried counts.
+    """
+    return {
+      "batch_calls": self.batch_calls,
+      "sent": self.sent,
+      "failed": self.failed,
+      "retried": self.retried,
+    }
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, traceback):
+    self.close()
+
+  def _enqueue(self, params: dict) -> Future:
+    entry = _Entry(params, _entry_size(params))
+    if entry.size > self.max_batch_bytes:
+      entry.future.set_exception(
+        ValueError(
+          f"Message of {entry.size} bytes exceeds the {self.max_batch_bytes} byte limit"
+        )
+      )
+      return entry.future
+
+    with self._changed:
+      if self._closed:
+        raise RuntimeError("Cannot send messages on a closed SqsBatchProducer")
+      self._start()
+      if not self._pending:
+        self._oldest = time.monotonic()
+      self._pending.append(entry)
+      self._pending_bytes += entry.size
+      self._unfinished += 1
+      self._changed.notify_all()
+    return entry.future
+
+  def _start(self):
+    if self._flusher is not None:
+      return
+    self._executor = ThreadPoolExecutor(
+      max_workers=self.flush_workers, thread_name_prefix="sqs-batch-producer"
+    )
+    self._flusher = threading.Thread(
+      target=self._run, name="sqs-batch-producer-flusher", daemon=True
+    )
+    self._flusher.start()
+
+  def _run(self):
+    while True:
+      with self._changed:
+        while not self._batch_ready():
+          if self._closed and not self._pending:
+            return
+          timeout = None
+          if self._oldest is not None:
+            timeout = max(self._oldest + self.linger - time.monotonic(), 0)
+          self._changed.wait(timeout)
+        batch = self._take_batch()
+      if batch:
+        self._executor.submit(self._send_batch, batch)
+
+  def _batch_ready(self) -> bool:
+    if not self._pending:
+      return False
+    return (
+      len(self._pending) >= self.max_batch_size
+      or self._pending_bytes >= self.max_batch_bytes
+      or self._closed
+      or time.monotonic() - self._oldest >= self.linger
+    )
+
+  def _take_batch(self) -> list:
+    batch = []
+    size = 0
+    taken = 0
+    for entry in self._pending:
+      if len(batch) == self.max_batch_size or size + entry.size > self.max_batch_bytes:
+        break
+      taken += 1
+      self._pending_bytes -= entry.size
+      # Entries whose future was cancelled by the caller are dropped; the others
+      # can no longer be cancelled once they are running.
+      if not entry.future.set_running_or_notify_cancel():
+        self._unfinished -= 1
+        continue
+      batch.append(entry)
+      size += entry.size
+
+    del self._pending[:taken]
+    if not self._unfinished:
+      self._changed.notify_all()
+    if not self._pending:
+      self._oldest = None
+    elif self._oldest != float("-inf"):
+      self._oldest = time.monotonic()
+    return batch
+
+  def _send_batch(self, batch: list):
+    retry = self._send_batch_once(batch)
+    attempt = 1
+    while retry:
+      time.sleep(self.retry_backoff.delay(attempt))
+      retry = self._send_batch_once(retry)
+      attempt += 1
+
+  def _send_batch_once(self, batch: list) -> list:
+    entries = [{"Id": str(index), **entry.params} for index, entry in enumerate(batch)]
+    for entry in batch:
+      entry.attempts += 1
+
+    try:
+      with self.metrics.request("send_message_batch").time():
+        response = self.client.send_message_batch(
+          QueueUrl=self.queue_url, Entries=entries
+        )
+    except Exception as e:
+      self.metrics.error("send_message_batch")
+      logger.error(f"Failed to send message batch to SQS: {e}")
+      self._count(batch_calls=1)
+      return self._retry_or_fail([(entry, e) for entry in batch])
+
+    for result in response.get("Successful", []):
+      self._resolve(batch[int(result["Id"])], result["MessageId"])
+
+    failures = []
+    for result in response.get("Failed", []):
+      entry = batch[int(result["Id"])]
+      error = ClientError(
+        {"Error": {"Code": result.get("Code"), "Message": result.get("Message", "")}},
+        "SendMessageBatch",
+      )
+      if result.get("SenderFault"):
+        self._reject(entry, error)
+      else:
+        failures.append((entry, error))
+
+    self.metrics.sent.inc(len(response.get("Successful", [])))
+    self._count(batch_calls=1, sent=len(response.get("Successful", [])))
+    return self._retry_or_fail(failures)
+
+  def _retry_or_fail(self, failures: list) -> list:
+    retry = []
+    for entry, error in failures:
+      if entry.attempts < self.max_retries:
+        retry.append(entry)
+      else:
+        message_logger.error("Failed to send message to SQS: %s", error)
+        self._reject(entry, error)
+    self._count(retried=len(retry))
+    return retry
+
+  def _resolve(self, entry: _Entry, message_id: str):
+    try:
+      entry.future.set_result(message_id)
+    finally:
+      self._finish()
+
+  def _reject(self, entry: _Entry, error: Exception):
+    try:
+      entry.future.set_exception(error)
+      self._count(failed=1)
+    finally:
+      self._finish()
+
+  def _finish(self):
+    with self._changed:
+      self._unfinished -= 1
+      if not self._unfinished:
+        self._changed.notify_all()
+
+  def _count(self, batch_calls=0, sent=0, failed=0, retried=0):
+    with self._lock:
+      self.batch_calls += batch_calls
+      self.sent += sent
+      self.failed += failed
+      self.retried += retried
+
+
+def _entry_size(params: dict) -> int:
+  size = len(params["MessageBody"].encode("utf-8"))
+  for name, attribute in params.get("MessageAttributes", {}).items():
+    size += len(name.encode("utf-8")) + len(attribute["DataType"].encode("utf-8"))
+    value = attribute.get("StringValue")
+    if value is not None:
+      size += len(value.encode("utf-8"))
+    else:
+      size += len(attribute.get("BinaryValue", b""))
+  return size
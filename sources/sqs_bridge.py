@@ -0,0 +1,229 @@
+import threading
+from concurrent.futures import Future
+
+from core.backoff import ExponentialBackoff
+from core.handler import MessageHandler
+from core.metrics import MetricsRegistry
+from logger import logger, message_logger
+from parsers.sqs_parser import SQSParser
+from sources.sqs_consumer import SqsConsumer
+from sources.sqs_producer import SqsProducer
+from sources.sqs_retry_policy import SqsRetryPolicy
+
+
+class SqsBridge:
+  """
+  Consumes one SQS queue, transforms every message and publishes the results
+  to another queue, with at-least-once delivery.
+
+  Received batches are passed to forward(), which transforms every message and
+  hands the results to the producer. With an SqsBatchProducer, the outputs of
+  a whole receive batch go out in send_message_batch calls. A received
+  message is reported as handled only once every one of its sends has been
+  acknowledged by SQS; the consumer then deletes the handled messages with
+  delete_message_batch. Messages whose transform or sends fail are not
+  deleted, so they are received again (and retried per retry_policy). Their
+  sends that did succeed are repeated then: downstream consumers should
+  tolerate duplicates.
+
+  The transform takes a Message and returns the body to publish (a dict, or a
+  str sent unchanged), a list of bodies, or None to drop the message. Messages
+  are published as their model_dump().
+
+  Deletes are batched and held for up to ack_max_delay seconds, also during
+  long polls; keep it well below the visibility timeout.
+
+  Example:
+      >>> def transform(message):
+      ...   return {**message.model_dump(), "payload": enrich(message.payload)}
+      >>> with SqsBatchProducer(OUTPUT_QUEUE_URL, linger=0.01) as producer:
+      ...   bridge = SqsBridge(INPUT_QUEUE_URL, transform, producer, max_workers=4)
+      ...   bridge.run()
+  """
+
+  def __init__(
+    self,
+    queue_url: str,
+    transform,
+    producer: SqsProducer,
+    parser=None,
+    number_of_messages: int = 10,
+    max_workers: int = 4,
+    max_in_flight: int = None,
+    wait_time_seconds: int = 20,
+    idle_backoff: ExponentialBackoff = None,
+    retry_policy: SqsRetryPolicy = None,
+    visibility_timeout: int = None,
+    ack_max_delay: float = 1.0,
+    send_timeout: float = 30.0,
+    client=None,
+    metrics: MetricsRegistry = None,
+  ):
+    """
+    Initialize the SqsBridge.
+
+    Args:
+        queue_url (str): The URL of the queue to consume.
+        transform: A callable taking a Message and returning a dict or str, a
+            list of them or None.
+        producer (SqsProducer): Publishes the transformed messages. An
+            SqsBatchProducer sends them in batches; its futures are awaited
+            before the inbound messages are deleted. The bridge flushes but
+            does not close it.
+        parser (optional): Parser for the inbound messages. Defaults to
+            SQSParser().
+        number_of_messages (int): Maximum number of messages per receive.
+        max_workers (int): Receive batches transformed and sent in parallel.
+        max_in_flight (int, optional): Maximum number of received messages not
+            yet deleted. Defaults to twice max_workers times
+            number_of_messages, so workers are not starved between receives.
+        wait_time_seconds (int): Long polling wait of the receives.
+        idle_backoff (ExponentialBackoff, optional): Delay after consecutive
+            empty receives.
+        retry_policy (SqsRetryPolicy, optional): Schedules the redelivery of
+            failed messages, see SqsConsumer.
+        visibility_timeout (int, optional): VisibilityTimeout of the receives.
+            Should exceed the time to transform and send a batch, plus
+            ack_max_delay.
+        ack_max_delay (float): Maximum seconds a delete is held to fill a
+            delete_message_batch call.
+        send_timeout (float): Seconds to wait for the sends of a message before
+            it counts as failed.
+        client (optional): A boto3 SQS client for the inbound queue.
+        metrics (MetricsRegistry, optional): Registry for the handler and
+            consumer metrics. Defaults to core.metrics.registry.
+    """
+    self.transform = transform
+    self.producer = producer
+    self.send_timeout = send_timeout
+
+    self.transformed = 0
+    self.dropped = 0
+    self.transform_errors = 0
+    self.send_errors = 0
+    self._lock = threading.Lock()
+
+    self.handler = MessageHandler(
+      parser or SQSParser(), None, metrics=metrics, batch_processor=self.forward
+    )
+    self.consumer = SqsConsumer(
+      queue_url,
+      number_of_messages,
+      self.handler,
+      batch_acks=True,
+      ack_max_delay=ack_max_delay,
+      wait_time_seconds=wait_time_seconds,
+      idle_backoff=idle_backoff,
+      max_workers=max_workers,
+      max_in_flight=max_in_flight or 2 * max_workers * number_of_messages,
+      client=client,
+      metrics=metrics,
+      retry_policy=retry_policy,
+      visibility_timeout=visibility_timeout,
+    )
+
+  def run(self):
+    """
+    Bridge messages until stop() is called, then flush the producer.
+
+    Raises:
+        boto3.exceptions.Boto3Error: For errors receiving from the inbound queue.
+    """
+    logger.info(
+      f"Bridging SQS queue {self.consumer.queue_url} to {self.producer.queue_url}"
+    )
+    try:
+      self.consumer.poll_sqs()
+    finally:
+      flush = getattr(self.producer, "flush", None)
+      if flush is not None:
+        flush(self.send_timeout)
+
+  def stop(self):
+    """
+    Ask run() to return after the batches in progress.
+    """
+    self.consumer.stop()
+
+  def stats(self) -> dict:
+    """
+    Return the bridge counters.
+
+    Returns:
+        dict: Messages transformed, dropped by the transform, failed in the
+            transform and failed to send, plus the consumer stats and the
+            producer stats (prefixed with "producer_").
+    """
+    stats = {
+      "transformed": self.transformed,
+      "dropped": self.dropped,
+      "transform_errors": self.transform_errors,
+      "send_errors": self.send_errors,
+      **self.consumer.stats(),
+    }
+    producer_stats = getattr(self.producer, "stats", None)
+    if producer_stats is not None:
+      stats.update(
+        {f"producer_{name}": value for name, value in producer_stats().items()}
+      )
+    return stats
+
+  def forward(self, messages: list) -> list:
+    """
+    Transform a batch of messages and publish the results.
+
+    Every message is transformed and its outputs are handed to the producer
+    before any send is awaited, so a batch producer can fill whole batches.
+
+    Args:
+        messages (list): Parsed messages.
+
+    Returns:
+        list: One bool per message, True once all its outputs have been sent.
+    """
+    sends = [self._send(message) for message in messages]
+    return [
+      sent is not None and self._await(message, sent)
+      for message, sent in zip(messages, sends)
+    ]
+
+  def _send(self, message) -> list:
+    try:
+      outputs = self.transform(message)
+      if outputs is None:
+        self._count(dropped=1)
+        return []
+      if not isinstance(outputs, list):
+        outputs = [outputs]
+      sent = [self.producer.send_message(_body(output), raw=True) for output in outputs]
+    except Exception as e:
+      self._count(transform_errors=1)
+      message_logger.error("Error transforming message %s: %s", message.id, e)
+      return None
+    self._count(transformed=1)
+    return sent
+
+  def _await(self, message, sent: list) -> bool:
+    for result in sent:
+      if not isinstance(result, Future):
+        # A plain SqsProducer has already sent it.
+        continue
+      try:
+        result.result(timeout=self.send_timeout)
+      except Exception as e:
+        self._count(send_errors=1)
+        message_logger.error("Error publishing message %s: %s", message.id, e)
+        return False
+    return True
+
+  def _count(self, transformed=0, dropped=0, transform_errors=0, send_errors=0):
+    with self._lock:
+      self.transformed += transformed
+      self.dropped += dropped
+      self.transform_errors += transform_errors
+      self.send_errors += send_errors
+
+
+def _body(output) -> dict:
+  model_dump = getattr(output, "model_dump", None)
+  return output if model_dump is None else model_dump()
@@ -1,14 +1,38 @@
-import os
-
-import boto3
-from botocore.config import Config
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
+from core.backoff import ExponentialBackoff
 from core.handler import MessageHandler
-from logger import logger
+from core.metrics import MetricsRegistry
+from logger import logger, message_logger
+from sources.clients import DEFAULT_MAX_POOL_CONNECTIONS, get_client
+from sources.sqs_ack_batcher import SqsAckBatcher
+from sources.sqs_metrics import SqsMetrics
+from sources.sqs_retry_policy import SqsRetryPolicy, receive_count
+from sources.sqs_visibility_batcher import SqsVisibilityBatcher
+from sources.sqs_visibility_heartbeat import SqsVisibilityHeartbeat
 
 
 class SqsConsumer:
-  def __init__(self, queue_url: str, number_of_messages: int, handler: MessageHandler):
+  def __init__(
+    self,
+    queue_url: str,
+    number_of_messages: int,
+    handler: MessageHandler,
+    batch_acks: bool = False,
+    ack_max_delay: float = 1.0,
+    wait_time_seconds: int = None,
+    idle_backoff: ExponentialBackoff = None,
+    max_workers: int = 1,
+    max_in_flight: int = None,
+    client=None,
+    metrics: MetricsRegistry = None,
+    retry_policy: SqsRetryPolicy = None,
+    visibility_timeout: int = None,
+    heartbeat: bool = False,
+    fifo: bool = None,
+  ):
     """
     Initializes the SqsConsumer with the specified queue URL, number of messages to poll,
     and a message handler.
@@ -18,29 +42,467 @@ class SqsConsumer:
         number_of_messages (int): Maximum number of messages to receive in each polling request.
             If None or 0, defaults to 100 messages.
         handler (MessageHandler): Instance of MessageHandler to process received messages.
+            If it has a batch_processor, every received batch is passed to
+            handler.handle_batch and only the succeeded messages are deleted.
+        batch_acks (bool): If True, successfully handled messages are deleted with
+            delete_message_batch instead of one delete_message call per message.
+        ack_max_delay (float): Maximum seconds a batched acknowledgement or
+            visibility change may be held before it is flushed. A background
+            thread enforces it while polling, also during long polls. Keep it
+            well below the visibility timeout, or acknowledged messages are
+            redelivered before they are deleted.
+        wait_time_seconds (int, optional): Long polling wait (0-20 seconds) passed to
+            receive_message as WaitTimeSeconds. If None, the queue's default
+            ReceiveMessageWaitTimeSeconds applies.
+        idle_backoff (ExponentialBackoff, optional): Delay strategy applied after
+            consecutive empty receives. The delay grows with every empty receive and
+            resets as soon as messages arrive. If None, polling resumes immediately.
+        max_workers (int): Number of threads handling messages. With 1 (the default)
+            messages are handled serially on the polling thread; with more, they are
+            dispatched to a thread pool while the next batch is being received.
+        max_in_flight (int, optional): Maximum number of received messages that may be
+            queued or in progress at once. Defaults to twice max_workers. When the
+            handler has a limiter (and no batch_processor), the limiter's current
+            limit caps it too, and receives are sized to the free capacity, so
+            messages are not received faster than the processor copes with.
+        client (optional): A boto3 SQS client. If None, the shared client from
+            sources.clients.get_client is used, with a connection pool large enough
+            for max_workers.
+        metrics (MetricsRegistry, optional): Registry for the receive and delete
+            latency histograms and message counters. Defaults to
+            core.metrics.registry.
+        retry_policy (SqsRetryPolicy, optional): Schedules the redelivery of failed
+            messages with batched change_message_visibility calls and routes
+            messages out of attempts to a dead-letter producer. If None, failed
+            messages reappear after the queue's visibility timeout.
+        visibility_timeout (int, optional): VisibilityTimeout passed to
+            receive_message. If None, the queue's default applies.
+        heartbeat (bool): If True, the visibility of every received message is
+            extended by visibility_timeout (which is then required) every third
+            of visibility_timeout, until the message has failed or its delete
+            has been sent. Slow messages are then not redelivered while they
+            are being processed, nor while their batched delete is pending.
+        fifo (bool, optional): Preserve the order of message groups. Messages of
+            one MessageGroupId are handled one after another, different groups
+            concurrently (with max_workers > 1). After a failure, the rest of
+            the group's received messages are skipped and made visible again,
+            so they are redelivered after the failed message. Defaults to True
+            for queue URLs ending in ".fifo". Not applied to batch processors,
+            which receive whole batches in order.
+
+    Raises:
+        ValueError: If queue_url is missing, or wait_time_seconds, max_workers
+            or heartbeat are invalid.
     """
+    if not queue_url:
+      raise ValueError("queue_url is required")
+    if wait_time_seconds is not None and not 0 <= wait_time_seconds <= 20:
+      raise ValueError("wait_time_seconds must be between 0 and 20")
+    if max_workers < 1:
+      raise ValueError("max_workers must be at least 1")
+    if heartbeat and visibility_timeout is None:
+      raise ValueError("heartbeat requires a visibility_timeout")
+
     self.queue_url = queue_url
     self.number_of_messages = number_of_messages
     self.handler = handler
-    self.client = boto3.client(
+    self.batch_acks = batch_acks
+    self.ack_max_delay = ack_max_delay
+    self.wait_time_seconds = wait_time_seconds
+    self.idle_backoff = idle_backoff
+    self.empty_receives = 0
+    self.non_empty_receives = 0
+    self._consecutive_empty_receives = 0
+    self._stop_event = threading.Event()
+    self._flusher_stop = threading.Event()
+    self.max_workers = max_workers
+    self.max_in_flight = max_in_flight or max_workers * 2
+    self._in_flight = 0
+    self._in_flight_changed = threading.Condition()
+    self.client = client or get_client(
       "sqs",
-      region_name=os.getenv("LOCAL_STACK_REGION"),
-      endpoint_url=os.getenv("LOCAL_STACK_URL"),
-      aws_access_key_id=os.getenv("LOCAL_STACK_ACCESS_KEY_ID"),
-      aws_secret_access_key=os.getenv("LOCAL_STACK_ACCESS_KEY_ID"),
-      use_ssl=False,
-      verify=False,
-      aws_session_token=None,
-      config=Config(retries=dict(max_attempts=3)),
+      max_pool_connections=max(DEFAULT_MAX_POOL_CONNECTIONS, max_workers + 1),
+    )
+    self.metrics = SqsMetrics(queue_url, metrics)
+    self._batch_processing = getattr(handler, "batch_processor", None) is not None
+    # A limiter counts processor calls; with a batch processor, a call is a
+    # whole batch and does not translate to a number of messages.
+    self.limiter = None
+    if not self._batch_processing:
+      self.limiter = getattr(handler, "limiter", None)
+    self.rate_limit = getattr(handler, "rate_limit", None)
+    self.ack_batcher = SqsAckBatcher(
+      self.client,
+      queue_url=self.queue_url,
+      max_delay=ack_max_delay,
+      metrics=metrics,
+      on_deleted=self._untrack_handles,
+    )
+    self.retry_policy = retry_policy
+    self.retries_scheduled = 0
+    self.dead_lettered = 0
+    self._retry_lock = threading.Lock()
+    self.visibility_batcher = SqsVisibilityBatcher(
+      self.client, queue_url=self.queue_url, max_delay=ack_max_delay, metrics=metrics
+    )
+    self.visibility_timeout = visibility_timeout
+    self.fifo = queue_url.endswith(".fifo") if fifo is None else fifo
+    self.skipped_messages = 0
+    self._groups = {}
+    self._groups_lock = threading.Lock()
+    self.heartbeat = None
+    if heartbeat:
+      self.heartbeat = SqsVisibilityHeartbeat(
+        self.visibility_batcher, visibility_timeout
+      )
+
+  def ack(self, message: dict):
+    """
+    Acknowledge a successfully handled message by deleting it from the queue.
+
+    With batch_acks enabled the receipt handle is buffered and deleted in
+    batches of up to 10; otherwise it is deleted immediately.
+
+    Args:
+        message (dict): The SQS message as returned by receive_message.
+    """
+    if self.batch_acks:
+      self.ack_batcher.ack(message["ReceiptHandle"])
+    else:
+      self.ack_batcher.delete_individually(message["ReceiptHandle"])
+      self._untrack(message)
+
+  def ack_many(self, messages: list):
+    """
+    Acknowledge several successfully handled messages.
+
+    With batch_acks enabled the receipt handles are buffered like ack();
+    otherwise they are deleted immediately with delete_message_batch.
+
+    Args:
+        messages (list): SQS messages as returned by receive_message.
+    """
+    receipt_handles = [message["ReceiptHandle"] for message in messages]
+    if self.batch_acks:
+      for receipt_handle in receipt_handles:
+        self.ack_batcher.ack(receipt_handle)
+    else:
+      self.ack_batcher.delete_batch(receipt_handles)
+
+  def retry(self, message: dict):
+    """
+    Schedule the redelivery of a failed message according to the retry policy.
+
+    A message that has used up its attempts is sent to the dead-letter producer
+    and acknowledged; if that send fails, it is retried like any other message.
+    Sends to a FIFO dead-letter queue keep the message's MessageGroupId (or its
+    MessageId when it has none) and use its MessageId for deduplication.
+    Otherwise its visibility timeout is set to the backoff delay of its attempt.
+
+    Args:
+        message (dict): The SQS message as returned by receive_message.
+    """
+    attempt = receive_count(message)
+    if self.retry_policy.exhausted(attempt):
+      try:
+        self._dead_letter(message)
+      except Exception as e:
+        message_logger.error("Failed to dead-letter message: %s", e)
+      else:
+        message_logger.warning(
+          "Message dead-lettered after %d attempts: %s",
+          attempt,
+          message.get("MessageId"),
+        )
+        with self._retry_lock:
+          self.dead_lettered += 1
+        self.ack(message)
+        return
+
+    self.visibility_batcher.change(
+      message["ReceiptHandle"], self.retry_policy.visibility_timeout(attempt)
+    )
+    with self._retry_lock:
+      self.retries_scheduled += 1
+
+  def _dead_letter(self, message: dict):
+    producer = self.retry_policy.dead_letter_producer
+    if (getattr(producer, "queue_url", None) or "").endswith(".fifo"):
+      result = producer.send_message(
+        message["Body"],
+        message_group_id=_group_id(message) or message.get("MessageId"),
+        deduplication_id=message.get("MessageId"),
+        raw=True,
+      )
+    else:
+      result = producer.send_message(message["Body"], raw=True)
+    if isinstance(result, Future):
+      # An SqsBatchProducer reports send errors through the future.
+      result.result()
+
+  def stats(self) -> dict:
+    """
+    Return the consumer counters.
+
+    Returns:
+        dict: Counts of empty and non-empty receives, batched and individual
+            deletes, failed deletes, delete_message_batch calls, scheduled
+            retries, dead-lettered messages, messages skipped after a failure
+            in their FIFO group and visibility changes, plus the
+            heartbeat counters when the heartbeat is enabled and the limiter
+            and rate limit counters of the handler.
+    """
+    stats = {
+      "empty_receives": self.empty_receives,
+      "non_empty_receives": self.non_empty_receives,
+      **self.ack_batcher.stats(),
+      "retries_scheduled": self.retries_scheduled,
+      "dead_lettered": self.dead_lettered,
+      "skipped_messages": self.skipped_messages,
+      **self.visibility_batcher.stats(),
+    }
+    if self.heartbeat is not None:
+      stats.update(self.heartbeat.stats())
+    if self.limiter is not None:
+      stats.update(self.limiter.stats())
+    if self.rate_limit is not None:
+      stats.update(self.rate_limit.stats())
+    return stats
+
+  def stop(self):
+    """
+    Ask poll_sqs to return after the current receive, interrupting any idle backoff.
+    """
+    self._stop_event.set()
+
+  def _receive(self, max_messages: int) -> list:
+    params = {
+      "QueueUrl": self.queue_url,
+      "MaxNumberOfMessages": max_messages,
+    }
+    if self.wait_time_seconds is not None:
+      params["WaitTimeSeconds"] = self.wait_time_seconds
+    if self.visibility_timeout is not None:
+      params["VisibilityTimeout"] = self.visibility_timeout
+    attribute_names = []
+    if self.retry_policy is not None:
+      attribute_names.append("ApproximateReceiveCount")
+    if self.fifo:
+      attribute_names.append("MessageGroupId")
+    if attribute_names:
+      params["MessageSystemAttributeNames"] = attribute_names
+
+    try:
+      with self.metrics.request("receive_message").time():
+        response = self.client.receive_message(**params)
+    except Exception:
+      self.metrics.error("receive_message")
+      raise
+    messages = response.get("Messages", [])
+    self.metrics.received.inc(len(messages))
+    if self.heartbeat is not None:
+      for message in messages:
+        self.heartbeat.track(message["ReceiptHandle"])
+
+    if messages:
+      self.non_empty_receives += 1
+      self._consecutive_empty_receives = 0
+    else:
+      self.empty_receives += 1
+      self._consecutive_empty_receives += 1
+    return messages
+
+  def _idle(self):
+    # Nothing else is coming in right now, so don't hold acknowledgements back.
+    self.ack_batcher.flush()
+    self.visibility_batcher.flush()
+
+    if self.idle_backoff is None:
+      return
+
+    delay = self.idle_backoff.delay(self._consecutive_empty_receives)
+    if delay > 0:
+      self._stop_event.wait(delay)
+
+  def _flush_periodically(self):
+    # Receives may block for a whole long poll, so due acknowledgements and
+    # visibility changes are flushed from here rather than from the poll loop.
+    while not self._flusher_stop.wait(self._next_flush_delay()):
+      try:
+        self.ack_batcher.flush_if_due()
+        self.visibility_batcher.flush_if_due()
+      except Exception as e:
+        logger.error(f"Error flushing acknowledgements: {e}")
+
+  def _next_flush_delay(self) -> float:
+    delays = [
+      delay
+      for delay in (self.ack_batcher.due_in(), self.visibility_batcher.due_in())
+      if delay is not None
+    ]
+    # Entries added while waiting are due ack_max_delay later at the earliest.
+    # Without a delay they are flushed as they are added, so just wait for stop.
+    return min(delays, default=self.ack_max_delay or None)
+
+  def _handle_message(self, message: dict) -> bool:
+    try:
+      self.handler.handle(message["Body"])
+    except Exception as e:
+      self._untrack(message)
+      message_logger.error("Error processing message: %s", e)
+      message_logger.error("Failed message: %s", message["Body"])
+      if self.retry_policy is not None:
+        self.retry(message)
+      return False
+    # The heartbeat keeps the message invisible until its delete is sent.
+    self.ack(message)
+    return True
+
+  def _handle_batch(self, messages: list) -> int:
+    # Runs on the executor with nobody waiting for its result, so errors are
+    # logged here rather than raised.
+    acked = set()
+    try:
+      results = self.handler.handle_batch([message["Body"] for message in messages])
+      succeeded = []
+      for message, handled in zip(messages, results):
+        if handled:
+          succeeded.append(message)
+        else:
+          self._untrack(message)
+          message_logger.error("Failed message: %s", message["Body"])
+          if self.retry_policy is not None:
+            self.retry(message)
+      self.ack_many(succeeded)
+      acked = {message["ReceiptHandle"] for message in succeeded}
+      return len(succeeded)
+    except Exception as e:
+      message_logger.exception("Error handling message batch: %s", e)
+      return 0
+    finally:
+      # Acknowledged messages are untracked once their delete has been sent.
+      for message in messages:
+        if message["ReceiptHandle"] not in acked:
+          self._untrack(message)
+
+  def _handle_in_order(self, messages: list):
+    failed_groups = set()
+    for message in messages:
+      group_id = _group_id(message)
+      if group_id in failed_groups:
+        self._skip(message)
+      elif not self._handle_message(message):
+        failed_groups.add(group_id)
+
+  def _handle_group(self, group_id: str):
+    failed = False
+    while True:
+      with self._groups_lock:
+        pending = self._groups[group_id]
+        if not pending:
+          del self._groups[group_id]
+          return
+        message = pending.popleft()
+      try:
+        if failed:
+          self._skip(message)
+        else:
+          failed = not self._handle_message(message)
+      finally:
+        self._release(1)
+
+  def _skip(self, message: dict):
+    # A FIFO group is not delivered while any of its messages is in flight, so
+    # making the skipped messages visible at once is safe: they come back after
+    # the failed message, in order.
+    self._untrack(message)
+    message_logger.warning(
+      "Skipping message %s after a failure in group %s",
+      message.get("MessageId"),
+      _group_id(message),
     )
+    self.visibility_batcher.change(message["ReceiptHandle"], 0)
+    with self._retry_lock:
+      self.skipped_messages += 1
+
+  def _untrack(self, message: dict):
+    if self.heartbeat is not None:
+      self.heartbeat.untrack(message["ReceiptHandle"])
+
+  def _untrack_handles(self, receipt_handles: list):
+    if self.heartbeat is not None:
+      for receipt_handle in receipt_handles:
+        self.heartbeat.untrack(receipt_handle)
+
+  def _max_in_flight(self) -> int:
+    if self.limiter is None:
+      return self.max_in_flight
+    return min(self.max_in_flight, self.limiter.limit)
+
+  def _wait_for_capacity(self) -> int:
+    # The limit of the limiter changes as messages complete, which wakes this
+    # up through _release.
+    with self._in_flight_changed:
+      while True:
+        capacity = self._max_in_flight() - self._in_flight
+        if capacity > 0 or self._stop_event.is_set():
+          return capacity
+        self._in_flight_changed.wait(0.1)
+
+  def _dispatch(self, executor: ThreadPoolExecutor, message: dict):
+    with self._in_flight_changed:
+      self._in_flight += 1
+    future = executor.submit(self._handle_message, message)
+    future.add_done_callback(self._on_message_done)
+
+  def _dispatch_groups(self, executor: ThreadPoolExecutor, messages: list):
+    with self._in_flight_changed:
+      self._in_flight += len(messages)
+    started = []
+    with self._groups_lock:
+      for message in messages:
+        group_id = _group_id(message)
+        pending = self._groups.get(group_id)
+        if pending is None:
+          # No task is handling this group yet.
+          pending = self._groups[group_id] = deque()
+          started.append(group_id)
+        pending.append(message)
+    for group_id in started:
+      executor.submit(self._handle_group, group_id)
+
+  def _dispatch_batch(self, executor: ThreadPoolExecutor, messages: list):
+    with self._in_flight_changed:
+      self._in_flight += len(messages)
+    future = executor.submit(self._handle_batch, messages)
+    future.add_done_callback(lambda _: self._release(len(messages)))
+
+  def _on_message_done(self, future):
+    self._release(1)
+
+  def _release(self, count: int):
+    with self._in_flight_changed:
+      self._in_flight -= count
+      self._in_flight_changed.notify()
 
   def poll_sqs(self):
     """
     Continuously polls an SQS queue for messages and processes them using the provided handler.
 
-    This function runs indefinitely, polling the specified SQS queue for messages.
-    When messages are received, they are processed using the provided MessageHandler
-    and then deleted from the queue upon successful processing.
+    This function runs until stop() is called, polling the specified SQS queue for
+    messages. When messages are received, they are processed using the provided
+    MessageHandler and then deleted from the queue upon successful processing.
+    Empty receives are followed by the configured idle backoff, if any.
+
+    With max_workers > 1 messages are handled on a thread pool, and the next
+    receive starts as soon as fewer than max_in_flight messages are pending.
+    Each message is still deleted only after it has been handled successfully.
+    When the handler has a batch_processor, every received batch is handled as a
+    unit by handler.handle_batch. With a retry_policy, failed messages are made
+    visible again after a backoff delay instead of the full visibility timeout.
+    On FIFO queues, messages of the same group are handled in order and
+    different groups concurrently. When the handler has a limiter, receives
+    and in-flight messages follow its adaptive limit.
 
     Args:
         None
@@ -55,22 +517,64 @@ class SqsConsumer:
     logger.info(
       f"Polling SQS queue: {self.queue_url} for {self.number_of_messages} messages"
     )
-    while True:
-      response = self.client.receive_message(
-        QueueUrl=self.queue_url, MaxNumberOfMessages=self.number_of_messages or 100
+    if self.heartbeat is not None:
+      self.heartbeat.start()
+    self._flusher_stop.clear()
+    flusher = threading.Thread(
+      target=self._flush_periodically, name="sqs-ack-flusher", daemon=True
+    )
+    flusher.start()
+    executor = None
+    if self.max_workers > 1:
+      executor = ThreadPoolExecutor(
+        max_workers=self.max_workers, thread_name_prefix="sqs-consumer"
       )
 
-      messages = response.get("Messages", [])
+    try:
+      while not self._stop_event.is_set():
+        max_messages = self.number_of_messages or 100
+        if executor:
+          max_messages = min(max_messages, self._wait_for_capacity())
+          if self._stop_event.is_set():
+            break
+        elif self.limiter is not None:
+          max_messages = min(max_messages, self.limiter.limit)
 
-      if not messages:
-        continue
+        messages = self._receive(max_messages)
 
-      for message in messages:
-        try:
-          self.handler.handle(message["Body"])
-          self.client.delete_message(
-            QueueUrl=self.queue_url, ReceiptHandle=message["ReceiptHandle"]
-          )
-        except Exception as e:
-          logger.error(f"Error processing message: {e}")
-          logger.error(f"Failed message: {message['Body']}")
+        if not messages:
+          self._idle()
+          continue
+
+        if self._batch_processing:
+          if executor:
+            self._dispatch_batch(executor, messages)
+          else:
+            self._handle_batch(messages)
+          continue
+
+        if self.fifo:
+          if executor:
+            self._dispatch_groups(executor, messages)
+          else:
+            self._handle_in_order(messages)
+          continue
+
+        for message in messages:
+          if executor:
+            self._dispatch(executor, message)
+          else:
+            self._handle_message(message)
+    finally:
+      if executor:
+        executor.shutdown(wait=True)
+      self._flusher_stop.set()
+      flusher.join()
+      self.ack_batcher.flush()
+      self.visibility_batcher.flush()
+      if self.heartbeat is not None:
+        self.heartbeat.stop()
+
+
+def _group_id(message: dict) -> str:
+  return message.get("Attributes", {}).get("MessageGroupId")
@@ -0,0 +1,76 @@
+from core.metrics import Histogram, MetricsRegistry, registry
+
+UNKNOWN_QUEUE = "unknown"
+
+
+class SqsMetrics:
+  """
+  The SQS request metrics of one queue.
+
+  Every metric is labelled with the queue name (the last segment of the queue
+  URL, or "unknown" without one). Requests are timed per API operation in the
+  sqs_request_seconds histogram:
+
+  - sqs_request_seconds{operation, queue}: request latency.
+  - sqs_request_errors_total{operation, queue}: requests that raised.
+  - sqs_messages_received_total, sqs_messages_deleted_total and
+    sqs_messages_sent_total{queue}: messages moved by those requests.
+
+  Attributes:
+      received (Counter): Messages returned by receive_message.
+      deleted (Counter): Messages deleted successfully.
+      sent (Counter): Messages sent successfully.
+  """
+
+  def __init__(self, queue_url: str, metrics: MetricsRegistry = None):
+    """
+    Initialize the SqsMetrics.
+
+    Args:
+        queue_url (str): The URL of the queue. May be None, e.g. when read
+            from an unset environment variable.
+        metrics (MetricsRegistry, optional): Defaults to core.metrics.registry.
+    """
+    self.metrics = metrics or registry
+    self.queue = (queue_url or "").rstrip("/").rsplit("/", 1)[-1] or UNKNOWN_QUEUE
+    self.received = self.metrics.counter(
+      "sqs_messages_received_total", "Messages received from SQS.", queue=self.queue
+    )
+    self.deleted = self.metrics.counter(
+      "sqs_messages_deleted_total", "Messages deleted from SQS.", queue=self.queue
+    )
+    self.sent = self.metrics.counter(
+      "sqs_messages_sent_total", "Messages sent to SQS.", queue=self.queue
+    )
+    self._requests = {}
+    self._errors = {}
+
+  def request(self, operation: str) -> Histogram:
+    """
+    Return the latency histogram of an SQS operation, such as "receive_message".
+    """
+    histogram = self._requests.get(operation)
+    if histogram is None:
+      histogram = self.metrics.histogram(
+        "sqs_request_seconds",
+        "Latency of SQS API requests.",
+        operation=operation,
+        queue=self.queue,
+      )
+      self._requests[operation] = histogram
+    return histogram
+
+  def error(self, operation: str):
+    """
+    Count a failed request of an SQS operation.
+    """
+    counter = self._errors.get(operation)
+    if counter is None:
+      counter = self.metrics.counter(
+        "sqs_request_errors_total",
+        "SQS API requests that raised an error.",
+        operation=operation,
+        queue=self.queue,
+      )
+      self._errors[operation] = counter
+    counter.inc()
@@ -1,37 +1,45 @@
 # message_handler_lib/sources/sqs_producer.py
 import json
-import os
 
-import boto3
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
-from logger import logger
+from core.codec import BodyCodec
+from core.metrics import MetricsRegistry
+from logger import message_logger
+from sources.clients import get_client
+from sources.sqs_metrics import SqsMetrics
 
 
 class SqsProducer:
-  def __init__(self, queue_url: str):
+  def __init__(
+    self,
+    queue_url: str,
+    client=None,
+    metrics: MetricsRegistry = None,
+    codec: BodyCodec = None,
+  ):
     """
     Initialize the SqsProducer with the specified SQS queue URL.
     Args:
       queue_url (str): The URL of the SQS queue to which messages will be sent.
+      client (optional): A boto3 SQS client. If None, the shared client from
+        sources.clients.get_client is used, so creating a producer is cheap.
+      metrics (MetricsRegistry, optional): Registry for the send latency and
+        counters. Defaults to core.metrics.registry.
+      codec (BodyCodec, optional): Compresses large bodies and offloads very
+        large ones to a blob store. Parsers need the same codec to read them.
     """
     self.queue_url = queue_url
-    # self.client = boto3.client("sqs")
-    self.client = boto3.client(
-      "sqs",
-      region_name=os.getenv("LOCAL_STACK_REGION"),
-      endpoint_url=os.getenv("LOCAL_STACK_URL"),
-      aws_access_key_id=os.getenv("LOCAL_STACK_ACCESS_KEY_ID"),
-      aws_secret_access_key=os.getenv("LOCAL_STACK_ACCESS_KEY_ID"),
-      use_ssl=False,
-      verify=False,
-      aws_session_token=None,
-      config=Config(retries=dict(max_attempts=3)),
-    )
+    self.client = client or get_client("sqs")
+    self.metrics = SqsMetrics(queue_url, metrics)
+    self.codec = codec
 
   def send_message(
-    self, message_body: dict, message_group_id: str = None, deduplication_id: str = None
+    self,
+    message_body: dict,
+    message_group_id: str = None,
+    deduplication_id: str = None,
+    raw: bool = False,
   ):
     """
     Send a message to the specified SQS queue.
@@ -39,6 +47,8 @@ class SqsProducer:
       message_body (dict): The message body to send, which will be converted to JSON.
       message_group_id (str, optional): The message group ID for FIFO queues.
       deduplication_id (str, optional): The deduplication ID for FIFO queues.
+      raw (bool): Send a str message_body unchanged instead of converting it to
+        JSON, e.g. to forward a received message body.
     Returns:
       str: The ID of the sent message.
     Raises:
@@ -47,19 +57,56 @@ class SqsProducer:
     try:
       params = {
         "QueueUrl": self.queue_url,
-        "MessageBody": json.dumps(message_body),
+        **message_params(
+          message_body, message_group_id, deduplication_id, self.codec, raw
+        ),
       }
 
-      # For FIFO queues
-      if message_group_id:
-        params["MessageGroupId"] = message_group_id
-      if deduplication_id:
-        params["MessageDeduplicationId"] = deduplication_id
-
-      response = self.client.send_message(**params)
-      logger.info(f"Message sent to SQS: {response['MessageId']}")
+      with self.metrics.request("send_message").time():
+        response = self.client.send_message(**params)
+      self.metrics.sent.inc()
+      message_logger.info("Message sent to SQS: %s", response["MessageId"])
       return response["MessageId"]
 
     except ClientError as e:
-      logger.error(f"Failed to send message to SQS: {e}")
+      self.metrics.error("send_message")
+      message_logger.error("Failed to send message to SQS: %s", e)
       raise
+
+
+def message_params(
+  message_body,
+  message_group_id: str = None,
+  deduplication_id: str = None,
+  codec: BodyCodec = None,
+  raw: bool = False,
+) -> dict:
+  """
+  Build the send_message parameters of a message, without the QueueUrl.
+
+  Args:
+    message_body (dict): The message body, which will be converted to JSON.
+    message_group_id (str, optional): The message group ID for FIFO queues.
+    deduplication_id (str, optional): The deduplication ID for FIFO queues.
+    codec (BodyCodec, optional): Encodes the body and adds its message attributes.
+    raw (bool): Use a str message_body unchanged instead of converting it to JSON.
+
+  Returns:
+    dict: MessageBody, plus MessageAttributes, MessageGroupId and
+      MessageDeduplicationId when they apply.
+  """
+  envelope = message_body if isinstance(message_body, dict) else None
+  if not (raw and isinstance(message_body, str)):
+    message_body = json.dumps(message_body)
+  params = {"MessageBody": message_body}
+  if codec is not None:
+    params["MessageBody"], attributes = codec.encode(message_body, envelope)
+    if attributes:
+      params["MessageAttributes"] = attributes
+
+  # For FIFO queues
+  if message_group_id:
+    params["MessageGroupId"] = message_group_id
+  if deduplication_id:
+    params["MessageDeduplicationId"] = deduplication_id
+  return params
@@ -0,0 +1,91 @@
+import math
+
+from core.backoff import ExponentialBackoff
+from sources.sqs_visibility_batcher import MAX_VISIBILITY_TIMEOUT
+
+
+class SqsRetryPolicy:
+  """
+  Decides when a failed SQS message is delivered again.
+
+  Instead of waiting for the queue's full visibility timeout, SqsConsumer sets
+  the visibility timeout of a failed message to the backoff delay of its
+  attempt, taken from the ApproximateReceiveCount attribute. The message stays
+  in the queue, so the worker moves on at once and no thread sleeps. Once a
+  message has been received max_attempts times it is sent to the
+  dead-letter producer and deleted.
+
+  Example:
+      >>> policy = SqsRetryPolicy(
+      ...   backoff=ExponentialBackoff(initial=1, maximum=300, jitter=0.2),
+      ...   max_attempts=5,
+      ...   dead_letter_producer=SqsProducer("YOUR_DLQ_URL_HERE"),
+      ... )
+      >>> consumer = SqsConsumer(QUEUE_URL, 10, handler, retry_policy=policy)
+  """
+
+  def __init__(
+    self,
+    backoff: ExponentialBackoff = None,
+    max_attempts: int = None,
+    dead_letter_producer=None,
+  ):
+    """
+    Initialize the SqsRetryPolicy.
+
+    Args:
+        backoff (ExponentialBackoff, optional): Redelivery delay by attempt
+            number. Defaults to 1s doubling up to 15 minutes, with jitter.
+            Delays are rounded up to whole seconds and capped at 12 hours.
+        max_attempts (int, optional): Receives after which a failed message is
+            dead-lettered. If None, messages are retried until the queue's own
+            redrive policy moves them.
+        dead_letter_producer (optional): An SqsProducer (or any object with a
+            send_message(message_body, raw=True) method) for the dead-letter queue.
+            Required with max_attempts. If its queue_url ends with ".fifo",
+            send_message is also passed message_group_id and
+            deduplication_id.
+
+    Raises:
+        ValueError: If max_attempts is less than 1, or given without a
+            dead_letter_producer.
+    """
+    if max_attempts is not None:
+      if max_attempts < 1:
+        raise ValueError("max_attempts must be at least 1")
+      if dead_letter_producer is None:
+        raise ValueError("max_attempts requires a dead_letter_producer")
+
+    self.backoff = backoff or ExponentialBackoff(initial=1.0, maximum=900.0, jitter=0.1)
+    self.max_attempts = max_attempts
+    self.dead_letter_producer = dead_letter_producer
+
+  def visibility_timeout(self, receive_count: int) -> int:
+    """
+    Return the visibility timeout that delays the next delivery of a message.
+
+    Args:
+        receive_count (int): How often the message has been received.
+
+    Returns:
+        int: Seconds until the message becomes visible again.
+    """
+    delay = math.ceil(self.backoff.delay(receive_count))
+    return min(delay, MAX_VISIBILITY_TIMEOUT)
+
+  def exhausted(self, receive_count: int) -> bool:
+    """
+    Return whether a failed message has used up its attempts.
+
+    Args:
+        receive_count (int): How often the message has been received.
+    """
+    return self.max_attempts is not None and receive_count >= self.max_attempts
+
+
+def receive_count(message: dict) -> int:
+  """
+  Return the ApproximateReceiveCount of a received SQS message, or 1 when the
+  attribute was not requested.
+  """
+  return int(message.get("Attributes", {}).get("ApproximateReceiveCount", 1))
@@ -0,0 +1,208 @@
+import threading
+import time
+
+from core.metrics import MetricsRegistry
+from logger import logger
+from sources.sqs_ack_batcher import MAX_BATCH_SIZE
+from sources.sqs_metrics import SqsMetrics
+
+# The longest visibility timeout SQS accepts, in seconds (12 hours).
+MAX_VISIBILITY_TIMEOUT = 43_200
+
+
+class SqsVisibilityBatcher:
+  """
+  Collects visibility timeout changes and applies them with
+  change_message_visibility_batch.
+
+  Changes are buffered until either max_batch_size changes are pending or the
+  oldest pending change has waited max_delay seconds. A change that fails is
+  logged and counted, not retried: the message then simply becomes visible
+  again when its current visibility timeout expires.
+
+  Attributes:
+      visibility_changes (int): Visibility timeouts changed successfully.
+      failed_visibility_changes (int): Changes rejected by SQS or lost to errors.
+      visibility_batch_calls (int): Number of change_message_visibility_batch
+          requests issued.
+
+  Example:
+      >>> batcher = SqsVisibilityBatcher(client, queue_url="YOUR_QUEUE_URL_HERE")
+      >>> batcher.change(message["ReceiptHandle"], 30)
+      >>> batcher.flush()
+  """
+
+  def __init__(
+    self,
+    client,
+    queue_url: str,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_delay: float = 1.0,
+    metrics: MetricsRegistry = None,
+  ):
+    """
+    Initialize the SqsVisibilityBatcher.
+
+    Args:
+        client: A boto3 SQS client.
+        queue_url (str): The URL of the queue the receipt handles belong to.
+        max_batch_size (int): Changes per change_message_visibility_batch call
+            (1-10).
+        max_delay (float): Maximum seconds a change may wait before being flushed.
+        metrics (MetricsRegistry, optional): Registry for the request latency and
+            errors. Defaults to core.metrics.registry.
+
+    Raises:
+        ValueError: If max_batch_size is not between 1 and 10.
+    """
+    if not 1 <= max_batch_size <= MAX_BATCH_SIZE:
+      raise ValueError(f"max_batch_size must be between 1 and {MAX_BATCH_SIZE}")
+
+    self.client = client
+    self.queue_url = queue_url
+    self.max_batch_size = max_batch_size
+    self.max_delay = max_delay
+    self.metrics = SqsMetrics(queue_url, metrics)
+
+    self.visibility_changes = 0
+    self.failed_visibility_changes = 0
+    self.visibility_batch_calls = 0
+
+    self._pending = []
+    self._oldest = None
+    self._lock = threading.Lock()
+
+  def change(self, receipt_handle: str, visibility_timeout: int):
+    """
+    Queue a visibility timeout change, flushing if a batch is full or due.
+
+    Args:
+        receipt_handle (str): The ReceiptHandle of a received message.
+        visibility_timeout (int): Seconds from now until the message becomes
+            visible again, between 0 and 43200.
+    """
+    with self._lock:
+      if not self._pending:
+        self._oldest = time.monotonic()
+      self._pending.append((receipt_handle, visibility_timeout))
+      if len(self._pending) < self.max_batch_size and not self._is_due():
+        return
+      batch = self._take(self.max_batch_size)
+
+    self._change_batch(batch)
+
+  def flush_if_due(self):
+    """
+    Flush pending changes if the oldest one has waited longer than max_delay.
+    """
+    with self._lock:
+      if not self._pending or not self._is_due():
+        return
+      batches = self._take_all()
+
+    for batch in batches:
+      self._change_batch(batch)
+
+  def flush(self):
+    """
+    Apply every pending change immediately.
+    """
+    with self._lock:
+      batches = self._take_all()
+
+    for batch in batches:
+      self._change_batch(batch)
+
+  def change_batch(self, changes: list):
+    """
+    Apply visibility timeout changes immediately with
+    change_message_visibility_batch, bypassing the buffer.
+
+    Args:
+        changes (list): (receipt_handle, visibility_timeout) pairs.
+    """
+    for start in range(0, len(changes), self.max_batch_size):
+      self._change_batch(changes[start : start + self.max_batch_size])
+
+  @property
+  def pending(self) -> int:
+    """
+    Number of changes waiting to be applied.
+    """
+    return len(self._pending)
+
+  def stats(self) -> dict:
+    """
+    Return the counters of this batcher.
+
+    Returns:
+        dict: visibility_changes, failed_visibility_changes and
+            visibility_batch_calls.
+    """
+    return {
+      "visibility_changes": self.visibility_changes,
+      "failed_visibility_changes": self.failed_visibility_changes,
+      "visibility_batch_calls": self.visibility_batch_calls,
+    }
+
+  def due_in(self) -> float:
+    """
+    Seconds until the oldest pending change is due to be flushed.
+
+    Returns:
+        float: 0 if it is already due, None if nothing is pending.
+    """
+    with self._lock:
+      if not self._pending:
+        return None
+      return max(0.0, self._oldest + self.max_delay - time.monotonic())
+
+  def _is_due(self) -> bool:
+    return time.monotonic() - self._oldest >= self.max_delay
+
+  def _take(self, size: int) -> list:
+    batch = self._pending[:size]
+    del self._pending[:size]
+    self._oldest = time.monotonic() if self._pending else None
+    return batch
+
+  def _take_all(self) -> list:
+    batches = []
+    while self._pending:
+      batches.append(self._take(self.max_batch_size))
+    return batches
+
+  def _change_batch(self, changes: list):
+    entries = [
+      {
+        "Id": str(index),
+        "ReceiptHandle": receipt_handle,
+        "VisibilityTimeout": visibility_timeout,
+      }
+      for index, (receipt_handle, visibility_timeout) in enumerate(changes)
+    ]
+    try:
+      with self.metrics.request("change_message_visibility_batch").time():
+        response = self.client.change_message_visibility_batch(
+          QueueUrl=self.queue_url, Entries=entries
+        )
+    except Exception as e:
+      self.metrics.error("change_message_visibility_batch")
+      logger.error(f"Error changing message visibility: {e}")
+      with self._lock:
+        self.visibility_batch_calls += 1
+        self.failed_visibility_changes += len(changes)
+      return
+
+    failed = response.get("Failed", [])
+    for entry in failed:
+      receipt_handle = changes[int(entry["Id"])][0]
+      logger.error(
+        f"Failed to change visibility of message {receipt_handle}: "
+        f"{entry.get('Code')} {entry.get('Message', '')}"
+      )
+
+    with self._lock:
+      self.visibility_batch_calls += 1
+      self.visibility_changes += len(response.get("Successful", []))
+      self.failed_visibility_changes += len(failed)
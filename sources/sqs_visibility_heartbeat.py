@@ -0,0 +1,170 @@
+import threading
+import time
+
+from logger import logger, message_logger
+from sources.sqs_visibility_batcher import MAX_VISIBILITY_TIMEOUT, SqsVisibilityBatcher
+
+
+class SqsVisibilityHeartbeat:
+  """
+  Keeps received SQS messages invisible while they are being handled.
+
+  Receipt handles are tracked from the moment a message is received until it
+  has been handled. A background thread wakes every interval seconds and resets
+  the visibility timeout of every handle that has not been extended during the
+  last interval, in batches of up to 10. A slow processor therefore does not
+  cause the message to be redelivered to another consumer, and queues can keep
+  a short visibility timeout, so messages of a crashed consumer reappear soon.
+
+  A handle is no longer extended once it has been tracked for max_extension
+  seconds, so a stuck processor cannot hide a message forever.
+
+  Attributes:
+      extensions (int): Visibility extensions requested.
+      expired (int): Handles dropped after reaching max_extension.
+
+  Example:
+      >>> heartbeat = SqsVisibilityHeartbeat(batcher, visibility_timeout=30)
+      >>> heartbeat.start()
+      >>> heartbeat.track(message["ReceiptHandle"])
+      >>> ...  # handle the message
+      >>> heartbeat.untrack(message["ReceiptHandle"])
+      >>> heartbeat.stop()
+  """
+
+  def __init__(
+    self,
+    batcher: SqsVisibilityBatcher,
+    visibility_timeout: int,
+    interval: float = None,
+    max_extension: float = MAX_VISIBILITY_TIMEOUT,
+  ):
+    """
+    Initialize the SqsVisibilityHeartbeat.
+
+    Args:
+        batcher (SqsVisibilityBatcher): Applies the visibility changes.
+        visibility_timeout (int): Seconds every extension keeps a message
+            invisible. Normally the VisibilityTimeout the messages were
+            received with.
+        interval (float, optional): Seconds between heartbeats. Defaults to a
+            third of visibility_timeout, so a handle is extended while at least
+            a third of its timeout is left.
+        max_extension (float): Seconds after which a tracked handle is no
+            longer extended.
+
+    Raises:
+        ValueError: If visibility_timeout or interval is out of range.
+    """
+    if not 1 <= visibility_timeout <= MAX_VISIBILITY_TIMEOUT:
+      raise ValueError(
+        f"visibility_timeout must be between 1 and {MAX_VISIBILITY_TIMEOUT}"
+      )
+    interval = interval or visibility_timeout / 3
+    if interval >= visibility_timeout:
+      raise ValueError("interval must be shorter than visibility_timeout")
+
+    self.batcher = batcher
+    self.visibility_timeout = visibility_timeout
+    self.interval = interval
+    self.max_extension = max_extension
+    self.extensions = 0
+    self.expired = 0
+
+    # Maps each tracked receipt handle to (tracked_at, extended_at).
+    self._tracked = {}
+    self._lock = threading.Lock()
+    self._stop_event = threading.Event()
+    self._thread = None
+
+  def track(self, receipt_handle: str):
+    """
+    Start extending the visibility of a received message.
+
+    Args:
+        receipt_handle (str): The ReceiptHandle of the message.
+    """
+    now = time.monotonic()
+    with self._lock:
+      self._tracked[receipt_handle] = (now, now)
+
+  def untrack(self, receipt_handle: str):
+    """
+    Stop extending the visibility of a message, once it has been handled.
+
+    Args:
+        receipt_handle (str): The ReceiptHandle of the message.
+    """
+    with self._lock:
+      self._tracked.pop(receipt_handle, None)
+
+  @property
+  def tracked(self) -> int:
+    """
+    Number of receipt handles being kept invisible.
+    """
+    return len(self._tracked)
+
+  def start(self):
+    """
+    Start the heartbeat thread.
+    """
+    self._stop_event.clear()
+    self._thread = threading.Thread(
+      target=self._run, name="sqs-visibility-heartbeat", daemon=True
+    )
+    self._thread.start()
+
+  def stop(self):
+    """
+    Stop the heartbeat thread and forget every tracked handle.
+    """
+    self._stop_event.set()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+    with self._lock:
+      self._tracked.clear()
+
+  def beat(self):
+    """
+    Extend every tracked handle that was not extended during the last interval.
+    """
+    now = time.monotonic()
+    due = []
+    with self._lock:
+      for receipt_handle, (tracked_at, extended_at) in list(self._tracked.items()):
+        if now - tracked_at >= self.max_extension:
+          del self._tracked[receipt_handle]
+          self.expired += 1
+          message_logger.warning(
+            "Stopped extending visibility of message %s after %.0fs",
+            receipt_handle,
+            now - tracked_at,
+          )
+        elif now - extended_at >= self.interval:
+          self._tracked[receipt_handle] = (tracked_at, now)
+          due.append((receipt_handle, self.visibility_timeout))
+      self.extensions += len(due)
+
+    if due:
+      self.batcher.change_batch(due)
+
+  def stats(self) -> dict:
+    """
+    Return the heartbeat counters.
+
+    Returns:
+        dict: visibility_extensions and expired_extensions.
+    """
+    return {
+      "visibility_extensions": self.extensions,
+      "expired_extensions": self.expired,
+    }
+
+  def _run(self):
+    while not self._stop_event.wait(self.interval):
+      try:
+        self.beat()
+      except Exception as e:
+        logger.error(f"Error extending message visibility: {e}")
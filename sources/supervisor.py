@@ -0,0 +1,310 @@
+import multiprocessing
+import os
+import queue
+import select
+import signal
+import threading
+import time
+
+from core.backoff import ExponentialBackoff
+from logger import logger
+
+
+class ConsumerSupervisor:
+  """
+  Runs one consumer per worker process so CPU-bound processors can use every core.
+
+  The consumer_factory is called inside each worker process, so every worker has
+  its own consumer and its own clients (the shared client cache of
+  sources.clients is reset in forked children). Workers that exit unexpectedly
+  are restarted after a backoff delay that grows with consecutive crashes of
+  the same worker slot. Workers periodically report consumer.stats() to the
+  supervisor, which sums them across workers, including workers that have
+  since been restarted.
+
+  stop() (or SIGTERM/SIGINT while run() is active) sends SIGTERM to every
+  worker, which makes the worker call consumer.stop(). The supervisor then waits
+  for the workers to finish the current batch and flush their acknowledgements,
+  and kills workers that do not exit in time.
+
+  Example:
+      >>> def make_consumer():
+      ...   handler = MessageHandler(SQSParser(), message_processor)
+      ...   return SqsConsumer(queue_url=QUEUE_URL, number_of_messages=10, handler=handler)
+      >>> ConsumerSupervisor(make_consumer, workers=4).run()
+  """
+
+  def __init__(
+    self,
+    consumer_factory,
+    workers: int = None,
+    restart_backoff: ExponentialBackoff = None,
+    stable_after: float = 60.0,
+    stats_interval: float = 5.0,
+    shutdown_timeout: float = 30.0,
+    start_method: str = None,
+  ):
+    """
+    Initialize the ConsumerSupervisor.
+
+    Args:
+        consumer_factory: A callable returning a consumer with a poll_sqs() or
+            poll_kafka() method, stop() and stats(). With the "spawn" start
+            method it must be picklable (a module-level function).
+        workers (int, optional): Number of worker processes. Defaults to the
+            number of CPUs.
+        restart_backoff (ExponentialBackoff, optional): Delay before restarting a
+            crashed worker, by number of consecutive crashes. Defaults to 1s
+            doubling up to 60s.
+        stable_after (float): Seconds a worker must run for its crash count to
+            be reset.
+        stats_interval (float): Seconds between stats reports of a worker.
+        shutdown_timeout (float): Seconds stop() waits for workers before
+            killing them.
+        start_method (str, optional): multiprocessing start method. Defaults to
+            the platform default.
+
+    Raises:
+        ValueError: If workers is less than 1.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+      raise ValueError("workers must be at least 1")
+
+    self.consumer_factory = consumer_factory
+    self.workers = workers
+    self.restart_backoff = restart_backoff or ExponentialBackoff(
+      initial=1.0, maximum=60.0
+    )
+    self.stable_after = stable_after
+    self.stats_interval = stats_interval
+    self.shutdown_timeout = shutdown_timeout
+    self.restarts = 0
+
+    self._context = multiprocessing.get_context(start_method)
+    self._stats_queue = self._context.Queue()
+    self._stopping = threading.Event()
+    self._slots = [_Slot(index) for index in range(workers)]
+    self._latest = {}
+    self._retired = {}
+    self._lock = threading.Lock()
+
+  def start(self):
+    """
+    Start every worker process.
+    """
+    for slot in self._slots:
+      self._start_worker(slot)
+
+  def run(self, check_interval: float = 0.5):
+    """
+    Start the workers and supervise them until stop() is called or the process
+    receives SIGTERM or SIGINT.
+
+    Args:
+        check_interval (float): Seconds between checks for exited workers.
+    """
+    restore = self._install_signal_handlers()
+    try:
+      self.start()
+      while not self._stopping.is_set():
+        self._collect_stats(timeout=check_interval)
+        self.check_workers()
+    finally:
+      self._shutdown()
+      restore()
+
+  def check_workers(self):
+    """
+    Restart workers that have exited, once their backoff delay has passed.
+    """
+    now = time.monotonic()
+    for slot in self._slots:
+      if self._stopping.is_set():
+        return
+      if slot.process is not None and slot.process.is_alive():
+        continue
+
+      if slot.process is not None:
+        self._retire(slot)
+        uptime = now - slot.started_at
+        slot.crashes = 1 if uptime >= self.stable_after else slot.crashes + 1
+        slot.restart_at = now + self.restart_backoff.delay(slot.crashes)
+        logger.error(
+          f"Consumer worker {slot.index} (pid {slot.process.pid}) exited with code "
+          f"{slot.process.exitcode}; restarting in "
+          f"{slot.restart_at - now:.1f}s"
+        )
+        slot.process = None
+
+      if now >= slot.restart_at:
+        self.restarts += 1
+        self._start_worker(slot)
+
+  def stop(self):
+    """
+    Ask run() to shut the workers down and return.
+    """
+    self._stopping.set()
+
+  def stats(self) -> dict:
+    """
+    Return the consumer stats summed across all workers, past and present.
+
+    Returns:
+        dict: The summed numeric consumer counters, plus the number of running
+            workers and restarts.
+    """
+    self._collect_stats()
+    with self._lock:
+      totals = dict(self._retired)
+      for stats in self._latest.values():
+        _add(totals, stats)
+    totals["workers"] = sum(
+      1 for slot in self._slots if slot.process is not None and slot.process.is_alive()
+    )
+    totals["restarts"] = self.restarts
+    return totals
+
+  def _start_worker(self, slot):
+    process = self._context.Process(
+      target=_worker_main,
+      args=(
+        self.consumer_factory,
+        self._stats_queue,
+        self.stats_interval,
+      ),
+      name=f"consumer-worker-{slot.index}",
+      daemon=False,
+    )
+    process.start()
+    slot.process = process
+    slot.started_at = time.monotonic()
+    logger.info(f"Started consumer worker {slot.index} (pid {process.pid})")
+
+  def _retire(self, slot):
+    # Let the worker's final report arrive before its counters are retired.
+    self._collect_stats()
+    with self._lock:
+      stats = self._latest.pop(slot.process.pid, None)
+      if stats:
+        _add(self._retired, stats)
+
+  def _collect_stats(self, timeout: float = 0):
+    deadline = time.monotonic() + timeout
+    while True:
+      remaining = deadline - time.monotonic()
+      try:
+        if remaining > 0:
+          pid, stats = self._stats_queue.get(timeout=remaining)
+        else:
+          pid, stats = self._stats_queue.get_nowait()
+      except queue.Empty:
+        return
+      with self._lock:
+        self._latest[pid] = stats
+
+  def _shutdown(self):
+    self._stopping.set()
+    deadline = time.monotonic() + self.shutdown_timeout
+
+    for slot in self._slots:
+      if slot.process is not None and slot.process.is_alive():
+        slot.process.terminate()
+
+    for slot in self._slots:
+      process = slot.process
+      if process is None:
+        continue
+      # Drain reports while waiting: a worker cannot exit before its queue
+      # writes have been consumed.
+      while process.is_alive() and time.monotonic() < deadline:
+        self._collect_stats(timeout=0.1)
+        process.join(0)
+      if process.is_alive():
+        logger.error(
+          f"Consumer worker {slot.index} (pid {process.pid}) did not stop in "
+          f"{self.shutdown_timeout}s; killing it"
+        )
+        process.kill()
+        process.join()
+
+    self._collect_stats()
+    for slot in self._slots:
+      if slot.process is not None:
+        self._retire(slot)
+        slot.process = None
+
+  def _install_signal_handlers(self):
+    if threading.current_thread() is not threading.main_thread():
+      return lambda: None
+
+    def handle_signal(signum, frame):
+      logger.info(f"Received signal {signum}, stopping consumer workers")
+      self.stop()
+
+    previous = {
+      signum: signal.signal(signum, handle_signal)
+      for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+
+    def restore():
+      for signum, handler in previous.items():
+        signal.signal(signum, handler)
+
+    return restore
+
+
+_STOP_CHECK_INTERVAL = 0.05
+
+
+class _Slot:
+  def __init__(self, index: int):
+    self.index = index
+    self.process = None
+    self.started_at = 0.0
+    self.restart_at = 0.0
+    self.crashes = 0
+
+
+def _worker_main(consumer_factory, stats_queue, stats_interval: float):
+  # The supervisor decides when to stop: Ctrl+C in a terminal reaches every
+  # process of the group, so workers ignore SIGINT. SIGTERM is picked up by the
+  # watcher thread from the signal wakeup fd, which the interpreter writes to
+  # from its C-level handler. Python-level handlers run on the main thread only,
+  # and in a process forked from another thread they are sometimes never run.
+  signal.signal(signal.SIGINT, signal.SIG_IGN)
+  signal.signal(signal.SIGTERM, lambda signum, frame: None)
+  wakeup_read, wakeup_write = os.pipe()
+  os.set_blocking(wakeup_write, False)
+  signal.set_wakeup_fd(wakeup_write)
+
+  consumer = consumer_factory()
+  poll = getattr(consumer, "poll_sqs", None) or consumer.poll_kafka
+  pid = os.getpid()
+  done = threading.Event()
+
+  def watch():
+    next_report = time.monotonic() + stats_interval
+    while not done.is_set():
+      readable, _, _ = select.select([wakeup_read], [], [], _STOP_CHECK_INTERVAL)
+      if readable and signal.SIGTERM in os.read(wakeup_read, 64):
+        consumer.stop()
+        return
+      if time.monotonic() >= next_report:
+        stats_queue.put((pid, consumer.stats()))
+        next_report += stats_interval
+
+  watcher = threading.Thread(target=watch, name="consumer-worker-watch", daemon=True)
+  watcher.start()
+  try:
+    poll()
+  finally:
+    done.set()
+    stats_queue.put((pid, consumer.stats()))
+
+
+def _add(totals: dict, stats: dict):
+  for key, value in stats.items():
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+      totals[key] = totals.get(key, 0) + value
@@ -0,0 +1,11 @@
+import pytest
+
+from sources.clients import clear_clients
+
+
+@pytest.fixture(autouse=True)
+def shared_clients():
+  # Sources share cached boto3 clients; keep mocked clients from leaking across tests.
+  clear_clients()
+  yield
+  clear_clients()
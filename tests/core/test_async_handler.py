@@ -0,0 +1,54 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from core.async_handler import AsyncMessageHandler
+from models.message import Message
+
+PARSED_MESSAGE = Message(
+  id="123", source="sqs", payload={"test": "data"}, timestamp="2025-06-01T10:00:00"
+)
+
+
+@pytest.fixture
+def mock_parser():
+  parser = Mock()
+  parser.parse.return_value = PARSED_MESSAGE
+  return parser
+
+
+def test_handle_awaits_async_processor(mock_parser):
+  # Arrange
+  processor = AsyncMock()
+  handler = AsyncMessageHandler(parser=mock_parser, processor=processor)
+
+  # Act
+  result = asyncio.run(handler.handle('{"id": "123"}'))
+
+  # Assert
+  assert result == PARSED_MESSAGE
+  mock_parser.parse.assert_called_once_with('{"id": "123"}')
+  processor.assert_awaited_once_with(PARSED_MESSAGE)
+
+
+def test_handle_accepts_sync_processor(mock_parser):
+  # Arrange
+  processor = Mock()
+  handler = AsyncMessageHandler(parser=mock_parser, processor=processor)
+
+  # Act
+  asyncio.run(handler.handle('{"id": "123"}'))
+
+  # Assert
+  processor.assert_called_once_with(PARSED_MESSAGE)
+
+
+def test_handle_processor_error(mock_parser):
+  # Arrange
+  processor = AsyncMock(side_effect=Exception("Processing failed"))
+  handler = AsyncMessageHandler(parser=mock_parser, processor=processor)
+
+  # Act & Assert
+  with pytest.raises(Exception, match="Processing failed"):
+    asyncio.run(handler.handle('{"id": "123"}'))
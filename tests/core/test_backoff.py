@@ -0,0 +1,47 @@
+import pytest
+
+from core.backoff import ExponentialBackoff
+
+
+def test_delay_grows_exponentially():
+  # Arrange
+  backoff = ExponentialBackoff(initial=0.1, maximum=10.0, multiplier=2.0)
+
+  # Act
+  delays = [backoff.delay(attempt) for attempt in range(1, 5)]
+
+  # Assert
+  assert delays == pytest.approx([0.1, 0.2, 0.4, 0.8])
+
+
+def test_delay_is_capped_at_maximum():
+  # Arrange
+  backoff = ExponentialBackoff(initial=1.0, maximum=5.0)
+
+  # Act & Assert
+  assert backoff.delay(10) == 5.0
+  assert backoff.delay(10_000) == 5.0
+
+
+def test_delay_with_jitter_stays_within_bounds():
+  # Arrange
+  backoff = ExponentialBackoff(initial=1.0, maximum=1.0, jitter=0.5)
+
+  # Act
+  delays = [backoff.delay(1) for _ in range(100)]
+
+  # Assert
+  assert all(0.5 <= delay <= 1.0 for delay in delays)
+
+
+def test_delay_before_first_attempt_is_zero():
+  assert ExponentialBackoff().delay(0) == 0.0
+
+
+@pytest.mark.parametrize(
+  "kwargs",
+  [{"initial": -1}, {"initial": 2, "maximum": 1}, {"multiplier": 0.5}, {"jitter": 2}],
+)
+def test_invalid_arguments_raise(kwargs):
+  with pytest.raises(ValueError):
+    ExponentialBackoff(**kwargs)
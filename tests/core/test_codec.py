@@ -0,0 +1,102 @@
+import base64
+import json
+import os
+
+import pytest
+
+from core.blob_store import FileBlobStore
+from core.codec import BodyCodec
+
+
+def make_body(size: int) -> str:
+  return json.dumps({"id": "1", "payload": {"data": "x" * size}, "timestamp": "t"})
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_encode_compresses_large_bodies(compression):
+  # Arrange
+  codec = BodyCodec(compression=compression, compress_above=1024)
+  body = make_body(10_000)
+
+  # Act
+  encoded, attributes = codec.encode(body)
+
+  # Assert
+  assert len(encoded) < len(body) // 10
+  assert attributes == {
+    "BodyEncoding": {"DataType": "String", "StringValue": compression}
+  }
+  assert codec.decode(encoded) == body
+
+
+def test_encode_leaves_small_and_incompressible_bodies_unchanged():
+  # Arrange
+  codec = BodyCodec(compress_above=1024)
+  incompressible = json.dumps({"data": base64.b64encode(os.urandom(3000)).decode()})
+
+  # Act & Assert
+  assert codec.encode(make_body(10)) == (make_body(10), {})
+  assert codec.encode(incompressible) == (incompressible, {})
+  assert codec.decode(make_body(10)) == make_body(10)
+
+
+def test_encode_offloads_very_large_bodies(tmp_path):
+  # Arrange
+  store = FileBlobStore(str(tmp_path))
+  codec = BodyCodec(compression=None, blob_store=store, offload_above=1000)
+  body = make_body(5000)
+
+  # Act
+  encoded, attributes = codec.encode(body, envelope=json.loads(body))
+
+  # Assert
+  claim_check = json.loads(encoded)
+  assert claim_check == {
+    "$codec": "identity",
+    "blob": attributes["ClaimCheck"]["StringValue"],
+    "id": "1",
+    "timestamp": "t",
+  }
+  assert store.get(claim_check["blob"]) == body.encode()
+  assert codec.decode(encoded) == body
+
+
+def test_offload_threshold_counts_the_encoded_message(tmp_path):
+  # Arrange
+  store = FileBlobStore(str(tmp_path))
+  body = make_body(0).replace('""', json.dumps(os.urandom(3000).hex()))
+  inline, attributes = BodyCodec(compress_above=0).encode(body)
+  wrapper = json.loads(inline)
+  inline_size = len(inline) + sum(
+    len(name) + len(attribute["DataType"]) + len(attribute["StringValue"])
+    for name, attribute in attributes.items()
+  )
+  assert len(base64.b64decode(wrapper["data"])) < inline_size
+
+  # Act
+  below = BodyCodec(compress_above=0, blob_store=store, offload_above=inline_size + 1)
+  at = BodyCodec(compress_above=0, blob_store=store, offload_above=inline_size)
+
+  # Assert
+  assert below.encode(body) == (inline, attributes)
+  encoded, attributes = at.encode(body)
+  assert "ClaimCheck" in attributes
+  assert at.decode(encoded) == body
+
+
+def test_decode_reports_missing_blobs(tmp_path):
+  # Arrange
+  store = FileBlobStore(str(tmp_path))
+  codec = BodyCodec(compression=None, blob_store=store, offload_above=1000)
+  encoded, attributes = codec.encode(make_body(100_000))
+  store.delete(attributes["ClaimCheck"]["StringValue"])
+
+  # Act & Assert
+  with pytest.raises(ValueError, match="not found"):
+    codec.decode(encoded)
+
+
+def test_rejects_unknown_compression():
+  # Act & Assert
+  with pytest.raises(ValueError):
+    BodyCodec(compression="brotli")
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+import pytest
+
+from core.dedup import Deduplicator, InMemoryDedupStore
+from models.message import Message
+
+
+def make_message(id: str, order_id: str = None) -> Message:
+  return Message(
+    id=id, source="sqs", payload={"order_id": order_id}, timestamp="2025-06-01T10:00:00"
+  )
+
+
+def test_store_contains_added_keys():
+  # Arrange
+  store = InMemoryDedupStore()
+
+  # Act
+  store.add("a")
+
+  # Assert
+  assert store.contains("a")
+  assert not store.contains("b")
+
+
+def test_store_evicts_least_recently_used_keys():
+  # Arrange
+  store = InMemoryDedupStore(max_size=2)
+  store.add("a")
+  store.add("b")
+  store.contains("a")
+
+  # Act
+  store.add("c")
+
+  # Assert
+  assert store.contains("a")
+  assert not store.contains("b")
+  assert store.contains("c")
+  assert len(store) == 2
+
+
+def test_store_expires_keys_after_ttl():
+  # Arrange
+  store = InMemoryDedupStore(ttl=10)
+  with patch("core.dedup.time.monotonic", return_value=100.0):
+    store.add("a")
+
+  # Act & Assert
+  with patch("core.dedup.time.monotonic", return_value=109.0):
+    assert store.contains("a")
+  with patch("core.dedup.time.monotonic", return_value=111.0):
+    assert not store.contains("a")
+  assert len(store) == 0
+
+
+@pytest.mark.parametrize("kwargs", [{"max_size": 0}, {"ttl": 0}])
+def test_store_rejects_invalid_limits(kwargs):
+  # Act & Assert
+  with pytest.raises(ValueError):
+    InMemoryDedupStore(**kwargs)
+
+
+def test_deduplicator_uses_key_fn():
+  # Arrange
+  deduplicator = Deduplicator(key_fn=lambda message: message.payload["order_id"])
+  deduplicator.mark(make_message("1", order_id="order-1"))
+
+  # Act
+  duplicate = deduplicator.seen(make_message("2", order_id="order-1"))
+  new = deduplicator.seen(make_message("3", order_id="order-2"))
+
+  # Assert
+  assert duplicate
+  assert not new
+  assert deduplicator.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_deduplicator_stats_before_checks():
+  # Act
+  stats = Deduplicator().stats()
+
+  # Assert
+  assert stats == {"hits": 0, "misses": 0, "hit_rate": None}
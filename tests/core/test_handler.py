@@ -2,13 +2,22 @@ from datetime import datetime
 from unittest.mock import Mock
 
 import pytest
+from pydantic import BaseModel
 
+from core.dedup import Deduplicator
 from core.handler import MessageHandler
+from core.limits import AimdLimiter, TokenBucket
+from core.schemas import SchemaRegistry
 from models.message import Message
 
 MOCKED_DATETIME = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
 
 
+class Order(BaseModel):
+  type: str
+  amount: float
+
+
 @pytest.fixture
 def mock_parser():
   parser = Mock()
@@ -71,3 +80,194 @@ def test_handle_processor_error(mock_handler, mock_parser, mock_processor):
   assert str(exc_info.value) == "Processing failed"
   mock_parser.parse.assert_called_once_with(raw_message)
   mock_processor.assert_called_once_with(parsed_message)
+
+
+def test_handle_batch_passes_parsed_messages_to_batch_processor(mock_parser):
+  # Arrange
+  messages = [
+    Message(id=str(index), source="sqs", payload={}, timestamp=MOCKED_DATETIME)
+    for index in range(3)
+  ]
+  mock_parser.parse.side_effect = [messages[0], ValueError("bad json"), *messages[1:]]
+  batch_processor = Mock(return_value=[True, False, 1])
+  handler = MessageHandler(mock_parser, None, batch_processor=batch_processor)
+
+  # Act
+  results = handler.handle_batch(["a", "b", "c", "d"])
+
+  # Assert
+  batch_processor.assert_called_once_with(messages)
+  assert results == [True, False, False, True]
+
+
+@pytest.mark.parametrize(
+  "batch_processor",
+  [Mock(side_effect=Exception("database down")), Mock(return_value=[True])],
+)
+def test_handle_batch_fails_the_whole_batch_on_processor_errors(
+  mock_parser, batch_processor
+):
+  # Arrange
+  mock_parser.parse.return_value = Message(
+    id="1", source="sqs", payload={}, timestamp=MOCKED_DATETIME
+  )
+  handler = MessageHandler(mock_parser, None, batch_processor=batch_processor)
+
+  # Act
+  results = handler.handle_batch(["a", "b"])
+
+  # Assert
+  assert results == [False, False]
+
+
+def test_handle_batch_without_batch_processor_handles_each_message(
+  mock_handler, mock_processor
+):
+  # Arrange
+  mock_processor.side_effect = [None, Exception("Processing error")]
+
+  # Act
+  results = mock_handler.handle_batch(["a", "b"])
+
+  # Assert
+  assert results == [True, False]
+  assert mock_processor.call_count == 2
+
+
+def test_handle_skips_duplicates_of_processed_messages(mock_parser, mock_processor):
+  # Arrange
+  message = Message(id="123", source="sqs", payload={}, timestamp=MOCKED_DATETIME)
+  mock_parser.parse.return_value = message
+  deduplicator = Deduplicator()
+  handler = MessageHandler(mock_parser, mock_processor, dedup=deduplicator)
+
+  # Act
+  handler.handle("a")
+  handler.handle("a")
+
+  # Assert
+  mock_processor.assert_called_once_with(message)
+  assert deduplicator.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_handle_does_not_mark_failed_messages(mock_parser, mock_processor):
+  # Arrange
+  mock_parser.parse.return_value = Message(
+    id="123", source="sqs", payload={}, timestamp=MOCKED_DATETIME
+  )
+  mock_processor.side_effect = [Exception("Processing error"), None]
+  handler = MessageHandler(mock_parser, mock_processor, dedup=Deduplicator())
+
+  # Act
+  with pytest.raises(Exception):
+    handler.handle("a")
+  handler.handle("a")
+
+  # Assert
+  assert mock_processor.call_count == 2
+
+
+def test_handle_batch_reports_duplicates_as_handled(mock_parser):
+  # Arrange
+  messages = [
+    Message(id=str(index), source="sqs", payload={}, timestamp=MOCKED_DATETIME)
+    for index in range(3)
+  ]
+  mock_parser.parse.side_effect = [*messages, *messages]
+  batch_processor = Mock(side_effect=[[True, False, True], [True]])
+  handler = MessageHandler(
+    mock_parser, None, batch_processor=batch_processor, dedup=Deduplicator()
+  )
+
+  # Act
+  handler.handle_batch(["a", "b", "c"])
+  results = handler.handle_batch(["a", "b", "c"])
+
+  # Assert
+  batch_processor.assert_called_with([messages[1]])
+  assert results == [True, True, True]
+
+
+def test_handle_passes_validated_payloads_to_the_processor(mock_parser, mock_processor):
+  # Arrange
+  schemas = SchemaRegistry()
+  schemas.register("order", Order)
+  message = Message(
+    id="1",
+    source="sqs",
+    payload={"type": "order", "amount": "2"},
+    timestamp=MOCKED_DATETIME,
+  )
+  mock_parser.parse.return_value = message
+  handler = MessageHandler(mock_parser, mock_processor, schemas=schemas)
+
+  # Act
+  handler.handle("a")
+
+  # Assert
+  mock_processor.assert_called_once_with(message, Order(type="order", amount=2))
+
+
+def test_handle_batch_fails_messages_with_invalid_payloads(mock_parser):
+  # Arrange
+  schemas = SchemaRegistry()
+  schemas.register("order", Order)
+  messages = [
+    Message(id="1", source="sqs", payload=payload, timestamp=MOCKED_DATETIME)
+    for payload in (
+      {"type": "order", "amount": 1},
+      {"type": "order"},
+      {"type": ["order"]},
+    )
+  ]
+  mock_parser.parse.side_effect = messages
+  batch_processor = Mock(return_value=None)
+  handler = MessageHandler(
+    mock_parser, None, batch_processor=batch_processor, schemas=schemas
+  )
+
+  # Act
+  results = handler.handle_batch(["a", "b", "c"])
+
+  # Assert
+  batch_processor.assert_called_once_with(
+    [messages[0]], [Order(type="order", amount=1)]
+  )
+  assert results == [True, False, False]
+
+
+def test_handle_reports_processor_outcomes_to_the_limiter(mock_parser, mock_processor):
+  # Arrange
+  limiter = Mock(spec=AimdLimiter)
+  mock_parser.parse.return_value = Message(
+    id="1", source="sqs", payload={}, timestamp=MOCKED_DATETIME
+  )
+  mock_processor.side_effect = [None, RuntimeError("downstream unavailable")]
+  handler = MessageHandler(mock_parser, mock_processor, limiter=limiter)
+
+  # Act
+  handler.handle("a")
+  with pytest.raises(RuntimeError):
+    handler.handle("b")
+
+  # Assert
+  assert limiter.acquire.call_count == 2
+  assert [args.args[1] for args in limiter.release.call_args_list] == [True, False]
+
+
+def test_handle_batch_takes_one_token_per_message(mock_parser):
+  # Arrange
+  rate_limit = Mock(spec=TokenBucket)
+  mock_parser.parse.side_effect = [
+    Message(id=str(index), source="sqs", payload={}, timestamp=MOCKED_DATETIME)
+    for index in range(3)
+  ]
+  handler = MessageHandler(
+    mock_parser, None, batch_processor=Mock(return_value=None), rate_limit=rate_limit
+  )
+
+  # Act
+  handler.handle_batch(["a", "b", "c"])
+
+  # Assert
+  rate_limit.acquire.assert_called_once_with(3)
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from core.json_scan import decode_value, iter_members, split_object
+
+
+def test_split_object_leaves_the_lazy_member_undecoded():
+  # Arrange
+  text = '{"id": "1", "payload": {"a": [1, "}"]}, "n": -1.5e3, "timestamp": "t"}'
+
+  # Act
+  members, start = split_object(text, "payload")
+
+  # Assert
+  assert members == {"id": "1", "n": -1500.0, "timestamp": "t"}
+  assert decode_value(text, start) == ({"a": [1, "}"]}, text.index(', "n"'))
+
+
+def test_split_object_stops_at_nested_members_after_the_lazy_member():
+  # Arrange
+  text = '{"id": "1", "payload": {}, "timestamp": "t", "meta": {"a": 1}}'
+
+  # Act
+  members, start = split_object(text, "payload")
+
+  # Assert
+  assert members == {"id": "1"}
+  assert decode_value(text, start)[0] == {}
+
+
+def test_split_object_without_the_lazy_member_decodes_everything():
+  # Act
+  members, start = split_object('{"id": "1", "meta": {"a": [1]}}', "payload")
+
+  # Assert
+  assert members == {"id": "1", "meta": {"a": [1]}}
+  assert start is None
+
+
+@pytest.mark.parametrize("text", ["[1]", '{"id": "1"} x', '{"id" "1"}', '{"id": "1",'])
+def test_split_object_rejects_malformed_objects(text):
+  with pytest.raises(json.JSONDecodeError):
+    split_object(text, "payload")
+
+
+def test_iter_members_decodes_lazily():
+  # Arrange
+  members = iter_members('{"a": 1, "b\\n": [2], "c": }')
+
+  # Act & Assert
+  assert next(members) == ("a", 1)
+  assert next(members) == ("b\n", [2])
+  with pytest.raises(json.JSONDecodeError):
+    next(members)
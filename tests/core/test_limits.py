@@ -0,0 +1,120 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from core.limits import AimdLimiter, TokenBucket
+
+
+def test_limiter_grows_by_increase_per_round_of_successes():
+  # Arrange
+  limiter = AimdLimiter(initial=4, maximum=10)
+
+  # Act
+  for _ in range(4):
+    limiter.acquire()
+    limiter.release(0.01, succeeded=True)
+
+  # Assert
+  assert limiter.limit == 4
+  assert 4.9 < limiter._limit < 5
+
+
+def test_limiter_stops_at_maximum():
+  # Arrange
+  limiter = AimdLimiter(initial=2, maximum=3)
+
+  # Act
+  for _ in range(100):
+    limiter.acquire()
+    limiter.release(0.01, succeeded=True)
+
+  # Assert
+  assert limiter.limit == 3
+
+
+def test_limiter_backs_off_once_per_round_of_failures():
+  # Arrange
+  limiter = AimdLimiter(initial=8, maximum=8)
+  for _ in range(8):
+    limiter.acquire()
+
+  # Act
+  for _ in range(8):
+    limiter.release(0.01, succeeded=False)
+
+  # Assert
+  assert limiter.limit == 4
+  assert limiter.stats()["limit_decreases"] == 1
+
+
+def test_limiter_treats_slow_calls_as_overload():
+  # Arrange
+  limiter = AimdLimiter(initial=2, minimum=1, latency_threshold=0.5)
+  limiter.acquire()
+  limiter.acquire()
+
+  # Act
+  limiter.release(0.1, succeeded=True)
+  limiter.release(2.0, succeeded=True)
+
+  # Assert
+  assert limiter.limit == 1
+
+
+def test_limiter_acquire_waits_for_a_free_slot():
+  # Arrange
+  limiter = AimdLimiter(initial=1, maximum=1)
+  limiter.acquire()
+
+  # Act
+  timed_out = limiter.acquire(timeout=0.01)
+  threading.Timer(0.01, limiter.release, args=(0.01, True)).start()
+  acquired = limiter.acquire(timeout=5)
+
+  # Assert
+  assert timed_out is False
+  assert acquired is True
+  assert limiter.in_flight == 1
+
+
+def test_limiter_rejects_invalid_bounds():
+  # Act & Assert
+  with pytest.raises(ValueError):
+    AimdLimiter(initial=10, maximum=5)
+
+
+def test_token_bucket_allows_bursts_then_waits_for_refills():
+  # Arrange
+  with (
+    patch("core.limits.time.monotonic", return_value=100.0),
+    patch("core.limits.time.sleep") as sleep,
+  ):
+    bucket = TokenBucket(rate=10, burst=2)
+
+    # Act
+    waits = [bucket.acquire(), bucket.acquire(), bucket.acquire(), bucket.acquire(5)]
+
+  # Assert
+  assert waits == [0, 0, pytest.approx(0.1), pytest.approx(0.6)]
+  assert sleep.call_count == 2
+  assert bucket.stats()["throttled"] == 2
+
+
+def test_token_bucket_refills_over_time():
+  # Arrange
+  now = [100.0]
+  with (
+    patch("core.limits.time.monotonic", side_effect=lambda: now[0]),
+    patch("core.limits.time.sleep") as sleep,
+  ):
+    bucket = TokenBucket(rate=10, burst=2)
+
+    # Act
+    bucket.acquire(2)
+    now[0] += 0.2
+    wait = bucket.acquire(2)
+
+  # Assert
+  assert wait == 0
+  sleep.assert_not_called()
@@ -0,0 +1,81 @@
+from unittest.mock import Mock
+
+import pytest
+
+from core.handler import MessageHandler
+from core.metrics import Histogram, MetricsRegistry
+from parsers.sqs_parser import SQSParser
+
+
+@pytest.fixture
+def metrics():
+  return MetricsRegistry()
+
+
+def test_registry_returns_one_metric_per_name_and_labels(metrics):
+  # Act
+  first = metrics.counter("jobs_total", source="sqs")
+  second = metrics.counter("jobs_total", source="sqs")
+  other = metrics.counter("jobs_total", source="kafka")
+
+  # Assert
+  assert first is second
+  assert first is not other
+  with pytest.raises(TypeError):
+    metrics.histogram("jobs_total", source="sqs")
+
+
+def test_histogram_estimates_quantiles_from_buckets():
+  # Arrange
+  histogram = Histogram("latency_seconds", buckets=(0.1, 0.2, 0.4))
+
+  # Act
+  for value in [0.05] * 50 + [0.15] * 49 + [1.0]:
+    histogram.observe(value)
+
+  # Assert
+  assert histogram.count == 100
+  assert histogram.cumulative_counts() == [50, 99, 99, 100]
+  assert histogram.quantile(0.5) == pytest.approx(0.1)
+  assert histogram.quantile(0.99) == pytest.approx(0.2)
+  assert histogram.quantile(1.0) == 0.4
+
+
+def test_prometheus_exposition(metrics):
+  # Arrange
+  metrics.counter("jobs_total", "Jobs done.", queue='a"b').inc(3)
+  metrics.histogram("job_seconds", buckets=(0.5, 1.0)).observe(0.75)
+
+  # Act
+  text = metrics.prometheus()
+
+  # Assert
+  assert text.splitlines() == [
+    "# TYPE job_seconds histogram",
+    'job_seconds_bucket{le="0.5"} 0',
+    'job_seconds_bucket{le="1.0"} 1',
+    'job_seconds_bucket{le="+Inf"} 1',
+    "job_seconds_sum 0.75",
+    "job_seconds_count 1",
+    "# HELP jobs_total Jobs done.",
+    "# TYPE jobs_total counter",
+    'jobs_total{queue="a\\"b"} 3',
+  ]
+
+
+def test_handler_records_stage_latency_and_outcomes(metrics):
+  # Arrange
+  processor = Mock(side_effect=[None, Exception("boom")])
+  handler = MessageHandler(SQSParser(), processor, metrics=metrics)
+
+  # Act
+  handler.handle('{"id": "1", "payload": {}}')
+  with pytest.raises(Exception):
+    handler.handle('{"id": "2", "payload": {}}')
+
+  # Assert
+  snapshot = metrics.snapshot()
+  assert snapshot['message_handler_processed_total{source="sqs"}'] == 1
+  assert snapshot['message_handler_failed_total{source="sqs"}'] == 1
+  assert snapshot['message_handler_parse_seconds{source="sqs"}']["count"] == 2
+  assert snapshot['message_handler_process_seconds{source="sqs"}']["count"] == 1
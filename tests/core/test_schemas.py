@@ -0,0 +1,110 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from core.schemas import SchemaRegistry
+from models.message import Message
+
+
+class Order(BaseModel):
+  type: str
+  order_id: str
+  amount: float
+
+
+class Refund(BaseModel):
+  type: str
+  order_id: str
+
+
+def make_message(payload: dict) -> Message:
+  return Message(id="1", source="sqs", payload=payload, timestamp="2025-06-01T10:00:00")
+
+
+@pytest.fixture
+def schemas():
+  schemas = SchemaRegistry()
+  schemas.register("order", Order)
+  schemas.register("refund")(Refund)
+  return schemas
+
+
+def test_validate_uses_the_model_of_the_message_type(schemas):
+  # Act
+  payload = schemas.validate(
+    make_message({"type": "order", "order_id": "1", "amount": "9.5"})
+  )
+
+  # Assert
+  assert payload == Order(type="order", order_id="1", amount=9.5)
+
+
+@pytest.mark.parametrize(
+  "payload",
+  [
+    {"type": "order", "order_id": "1"},
+    {"type": "unknown"},
+    {"order_id": "1"},
+    {"type": ["order"]},
+  ],
+)
+def test_validate_rejects_invalid_payloads(schemas, payload):
+  # Act & Assert
+  with pytest.raises(ValueError):
+    schemas.validate(make_message(payload))
+
+
+def test_validate_falls_back_to_the_default_model():
+  # Arrange
+  schemas = SchemaRegistry(discriminator="kind", default=Refund)
+
+  # Act
+  payload = schemas.validate(make_message({"type": "other", "order_id": "1"}))
+
+  # Assert
+  assert payload == Refund(type="other", order_id="1")
+
+
+def test_register_rejects_duplicate_types(schemas):
+  # Act & Assert
+  with pytest.raises(ValueError):
+    schemas.register("order", Refund)
+
+
+def test_validate_batch_returns_payloads_in_order(schemas):
+  # Arrange
+  messages = [
+    make_message({"type": "order", "order_id": "1", "amount": 1}),
+    make_message({"type": "refund", "order_id": "2"}),
+    make_message({"type": "order", "order_id": "3", "amount": 3}),
+  ]
+
+  # Act
+  payloads = schemas.validate_batch(messages)
+
+  # Assert
+  assert payloads == [
+    Order(type="order", order_id="1", amount=1),
+    Refund(type="refund", order_id="2"),
+    Order(type="order", order_id="3", amount=3),
+  ]
+
+
+def test_validate_batch_reports_invalid_payloads(schemas):
+  # Arrange
+  messages = [
+    make_message({"type": "order", "order_id": "1", "amount": 1}),
+    make_message({"type": "order", "order_id": "2"}),
+    make_message({"type": "unknown"}),
+    make_message({"type": ["order"]}),
+  ]
+
+  # Act
+  payloads = schemas.validate_batch(messages, return_exceptions=True)
+
+  # Assert
+  assert payloads[0] == Order(type="order", order_id="1", amount=1)
+  assert isinstance(payloads[1], ValidationError)
+  assert isinstance(payloads[2], ValueError)
+  assert isinstance(payloads[3], ValueError)
+  with pytest.raises(ValueError):
+    schemas.validate_batch(messages)
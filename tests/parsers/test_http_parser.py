@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from models.message import Message
+from parsers.http_parser import HttpParser
+
+
+@pytest.fixture
+def parser():
+  return HttpParser()
+
+
+def test_parse_decoded_envelope(parser):
+  # Arrange
+  envelope = {"id": "1", "payload": {"key": "value"}, "timestamp": "2025-06-01"}
+
+  # Act
+  result = parser.parse(envelope)
+
+  # Assert
+  assert result == Message(
+    id="1", source="http", payload={"key": "value"}, timestamp="2025-06-01"
+  )
+
+
+def test_parse_raw_message(parser):
+  # Arrange
+  raw_message = json.dumps({"id": "1", "payload": {"key": "value"}})
+
+  # Act
+  result = parser.parse(raw_message)
+
+  # Assert
+  assert result.source == "http"
+  assert result.payload == {"key": "value"}
+
+
+def test_parse_decoded_envelope_with_invalid_payload(parser):
+  # Act & Assert
+  with pytest.raises(ValueError):
+    parser.parse({"id": "1", "payload": [1, 2]})
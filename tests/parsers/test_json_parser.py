@@ -0,0 +1,195 @@
+import json
+
+import pytest
+
+from core.blob_store import FileBlobStore
+from core.codec import BodyCodec
+from models.lazy_message import LazyMessage
+from models.message import Message
+from parsers.kafka_parser import KafkaParser
+from parsers.sqs_parser import SQSParser
+
+VALID_MESSAGE = {
+  "id": "test-id-123",
+  "payload": {"key": "value"},
+  "timestamp": "2025-06-01T10:00:00",
+}
+
+
+@pytest.mark.parametrize("parser_class", [SQSParser, KafkaParser])
+def test_fast_parse_matches_validated_parse(parser_class):
+  # Arrange
+  raw_message = json.dumps(VALID_MESSAGE)
+
+  # Act
+  fast = parser_class(fast=True).parse(raw_message)
+  validated = parser_class().parse(raw_message)
+
+  # Assert
+  assert isinstance(fast, Message)
+  assert fast == validated
+  assert fast.model_dump() == validated.model_dump()
+  assert fast.source == parser_class.source
+
+
+def test_fast_parse_fills_missing_fields():
+  # Act
+  result = SQSParser(fast=True).parse("{}")
+
+  # Assert
+  assert result.id
+  assert result.payload == {}
+  assert result.timestamp
+
+
+def test_fast_parse_validates_unexpected_types():
+  # Arrange
+  raw_message = json.dumps({"id": 123, "payload": {}})
+
+  # Act & Assert
+  with pytest.raises(ValueError) as exc_info:
+    SQSParser(fast=True).parse(raw_message)
+
+  assert "Error parsing message" in str(exc_info.value)
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_parse_rejects_non_object_json(fast):
+  with pytest.raises(ValueError) as exc_info:
+    KafkaParser(fast=fast).parse("[1, 2, 3]")
+
+  assert "Error parsing message" in str(exc_info.value)
+
+
+def test_fast_parse_invalid_json():
+  with pytest.raises(ValueError) as exc_info:
+    SQSParser(fast=True).parse("invalid json")
+
+  assert "Invalid JSON format" in str(exc_info.value)
+
+
+def test_existing_field_defaults_are_not_computed(monkeypatch):
+  # Arrange
+  monkeypatch.setattr(
+    "parsers.json_parser.uuid", lambda: pytest.fail("uuid4 should not be called")
+  )
+
+  # Act
+  result = SQSParser().parse(json.dumps(VALID_MESSAGE))
+
+  # Assert
+  assert result.id == "test-id-123"
+
+
+@pytest.mark.parametrize("parser_class", [SQSParser, KafkaParser])
+def test_lazy_parse_defers_payload_decoding(parser_class):
+  # Arrange
+  raw_message = json.dumps(VALID_MESSAGE)
+
+  # Act
+  result = parser_class(lazy=True).parse(raw_message)
+
+  # Assert
+  assert isinstance(result, LazyMessage)
+  assert result.id == "test-id-123"
+  assert result.timestamp == "2025-06-01T10:00:00"
+  assert result.source == parser_class.source
+  assert not result.payload_decoded
+  assert result.payload == {"key": "value"}
+  assert result == parser_class().parse(raw_message)
+
+
+def test_lazy_payload_value_decodes_members_up_to_the_key():
+  # Arrange
+  raw_message = json.dumps(
+    {"id": "1", "payload": {"type": "order", "items": [1, 2]}, "timestamp": "t"}
+  )
+  result = SQSParser(lazy=True).parse(raw_message)
+
+  # Act
+  message_type = result.payload_value("type")
+
+  # Assert
+  assert message_type == "order"
+  assert not result.payload_decoded
+  assert result.payload_value("missing", "default") == "default"
+  assert result.payload_decoded
+  assert result.payload == {"type": "order", "items": [1, 2]}
+
+
+@pytest.mark.parametrize(
+  "data",
+  [
+    {"payload": {"key": "value"}, "meta": {"trace": "x"}, "timestamp": "t", "id": "1"},
+    {"id": "1", "payload": {"key": "value"}, "timestamp": "t", "meta": {"a": 1}},
+    {"id": "1", "payload": {"key": "value"}, "timestamp": 't\u00e9"s'},
+    {"id": "1", "timestamp": "t"},
+  ],
+)
+def test_lazy_parse_matches_eager_parse(data):
+  # Arrange
+  raw_message = json.dumps(data)
+
+  # Act
+  result = SQSParser(lazy=True).parse(raw_message)
+
+  # Assert
+  assert result.id == "1"
+  assert result.timestamp == data["timestamp"]
+  assert result.to_message() == SQSParser().parse(raw_message)
+
+
+def test_lazy_parse_reports_malformed_payload_on_access():
+  # Arrange
+  result = SQSParser(lazy=True).parse(
+    '{"id": "1", "payload": {"a": }, "timestamp": "t"}'
+  )
+
+  # Act & Assert
+  with pytest.raises(ValueError) as exc_info:
+    result.payload
+
+  assert "Invalid JSON format" in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+  "raw_message",
+  ['{"id": "1", "payload": {}', '{"id": 1, "payload": {}}', '{"payload": [1]}'],
+)
+def test_lazy_parse_rejects_invalid_envelopes(raw_message):
+  with pytest.raises(ValueError):
+    SQSParser(lazy=True).parse(raw_message)
+
+
+def test_parse_decodes_compressed_bodies():
+  # Arrange
+  codec = BodyCodec(compress_above=100)
+  data = {"id": "1", "payload": {"data": "x" * 1000}, "timestamp": "t"}
+  encoded, _ = codec.encode(json.dumps(data))
+
+  # Act
+  message = SQSParser(codec=codec).parse(encoded)
+
+  # Assert
+  assert message.payload == data["payload"]
+
+
+def test_lazy_parse_fetches_offloaded_bodies_on_payload_access(tmp_path):
+  # Arrange
+  store = FileBlobStore(str(tmp_path))
+  fetches = []
+  get = store.get
+  store.get = lambda key: fetches.append(key) or get(key)
+  codec = BodyCodec(blob_store=store, offload_above=10)
+  data = {"id": "1", "payload": {"type": "order", "data": "x" * 1000}, "timestamp": "t"}
+  encoded, _ = codec.encode(json.dumps(data), envelope=data)
+
+  # Act
+  message = SQSParser(lazy=True, codec=codec).parse(encoded)
+
+  # Assert
+  assert (message.id, message.timestamp) == ("1", "t")
+  assert fetches == []
+  assert message.payload_value("type") == "order"
+  assert message.payload == data["payload"]
+  assert len(fetches) == 1
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+from sources import async_sqs_client
+from sources.async_sqs_client import AsyncSqsClientOwner, ThreadedAsyncSqsClient
+from sources.in_memory_sqs import AsyncInMemorySqs, InMemorySqs
+
+QUEUE_URL = "http://test-queue"
+
+
+class FakeClientContext:
+  def __init__(self, client):
+    self.client = client
+    self.entered = False
+    self.exited = False
+
+  async def __aenter__(self):
+    self.entered = True
+    return self.client
+
+  async def __aexit__(self, exc_type, exc, traceback):
+    self.exited = True
+
+
+class FakeSession:
+  def __init__(self, client):
+    self.context = FakeClientContext(client)
+    self.created = []
+
+  def create_client(self, service, **kwargs):
+    self.created.append((service, kwargs))
+    return self.context
+
+
+def test_open_creates_an_aiobotocore_client_and_close_exits_it(monkeypatch):
+  # Arrange
+  sqs = AsyncInMemorySqs()
+  session = FakeSession(sqs)
+  monkeypatch.setattr(async_sqs_client, "get_session", lambda: session)
+  owner = AsyncSqsClientOwner()
+
+  async def run():
+    async with owner:
+      await owner.client.send_message(QueueUrl=QUEUE_URL, MessageBody="{}")
+      return owner.client
+
+  # Act
+  client = asyncio.run(run())
+
+  # Assert
+  assert client is sqs
+  assert [service for service, _ in session.created] == ["sqs"]
+  assert "config" in session.created[0][1]
+  assert session.context.entered and session.context.exited
+  assert owner.client is None
+  assert sqs.sqs.count(QUEUE_URL) == 1
+
+
+def test_open_falls_back_to_a_threaded_boto3_client(monkeypatch):
+  # Arrange
+  sqs = InMemorySqs()
+  monkeypatch.setattr(async_sqs_client, "get_session", None)
+  monkeypatch.setattr(async_sqs_client, "get_client", lambda service: sqs)
+  owner = AsyncSqsClientOwner()
+
+  async def run():
+    async with owner:
+      client = owner.client
+      await client.send_message(QueueUrl=QUEUE_URL, MessageBody="{}")
+      return client
+
+  # Act
+  client = asyncio.run(run())
+
+  # Assert
+  assert isinstance(client, ThreadedAsyncSqsClient)
+  assert client._executor._shutdown
+  assert sqs.count(QUEUE_URL) == 1
+
+
+def test_threaded_client_runs_at_most_max_workers_calls_at_once():
+  # Arrange
+  active = 0
+  peak = 0
+  lock = threading.Lock()
+
+  class SlowClient:
+    def receive_message(self, **kwargs):
+      nonlocal active, peak
+      with lock:
+        active += 1
+        peak = max(peak, active)
+      time.sleep(0.02)
+      with lock:
+        active -= 1
+      return {"Messages": []}
+
+  client = ThreadedAsyncSqsClient(SlowClient(), max_workers=3)
+
+  async def run():
+    responses = await asyncio.gather(
+      *(client.receive_message(QueueUrl=QUEUE_URL) for _ in range(12))
+    )
+    await client.close()
+    return responses
+
+  # Act
+  responses = asyncio.run(run())
+
+  # Assert
+  assert responses == [{"Messages": []}] * 12
+  assert peak == 3
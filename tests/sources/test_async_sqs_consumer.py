@@ -0,0 +1,177 @@
+import asyncio
+import json
+
+from core.async_handler import AsyncMessageHandler
+from core.codec import BodyCodec
+from parsers.sqs_parser import SQSParser
+from sources import async_sqs_client
+from sources.async_sqs_consumer import AsyncSqsConsumer
+from sources.async_sqs_producer import AsyncSqsProducer
+from sources.in_memory_sqs import AsyncInMemorySqs
+
+QUEUE_URL = "http://test-queue"
+
+
+def test_producer_and_consumer_round_trip():
+  # Arrange
+  sqs = AsyncInMemorySqs(latency=0.001)
+  processed = []
+  peak_concurrency = 0
+  active = 0
+
+  async def processor(message):
+    nonlocal active, peak_concurrency
+    active += 1
+    peak_concurrency = max(peak_concurrency, active)
+    await asyncio.sleep(0.01)
+    active -= 1
+    processed.append(message.id)
+    if len(processed) == 50:
+      consumer.stop()
+
+  handler = AsyncMessageHandler(SQSParser(), processor)
+  producer = AsyncSqsProducer(queue_url=QUEUE_URL, client=sqs)
+  consumer = AsyncSqsConsumer(
+    queue_url=QUEUE_URL,
+    number_of_messages=10,
+    handler=handler,
+    receivers=4,
+    max_in_flight=20,
+    client=sqs,
+  )
+
+  async def run():
+    await asyncio.gather(
+      *(producer.send_message({"id": str(index)}) for index in range(50))
+    )
+    await asyncio.wait_for(consumer.poll_sqs(), timeout=5)
+
+  # Act
+  asyncio.run(run())
+
+  # Assert
+  assert sorted(processed, key=int) == [str(index) for index in range(50)]
+  assert 1 < peak_concurrency <= 20
+  assert sqs.sqs.count(QUEUE_URL) == 0
+  assert consumer.stats()["deletes"] == 50
+
+
+def test_consumer_leaves_failed_messages_on_queue():
+  # Arrange
+  sqs = AsyncInMemorySqs()
+  sqs.sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=json.dumps({"id": "bad"}))
+
+  async def processor(message):
+    consumer.stop()
+    raise Exception("Processing error")
+
+  consumer = AsyncSqsConsumer(
+    queue_url=QUEUE_URL,
+    number_of_messages=10,
+    handler=AsyncMessageHandler(SQSParser(), processor),
+    client=sqs,
+  )
+
+  # Act
+  asyncio.run(asyncio.wait_for(consumer.poll_sqs(), timeout=5))
+
+  # Assert
+  assert sqs.sqs.count(QUEUE_URL) == 1
+  assert consumer.stats()["failed_messages"] == 1
+  assert consumer.stats()["deletes"] == 0
+
+
+def test_producer_encodes_large_bodies_with_its_codec():
+  # Arrange
+  sqs = AsyncInMemorySqs()
+  codec = BodyCodec(compress_above=100)
+  producer = AsyncSqsProducer(queue_url=QUEUE_URL, client=sqs, codec=codec)
+  message_body = {"id": "1", "payload": {"data": "x" * 1000}}
+
+  # Act
+  asyncio.run(producer.send_message(message_body))
+
+  # Assert
+  [body] = sqs.sqs.bodies(QUEUE_URL)
+  assert body != json.dumps(message_body)
+  assert json.loads(codec.decode(body)) == message_body
+
+
+def test_consumer_stopped_while_waiting_for_capacity_does_not_receive_again():
+  # Arrange
+  sqs = AsyncInMemorySqs()
+  for index in range(2):
+    sqs.sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=json.dumps({"id": str(index)}))
+  processed = []
+
+  async def processor(message):
+    consumer.stop()
+    # Keep the only slot busy while the receive loop waits for capacity.
+    await asyncio.sleep(0.05)
+    processed.append(message.id)
+
+  consumer = AsyncSqsConsumer(
+    queue_url=QUEUE_URL,
+    number_of_messages=10,
+    handler=AsyncMessageHandler(SQSParser(), processor),
+    max_in_flight=1,
+    client=sqs,
+  )
+
+  # Act
+  asyncio.run(asyncio.wait_for(consumer.poll_sqs(), timeout=5))
+
+  # Assert
+  assert len(processed) == 1
+  assert consumer.stats()["non_empty_receives"] == 1
+  assert len(sqs.sqs.receive_message(QueueUrl=QUEUE_URL)["Messages"]) == 1
+
+
+def test_poll_sqs_closes_the_client_it_opened(monkeypatch):
+  # Arrange
+  context = None
+
+  class Session:
+    def create_client(self, service, **kwargs):
+      nonlocal context
+      context = Context()
+      return context
+
+  class Context:
+    exited = False
+
+    async def __aenter__(self):
+      return AsyncInMemorySqs()
+
+    async def __aexit__(self, exc_type, exc, traceback):
+      self.exited = True
+
+  monkeypatch.setattr(async_sqs_client, "get_session", Session)
+  handler = AsyncMessageHandler(SQSParser(), lambda message: None)
+  consumer = AsyncSqsConsumer(
+    queue_url=QUEUE_URL, number_of_messages=10, handler=handler
+  )
+  consumer.stop()
+
+  # Act
+  asyncio.run(asyncio.wait_for(consumer.poll_sqs(), timeout=5))
+
+  # Assert
+  assert context.exited
+  assert consumer.client is None
+
+
+def test_poll_sqs_leaves_a_given_client_open():
+  # Arrange
+  sqs = AsyncInMemorySqs()
+  handler = AsyncMessageHandler(SQSParser(), lambda message: None)
+  consumer = AsyncSqsConsumer(
+    queue_url=QUEUE_URL, number_of_messages=10, handler=handler, client=sqs
+  )
+  consumer.stop()
+
+  # Act
+  asyncio.run(asyncio.wait_for(consumer.poll_sqs(), timeout=5))
+
+  # Assert
+  assert consumer.client is sqs
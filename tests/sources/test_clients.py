@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+from sources.clients import clear_clients, get_client
+from sources.sqs_consumer import SqsConsumer
+from sources.sqs_producer import SqsProducer
+
+
+def test_get_client_reuses_client_for_same_settings():
+  with patch("boto3.client") as mock_client:
+    # Act
+    first = get_client("sqs", region_name="us-east-1")
+    second = get_client("sqs", region_name="us-east-1")
+
+  # Assert
+  assert first is second
+  mock_client.assert_called_once()
+
+
+def test_get_client_creates_client_per_settings():
+  with patch("boto3.client") as mock_client:
+    mock_client.side_effect = lambda *args, **kwargs: object()
+
+    # Act
+    default = get_client("sqs", region_name="us-east-1")
+    other_region = get_client("sqs", region_name="eu-west-1")
+    bigger_pool = get_client("sqs", region_name="us-east-1", max_pool_connections=200)
+
+  # Assert
+  assert len({id(default), id(other_region), id(bigger_pool)}) == 3
+  config = mock_client.call_args.kwargs["config"]
+  assert config.max_pool_connections == 200
+  assert config.tcp_keepalive is True
+
+
+def test_clear_clients_drops_cached_clients():
+  with patch("boto3.client") as mock_client:
+    mock_client.side_effect = lambda *args, **kwargs: object()
+
+    # Act
+    first = get_client("sqs")
+    clear_clients()
+    second = get_client("sqs")
+
+  # Assert
+  assert first is not second
+
+
+def test_producers_and_consumers_share_one_client():
+  with patch("boto3.client") as mock_client:
+    # Act
+    producers = [SqsProducer(queue_url="http://test-queue") for _ in range(100)]
+    consumer = SqsConsumer(
+      queue_url="http://test-queue", number_of_messages=10, handler=None
+    )
+
+  # Assert
+  assert all(producer.client is producers[0].client for producer in producers)
+  assert consumer.client is producers[0].client
+  mock_client.assert_called_once()
@@ -0,0 +1,133 @@
+import json
+import threading
+
+import pytest
+
+from core.handler import MessageHandler
+from core.metrics import MetricsRegistry
+from parsers.sqs_parser import SQSParser
+from sources.file_source import FileOffsetStore, FileSource
+
+
+def _line(index: int) -> str:
+  return json.dumps(
+    {"id": f"message-{index}", "payload": {"index": index}, "timestamp": "2025-06-01"}
+  )
+
+
+@pytest.fixture
+def messages_file(tmp_path):
+  path = tmp_path / "messages.jsonl"
+  path.write_text("".join(_line(index) + "\n" for index in range(100)))
+  return str(path)
+
+
+def _recording_handler(received: list, fail_index: int = None):
+  lock = threading.Lock()
+
+  def processor(message):
+    if message.payload["index"] == fail_index:
+      raise RuntimeError("processing failed")
+    with lock:
+      received.append(message.payload["index"])
+
+  return MessageHandler(SQSParser(), processor, metrics=MetricsRegistry())
+
+
+def test_run_handles_every_line_across_shards(messages_file):
+  # Arrange
+  received = []
+  source = FileSource(
+    messages_file, _recording_handler(received), batch_size=7, shards=3, max_workers=3
+  )
+
+  # Act
+  stats = source.run()
+
+  # Assert
+  assert sorted(received) == list(range(100))
+  assert stats["read"] == 100
+  assert stats["processed"] == 100
+  assert stats["failed"] == 0
+
+
+def test_run_skips_blank_lines_and_counts_failures(tmp_path):
+  # Arrange
+  path = tmp_path / "messages.jsonl"
+  path.write_text(f"{_line(0)}\n\n{_line(1)}\r\nnot json\n{_line(2)}")
+  received = []
+  source = FileSource(str(path), _recording_handler(received, fail_index=1))
+
+  # Act
+  stats = source.run()
+
+  # Assert
+  assert received == [0, 2]
+  assert stats["read"] == 4
+  assert stats["processed"] == 2
+  assert stats["failed"] == 2
+
+
+def test_run_handles_empty_file(tmp_path):
+  # Arrange
+  path = tmp_path / "empty.jsonl"
+  path.write_text("")
+  source = FileSource(str(path), _recording_handler([]))
+
+  # Act
+  stats = source.run()
+
+  # Assert
+  assert stats["read"] == 0
+
+
+def test_run_resumes_from_saved_offsets(messages_file, tmp_path):
+  # Arrange
+  offsets = FileOffsetStore(str(tmp_path / "offsets.json"))
+  received = []
+  handler = _recording_handler(received)
+  first = FileSource(messages_file, handler, batch_size=10, offsets=offsets)
+  handle_batch = handler.handle_batch
+
+  def stop_after_three_batches(lines):
+    results = handle_batch(lines)
+    if len(received) >= 30:
+      first.stop()
+    return results
+
+  handler.handle_batch = stop_after_three_batches
+
+  # Act
+  first.run()
+  second = FileSource(
+    messages_file, _recording_handler(received), batch_size=10, offsets=offsets
+  )
+  stats = second.run()
+  third = FileSource(messages_file, _recording_handler(received), offsets=offsets)
+
+  # Assert
+  assert received == list(range(100))
+  assert stats["read"] == 70
+  assert third.run()["read"] == 0
+
+
+def test_run_restarts_file_whose_size_changed(messages_file, tmp_path):
+  # Arrange
+  offsets = FileOffsetStore(str(tmp_path / "offsets.json"))
+  FileSource(messages_file, _recording_handler([]), offsets=offsets).run()
+  with open(messages_file, "a") as messages:
+    messages.write(_line(100) + "\n")
+  received = []
+
+  # Act
+  stats = FileSource(messages_file, _recording_handler(received), offsets=offsets).run()
+
+  # Assert
+  assert stats["read"] == 101
+  assert sorted(received) == list(range(101))
+
+
+def test_file_source_rejects_invalid_batch_size(messages_file):
+  # Act & Assert
+  with pytest.raises(ValueError):
+    FileSource(messages_file, _recording_handler([]), batch_size=0)
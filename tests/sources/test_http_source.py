@@ -0,0 +1,198 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from core.handler import MessageHandler
+from core.metrics import MetricsRegistry
+from parsers.http_parser import HttpParser
+from sources.http_source import HttpSource
+
+
+async def _request(
+  port: int, method: str, path: str, body: bytes = None, headers: dict = None
+) -> tuple:
+  reader, writer = await asyncio.open_connection("127.0.0.1", port)
+  lines = [f"{method} {path} HTTP/1.1", "Host: localhost", "Connection: close"]
+  if body is not None:
+    lines.append(f"Content-Length: {len(body)}")
+  lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+  writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+  response = await reader.read()
+  writer.close()
+
+  head, _, payload = response.partition(b"\r\n\r\n")
+  head_lines = head.decode("latin-1").split("\r\n")
+  response_headers = dict(line.split(": ", 1) for line in head_lines[1:])
+  return int(head_lines[0].split(" ")[1]), response_headers, json.loads(payload)
+
+
+def _post(port: int, messages) -> tuple:
+  return _request(port, "POST", "/messages", json.dumps(messages).encode("utf-8"))
+
+
+def _handler(processor) -> MessageHandler:
+  return MessageHandler(HttpParser(), processor, metrics=MetricsRegistry())
+
+
+def _run(source: HttpSource, client):
+  async def main():
+    await source.start()
+    serving = asyncio.create_task(source.serve())
+    try:
+      return await client()
+    finally:
+      source.stop()
+      await asyncio.wait_for(serving, timeout=5)
+
+  return asyncio.run(main())
+
+
+def test_posted_messages_are_handled():
+  # Arrange
+  received = []
+  source = HttpSource(_handler(lambda message: received.append(message)), port=0)
+
+  async def client():
+    return [
+      await _post(source.port, {"id": "1", "payload": {"n": 1}}),
+      await _post(source.port, [{"id": "2"}, {"id": "3"}]),
+    ]
+
+  # Act
+  responses = _run(source, client)
+
+  # Assert
+  assert [(status, body) for status, _, body in responses] == [
+    (202, {"accepted": 1}),
+    (202, {"accepted": 2}),
+  ]
+  assert sorted(message.id for message in received) == ["1", "2", "3"]
+  assert {message.source for message in received} == {"http"}
+  assert source.stats()["processed"] == 3
+
+
+def test_requests_are_rejected_with_429_when_the_queue_is_full():
+  # Arrange
+  started = threading.Event()
+  release = threading.Event()
+
+  def processor(message):
+    started.set()
+    release.wait(timeout=5)
+
+  source = HttpSource(
+    _handler(processor), port=0, queue_size=2, max_workers=1, batch_size=1
+  )
+
+  async def client():
+    first = await _post(source.port, {"id": "1"})
+    while not started.is_set():
+      await asyncio.sleep(0.001)
+    second = await _post(source.port, [{"id": "2"}, {"id": "3"}])
+    third = await _post(source.port, {"id": "4"})
+    release.set()
+    return first, second, third
+
+  # Act
+  first, second, third = _run(source, client)
+
+  # Assert
+  assert first[0] == 202
+  assert second[0] == 202
+  assert third[0] == 429
+  assert third[1]["Retry-After"] == "1"
+  assert source.stats()["rejected_requests"] == 1
+  assert source.stats()["processed"] == 3
+
+
+@pytest.mark.parametrize(
+  "method, path, body, expected_status",
+  [
+    ("POST", "/messages", b"not json", 400),
+    ("POST", "/messages", b"[]", 400),
+    ("POST", "/messages", b"[1, 2]", 400),
+    ("POST", "/other", b"{}", 404),
+    ("PUT", "/messages", b"{}", 405),
+    ("POST", "/messages", None, 411),
+    ("POST", "/messages", b"x" * 2048, 413),
+  ],
+)
+def test_invalid_requests_are_rejected(method, path, body, expected_status):
+  # Arrange
+  source = HttpSource(_handler(lambda message: None), port=0, max_body_bytes=1024)
+
+  # Act
+  status, _, _ = _run(source, lambda: _request(source.port, method, path, body))
+
+  # Assert
+  assert status == expected_status
+  assert source.stats()["invalid_requests"] == 1
+  assert source.stats()["accepted"] == 0
+
+
+@pytest.mark.parametrize("content_length", ["-5", "+5", "abc", "1_0"])
+def test_invalid_content_lengths_are_rejected(content_length):
+  # Arrange
+  source = HttpSource(_handler(lambda message: None), port=0)
+
+  # Act
+  status, headers, _ = _run(
+    source,
+    lambda: _request(
+      source.port, "POST", "/messages", headers={"Content-Length": content_length}
+    ),
+  )
+
+  # Assert
+  assert status == 400
+  assert headers["Connection"] == "close"
+  assert source.stats()["invalid_requests"] == 1
+
+
+def test_health_returns_stats():
+  # Arrange
+  source = HttpSource(_handler(lambda message: None), port=0)
+
+  # Act
+  status, _, body = _run(source, lambda: _request(source.port, "GET", "/health"))
+
+  # Assert
+  assert status == 200
+  assert body["requests"] == 1
+
+
+def test_keep_alive_connection_serves_several_requests():
+  # Arrange
+  received = []
+  source = HttpSource(_handler(lambda message: received.append(message.id)), port=0)
+
+  async def client():
+    reader, writer = await asyncio.open_connection("127.0.0.1", source.port)
+    statuses = []
+    for index in range(3):
+      body = json.dumps({"id": str(index)}).encode("utf-8")
+      writer.write(
+        f"POST /messages HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+        + body
+      )
+      head = await reader.readuntil(b"\r\n\r\n")
+      length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+      await reader.readexactly(length)
+      statuses.append(int(head.split(b" ")[1]))
+    writer.close()
+    return statuses
+
+  # Act
+  statuses = _run(source, client)
+
+  # Assert
+  assert statuses == [202, 202, 202]
+  assert sorted(received) == ["0", "1", "2"]
+
+
+def test_http_source_rejects_invalid_queue_size():
+  # Act & Assert
+  with pytest.raises(ValueError):
+    HttpSource(_handler(lambda message: None), queue_size=0)
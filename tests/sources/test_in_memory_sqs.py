@@ -0,0 +1,104 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from sources.in_memory_sqs import InMemorySqs
+
+QUEUE_URL = "http://test-queue"
+
+
+@pytest.fixture
+def sqs():
+  return InMemorySqs()
+
+
+def test_received_message_is_invisible_until_deleted(sqs):
+  # Arrange
+  sqs.send_message(QueueUrl=QUEUE_URL, MessageBody="body")
+
+  # Act
+  first = sqs.receive_message(QueueUrl=QUEUE_URL, MaxNumberOfMessages=10)
+  second = sqs.receive_message(QueueUrl=QUEUE_URL, MaxNumberOfMessages=10)
+  sqs.delete_message(
+    QueueUrl=QUEUE_URL, ReceiptHandle=first["Messages"][0]["ReceiptHandle"]
+  )
+
+  # Assert
+  assert first["Messages"][0]["Body"] == "body"
+  assert first["Messages"][0]["Attributes"]["ApproximateReceiveCount"] == "1"
+  assert "Messages" not in second
+  assert sqs.count(QUEUE_URL) == 0
+
+
+def test_zero_visibility_makes_message_available_again(sqs):
+  # Arrange
+  sqs.send_message(QueueUrl=QUEUE_URL, MessageBody="body")
+  received = sqs.receive_message(QueueUrl=QUEUE_URL)["Messages"][0]
+
+  # Act
+  sqs.change_message_visibility(
+    QueueUrl=QUEUE_URL, ReceiptHandle=received["ReceiptHandle"], VisibilityTimeout=0
+  )
+  redelivered = sqs.receive_message(QueueUrl=QUEUE_URL)["Messages"][0]
+
+  # Assert
+  assert redelivered["Attributes"]["ApproximateReceiveCount"] == "2"
+  with pytest.raises(ClientError):
+    sqs.delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=received["ReceiptHandle"])
+
+
+def test_batch_operations_report_failed_entries(sqs):
+  # Arrange
+  sqs.send_message_batch(
+    QueueUrl=QUEUE_URL,
+    Entries=[{"Id": "0", "MessageBody": "a"}, {"Id": "1", "MessageBody": "b"}],
+  )
+  messages = sqs.receive_message(QueueUrl=QUEUE_URL, MaxNumberOfMessages=10)["Messages"]
+
+  # Act
+  response = sqs.delete_message_batch(
+    QueueUrl=QUEUE_URL,
+    Entries=[
+      {"Id": "0", "ReceiptHandle": messages[0]["ReceiptHandle"]},
+      {"Id": "1", "ReceiptHandle": "unknown"},
+    ],
+  )
+
+  # Assert
+  assert response["Successful"] == [{"Id": "0"}]
+  assert response["Failed"][0]["Id"] == "1"
+  assert response["Failed"][0]["SenderFault"] is True
+  assert sqs.bodies(QUEUE_URL) == ["b"]
+
+
+def test_fifo_sends_require_a_message_group_id(sqs):
+  # Arrange
+  fifo_url = "http://test-queue.fifo"
+
+  # Act
+  with pytest.raises(ClientError, match="MissingParameter"):
+    sqs.send_message(QueueUrl=fifo_url, MessageBody="a")
+  response = sqs.send_message_batch(
+    QueueUrl=fifo_url,
+    Entries=[
+      {"Id": "0", "MessageBody": "b", "MessageGroupId": "g"},
+      {"Id": "1", "MessageBody": "c"},
+    ],
+  )
+
+  # Assert
+  assert [entry["Id"] for entry in response["Failed"]] == ["1"]
+  assert sqs.bodies(fifo_url) == ["b"]
+
+
+def test_fifo_group_is_held_back_while_in_flight(sqs):
+  # Arrange
+  fifo_url = "http://test-queue.fifo"
+  for body, group in [("a1", "a"), ("a2", "a"), ("b1", "b")]:
+    sqs.send_message(QueueUrl=fifo_url, MessageBody=body, MessageGroupId=group)
+  sqs.receive_message(QueueUrl=fifo_url, MaxNumberOfMessages=1)
+
+  # Act
+  response = sqs.receive_message(QueueUrl=fifo_url, MaxNumberOfMessages=10)
+
+  # Assert
+  assert [message["Body"] for message in response["Messages"]] == ["b1"]
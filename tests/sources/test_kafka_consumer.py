@@ -0,0 +1,259 @@
+import json
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+from confluent_kafka import KafkaError, KafkaException, TopicPartition
+
+from core.backoff import ExponentialBackoff
+from core.handler import MessageHandler
+from sources.in_memory_kafka import InMemoryKafkaBroker
+from sources.kafka_consumer import KafkaConsumer
+from sources.kafka_producer import KafkaProducer
+from sources.kafka_retry_policy import KafkaRetryPolicy
+
+
+@pytest.fixture
+def broker():
+  return InMemoryKafkaBroker(partitions=3)
+
+
+@pytest.fixture
+def mock_handler():
+  return Mock(spec=MessageHandler)
+
+
+def _kafka_consumer(broker, handler, **kwargs):
+  kafka_consumer = KafkaConsumer(
+    topics=["events"],
+    handler=handler,
+    poll_timeout=0.01,
+    consumer=broker.consumer("group"),
+    **kwargs,
+  )
+  # Stop once the topic has been drained.
+  consume = kafka_consumer.consumer.consume
+
+  def consume_until_empty(**consume_kwargs):
+    messages = consume(**consume_kwargs)
+    if not messages:
+      kafka_consumer.stop()
+    return messages
+
+  kafka_consumer.consumer.consume = consume_until_empty
+  return kafka_consumer
+
+
+def test_poll_kafka_handles_and_commits_every_partition(broker, mock_handler):
+  # Arrange
+  for index in range(30):
+    broker.append("events", json.dumps({"id": str(index)}), key=f"key-{index}")
+  kafka_consumer = _kafka_consumer(broker, mock_handler, batch_size=10)
+
+  # Act
+  kafka_consumer.poll_kafka()
+
+  # Assert
+  assert mock_handler.handle.call_count == 30
+  for partition in range(3):
+    assert broker.committed("group", "events", partition) == len(
+      broker.messages("events", partition)
+    )
+  assert kafka_consumer.stats()["processed"] == 30
+
+
+def test_poll_kafka_keeps_order_within_a_partition(broker):
+  # Arrange
+  for index in range(20):
+    broker.append("events", json.dumps({"n": index}), partition=index % 2)
+  seen = {0: [], 1: []}
+  lock = threading.Lock()
+
+  def handle(raw_message):
+    n = json.loads(raw_message)["n"]
+    with lock:
+      seen[n % 2].append(n)
+
+  handler = Mock(spec=MessageHandler)
+  handler.handle.side_effect = handle
+  kafka_consumer = _kafka_consumer(broker, handler, max_workers=2)
+
+  # Act
+  kafka_consumer.poll_kafka()
+
+  # Assert
+  assert seen[0] == list(range(0, 20, 2))
+  assert seen[1] == list(range(1, 20, 2))
+
+
+def test_poll_kafka_redelivers_failed_message(broker, mock_handler):
+  # Arrange
+  for index in range(3):
+    broker.append("events", json.dumps({"n": index}), partition=0)
+  attempts = []
+
+  def handle(raw_message):
+    attempts.append(json.loads(raw_message)["n"])
+    if attempts == [0, 1]:
+      raise ValueError("Processing error")
+
+  mock_handler.handle.side_effect = handle
+  kafka_consumer = _kafka_consumer(
+    broker,
+    mock_handler,
+    retry_policy=KafkaRetryPolicy(backoff=ExponentialBackoff(initial=0, maximum=0)),
+  )
+
+  # Act
+  kafka_consumer.poll_kafka()
+
+  # Assert
+  assert attempts == [0, 1, 1, 2]
+  assert broker.committed("group", "events", 0) == 3
+  assert kafka_consumer.stats()["failed"] == 1
+  assert kafka_consumer.stats()["processed"] == 3
+
+
+def test_poll_kafka_backs_off_and_dead_letters_a_poison_message(broker):
+  # Arrange
+  for index in range(3):
+    broker.append("events", json.dumps({"n": index}), partition=0)
+  attempts = []
+
+  def handle(raw_message):
+    n = json.loads(raw_message)["n"]
+    attempts.append((n, time.monotonic()))
+    if n == 1:
+      raise ValueError("Processing error")
+
+  handler = Mock(spec=MessageHandler)
+  handler.handle.side_effect = handle
+  dead_letter_producer = KafkaProducer(topic="events-dlq", producer=broker.producer())
+  kafka_consumer = KafkaConsumer(
+    topics=["events"],
+    handler=handler,
+    poll_timeout=0.01,
+    consumer=broker.consumer("group"),
+    retry_policy=KafkaRetryPolicy(
+      backoff=ExponentialBackoff(initial=0.1, maximum=0.1),
+      max_attempts=3,
+      dead_letter_producer=dead_letter_producer,
+    ),
+  )
+  thread = threading.Thread(target=kafka_consumer.poll_kafka)
+
+  # Act
+  thread.start()
+  deadline = time.monotonic() + 5
+  while broker.committed("group", "events", 0) < 3 and time.monotonic() < deadline:
+    time.sleep(0.01)
+  kafka_consumer.stop()
+  thread.join()
+  dead_letter_producer.close(timeout=5)
+
+  # Assert
+  assert [n for n, _ in attempts] == [0, 1, 1, 1, 2]
+  failures = [at for n, at in attempts if n == 1]
+  assert failures[1] - failures[0] >= 0.09
+  assert failures[2] - failures[1] >= 0.09
+  assert [json.loads(m.value()) for m in broker.messages("events-dlq")] == [{"n": 1}]
+  stats = kafka_consumer.stats()
+  assert stats["retries_scheduled"] == 2
+  assert stats["dead_lettered"] == 1
+  assert stats["processed"] == 2
+
+
+def test_poll_kafka_skips_tombstones(broker, mock_handler):
+  # Arrange
+  broker.append("events", json.dumps({"n": 0}), partition=0)
+  broker.append("events", None, partition=0)
+  broker.append("events", json.dumps({"n": 1}), partition=0)
+  kafka_consumer = _kafka_consumer(broker, mock_handler)
+
+  # Act
+  kafka_consumer.poll_kafka()
+
+  # Assert
+  assert mock_handler.handle.call_count == 2
+  assert broker.committed("group", "events", 0) == 3
+  assert kafka_consumer.stats()["tombstones"] == 1
+  assert kafka_consumer.stats()["processed"] == 2
+  assert kafka_consumer.stats()["failed"] == 0
+
+
+def test_poll_kafka_logs_failed_commits_and_keeps_consuming(broker, mock_handler):
+  # Arrange
+  for index in range(3):
+    broker.append("events", json.dumps({"n": index}), partition=0)
+  kafka_consumer = _kafka_consumer(broker, mock_handler, batch_size=2)
+  commit = kafka_consumer.consumer.commit
+  errors = [KafkaException(KafkaError(KafkaError.REBALANCE_IN_PROGRESS))]
+
+  def fail_once(**kwargs):
+    if errors:
+      raise errors.pop()
+    return commit(**kwargs)
+
+  kafka_consumer.consumer.commit = Mock(side_effect=fail_once)
+
+  # Act
+  kafka_consumer.poll_kafka()
+
+  # Assert
+  assert mock_handler.handle.call_count == 3
+  assert kafka_consumer.consumer.commit.call_count == 2
+  assert broker.committed("group", "events", 0) == 3
+  assert kafka_consumer.stats()["commits"] == 1
+
+
+def test_poll_kafka_logs_failed_seeks(broker):
+  # Arrange
+  broker.append("events", json.dumps({"n": 0}), partition=0)
+  handler = Mock(spec=MessageHandler)
+  handler.handle.side_effect = ValueError("Processing error")
+  kafka_consumer = _kafka_consumer(broker, handler)
+  kafka_consumer.consumer.seek = Mock(
+    side_effect=KafkaException(KafkaError(KafkaError._STATE))
+  )
+
+  # Act
+  kafka_consumer.poll_kafka()
+
+  # Assert
+  handler.handle.assert_called_once()
+  assert kafka_consumer._attempts == {}
+  assert kafka_consumer._paused == {}
+  assert broker.committed("group", "events", 0) == -1
+
+
+def test_poll_kafka_drops_the_retry_state_of_revoked_partitions(broker):
+  # Arrange
+  broker.append("events", json.dumps({"n": 0}), partition=0)
+  handler = Mock(spec=MessageHandler)
+  handler.handle.side_effect = [ValueError("Processing error"), None]
+  kafka_consumer = KafkaConsumer(
+    topics=["events"],
+    handler=handler,
+    poll_timeout=0.01,
+    consumer=broker.consumer("group"),
+    retry_policy=KafkaRetryPolicy(backoff=ExponentialBackoff(initial=60, maximum=60)),
+  )
+  thread = threading.Thread(target=kafka_consumer.poll_kafka)
+  thread.start()
+  deadline = time.monotonic() + 5
+  while not kafka_consumer.stats()["retries_scheduled"] and time.monotonic() < deadline:
+    time.sleep(0.01)
+
+  # Act
+  kafka_consumer.consumer.revoke([TopicPartition("events", 0)])
+  while broker.committed("group", "events", 0) < 1 and time.monotonic() < deadline:
+    time.sleep(0.01)
+  kafka_consumer.stop()
+  thread.join()
+
+  # Assert
+  assert handler.handle.call_count == 2
+  assert broker.committed("group", "events", 0) == 1
+  assert kafka_consumer._attempts == {}
+  assert kafka_consumer._paused == {}
@@ -0,0 +1,92 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+from confluent_kafka import KafkaError, KafkaException
+
+from sources.in_memory_kafka import InMemoryKafkaBroker
+from sources.kafka_producer import KafkaProducer
+
+
+@pytest.fixture
+def broker():
+  return InMemoryKafkaBroker(partitions=2)
+
+
+@pytest.fixture
+def kafka_producer(broker):
+  producer = KafkaProducer(topic="events", producer=broker.producer())
+  yield producer
+  producer.close(timeout=5)
+
+
+def test_send_message_resolves_with_message_id(kafka_producer, broker):
+  # Act
+  future = kafka_producer.send_message({"test": "message"}, key="user-1")
+
+  # Assert
+  topic, partition, offset = future.result(timeout=5).split(":")
+  stored = broker.messages("events", int(partition))[int(offset)]
+  assert topic == "events"
+  assert json.loads(stored.value()) == {"test": "message"}
+  assert stored.key() == b"user-1"
+
+
+def test_send_message_takes_the_sqs_producer_arguments(kafka_producer, broker):
+  # Act
+  future = kafka_producer.send_message(
+    '{"test": "message"}', message_group_id="group-1", deduplication_id="1", raw=True
+  )
+
+  # Assert
+  topic, partition, offset = future.result(timeout=5).split(":")
+  stored = broker.messages("events", int(partition))[int(offset)]
+  assert stored.value() == b'{"test": "message"}'
+  assert stored.key() == b"group-1"
+
+
+def test_send_many_keeps_order_per_key(kafka_producer, broker):
+  # Act
+  futures = kafka_producer.send_many(
+    [{"n": index} for index in range(100)], key=lambda body: str(body["n"] % 2)
+  )
+  kafka_producer.flush(timeout=5)
+
+  # Assert
+  assert all(future.result(timeout=5) for future in futures)
+  for partition in range(2):
+    numbers = [
+      json.loads(message.value())["n"]
+      for message in broker.messages("events", partition)
+    ]
+    assert numbers == sorted(numbers)
+  assert kafka_producer.stats()["sent"] == 100
+
+
+def test_failed_delivery_fails_the_future(kafka_producer):
+  # Arrange
+  kafka_producer.producer.fail_with = KafkaError(KafkaError._MSG_TIMED_OUT)
+
+  # Act
+  future = kafka_producer.send_message({"test": "message"})
+
+  # Assert
+  with pytest.raises(KafkaException):
+    future.result(timeout=5)
+  assert kafka_producer.stats()["failed"] == 1
+
+
+def test_send_message_waits_for_room_when_queue_is_full():
+  # Arrange
+  producer = Mock()
+  producer.produce.side_effect = [BufferError(), None]
+  producer.flush.return_value = 0
+  kafka_producer = KafkaProducer(topic="events", producer=producer)
+
+  # Act
+  kafka_producer.send_message({"test": "message"})
+  kafka_producer.close()
+
+  # Assert
+  assert producer.produce.call_count == 2
+  producer.poll.assert_any_call(0.1)
@@ -0,0 +1,35 @@
+from unittest.mock import Mock
+
+import pytest
+
+from core.backoff import ExponentialBackoff
+from sources.kafka_retry_policy import KafkaRetryPolicy
+
+
+def test_delay_follows_the_backoff():
+  # Arrange
+  policy = KafkaRetryPolicy(backoff=ExponentialBackoff(initial=1, maximum=4))
+
+  # Act
+  delays = [policy.delay(attempt) for attempt in range(1, 5)]
+
+  # Assert
+  assert delays == [1, 2, 4, 4]
+
+
+def test_exhausted_after_max_attempts():
+  # Arrange
+  policy = KafkaRetryPolicy(max_attempts=3, dead_letter_producer=Mock())
+
+  # Act & Assert
+  assert not policy.exhausted(2)
+  assert policy.exhausted(3)
+  assert not KafkaRetryPolicy().exhausted(100)
+
+
+def test_max_attempts_requires_a_dead_letter_producer():
+  # Act & Assert
+  with pytest.raises(ValueError):
+    KafkaRetryPolicy(max_attempts=3)
+  with pytest.raises(ValueError):
+    KafkaRetryPolicy(max_attempts=0, dead_letter_producer=Mock())
@@ -0,0 +1,161 @@
+from unittest.mock import Mock
+
+import pytest
+
+from sources.sqs_ack_batcher import SqsAckBatcher
+
+
+@pytest.fixture
+def client():
+  return Mock()
+
+
+@pytest.fixture
+def batcher(client):
+  return SqsAckBatcher(client, queue_url="http://test-queue", max_delay=60)
+
+
+def _successful(entries):
+  return {"Successful": [{"Id": entry["Id"]} for entry in entries], "Failed": []}
+
+
+def test_ack_flushes_when_batch_is_full(batcher, client):
+  # Arrange
+  client.delete_message_batch.side_effect = lambda **kwargs: _successful(
+    kwargs["Entries"]
+  )
+
+  # Act
+  for index in range(10):
+    batcher.ack(f"receipt{index}")
+
+  # Assert
+  client.delete_message_batch.assert_called_once()
+  entries = client.delete_message_batch.call_args.kwargs["Entries"]
+  assert [entry["ReceiptHandle"] for entry in entries] == [
+    f"receipt{index}" for index in range(10)
+  ]
+  assert batcher.pending == 0
+  assert batcher.stats()["batched_deletes"] == 10
+  client.delete_message.assert_not_called()
+
+
+def test_ack_holds_handles_until_flush(batcher, client):
+  # Arrange
+  client.delete_message_batch.side_effect = lambda **kwargs: _successful(
+    kwargs["Entries"]
+  )
+
+  # Act
+  batcher.ack("receipt1")
+  batcher.ack("receipt2")
+  batcher.flush_if_due()
+
+  # Assert
+  client.delete_message_batch.assert_not_called()
+  batcher.flush()
+  client.delete_message_batch.assert_called_once_with(
+    QueueUrl="http://test-queue",
+    Entries=[
+      {"Id": "0", "ReceiptHandle": "receipt1"},
+      {"Id": "1", "ReceiptHandle": "receipt2"},
+    ],
+  )
+
+
+def test_flush_if_due_after_max_delay(client):
+  # Arrange
+  batcher = SqsAckBatcher(client, queue_url="http://test-queue", max_delay=0)
+  client.delete_message_batch.side_effect = lambda **kwargs: _successful(
+    kwargs["Entries"]
+  )
+
+  # Act
+  batcher.ack("receipt1")
+
+  # Assert
+  client.delete_message_batch.assert_called_once()
+  assert batcher.pending == 0
+
+
+def test_failed_entries_are_retried(batcher, client):
+  # Arrange
+  client.delete_message_batch.side_effect = [
+    {
+      "Successful": [{"Id": "0"}],
+      "Failed": [{"Id": "1", "SenderFault": False, "Code": "InternalError"}],
+    },
+    {"Successful": [{"Id": "0"}], "Failed": []},
+  ]
+
+  # Act
+  batcher.ack("receipt1")
+  batcher.ack("receipt2")
+  batcher.flush()
+
+  # Assert
+  assert client.delete_message_batch.call_count == 2
+  retried = client.delete_message_batch.call_args.kwargs["Entries"]
+  assert retried == [{"Id": "0", "ReceiptHandle": "receipt2"}]
+  assert batcher.stats()["batched_deletes"] == 2
+
+
+def test_sender_fault_entries_are_not_retried(batcher, client):
+  # Arrange
+  client.delete_message_batch.return_value = {
+    "Successful": [],
+    "Failed": [{"Id": "0", "SenderFault": True, "Code": "ReceiptHandleIsInvalid"}],
+  }
+
+  # Act
+  batcher.ack("receipt1")
+  batcher.flush()
+
+  # Assert
+  client.delete_message_batch.assert_called_once()
+  assert batcher.stats()["failed_deletes"] == 1
+
+
+def test_exhausted_retries_fall_back_to_individual_delete(client):
+  # Arrange
+  batcher = SqsAckBatcher(
+    client, queue_url="http://test-queue", max_delay=60, max_retries=2
+  )
+  client.delete_message_batch.side_effect = Exception("Service unavailable")
+
+  # Act
+  batcher.ack("receipt1")
+  batcher.flush()
+
+  # Assert
+  assert client.delete_message_batch.call_count == 2
+  client.delete_message.assert_called_once_with(
+    QueueUrl="http://test-queue", ReceiptHandle="receipt1"
+  )
+  assert batcher.stats()["individual_deletes"] == 1
+
+
+def test_invalid_batch_size_raises(client):
+  with pytest.raises(ValueError):
+    SqsAckBatcher(client, queue_url="http://test-queue", max_batch_size=11)
+
+
+def test_flush_reports_deleted_handles(client):
+  # Arrange
+  deleted = []
+  batcher = SqsAckBatcher(
+    client, queue_url="http://test-queue", max_delay=60, on_deleted=deleted.extend
+  )
+  client.delete_message_batch.side_effect = lambda **kwargs: _successful(
+    kwargs["Entries"]
+  )
+  batcher.ack("receipt1")
+  batcher.ack("receipt2")
+
+  # Act
+  pending = list(deleted)
+  batcher.flush()
+
+  # Assert
+  assert pending == []
+  assert deleted == ["receipt1", "receipt2"]
@@ -0,0 +1,195 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from core.codec import BodyCodec
+from sources.sqs_batch_producer import SqsBatchProducer
+
+
+def _successful(entries):
+  return {
+    "Successful": [
+      {"Id": entry["Id"], "MessageId": f"id-{entry['MessageBody']}"}
+      for entry in entries
+    ],
+    "Failed": [],
+  }
+
+
+@pytest.fixture
+def batch_producer():
+  with patch("boto3.client") as mock_client:
+    producer = SqsBatchProducer(queue_url="http://test-queue", linger=60)
+    producer.client = mock_client.return_value
+    producer.retry_backoff.initial = 0
+    producer.client.send_message_batch.side_effect = lambda **kwargs: _successful(
+      kwargs["Entries"]
+    )
+    yield producer
+    producer.close(timeout=5)
+
+
+def test_full_batch_is_sent_without_waiting_for_linger(batch_producer):
+  # Act
+  futures = [batch_producer.send_message(index) for index in range(10)]
+
+  # Assert
+  assert [future.result(timeout=5) for future in futures] == [
+    f"id-{index}" for index in range(10)
+  ]
+  batch_producer.client.send_message_batch.assert_called_once()
+  assert batch_producer.stats()["sent"] == 10
+
+
+def test_flush_sends_partial_batch(batch_producer):
+  # Act
+  future = batch_producer.send_message({"test": "message"})
+  assert batch_producer.flush(timeout=5)
+
+  # Assert
+  assert future.result() == 'id-{"test": "message"}'
+  batch_producer.client.send_message_batch.assert_called_once_with(
+    QueueUrl="http://test-queue",
+    Entries=[{"Id": "0", "MessageBody": '{"test": "message"}'}],
+  )
+
+
+def test_fifo_attributes_are_kept_per_entry(batch_producer):
+  # Act
+  batch_producer.send_message({"n": 1}, message_group_id="a", deduplication_id="1")
+  batch_producer.send_message({"n": 2}, message_group_id="b", deduplication_id="2")
+  batch_producer.flush(timeout=5)
+
+  # Assert
+  entries = batch_producer.client.send_message_batch.call_args.kwargs["Entries"]
+  assert entries == [
+    {
+      "Id": "0",
+      "MessageBody": '{"n": 1}',
+      "MessageGroupId": "a",
+      "MessageDeduplicationId": "1",
+    },
+    {
+      "Id": "1",
+      "MessageBody": '{"n": 2}',
+      "MessageGroupId": "b",
+      "MessageDeduplicationId": "2",
+    },
+  ]
+
+
+def test_batches_are_split_at_the_byte_limit(batch_producer):
+  # Arrange
+  batch_producer.max_batch_bytes = 100
+  body = "x" * 40
+
+  # Act
+  futures = [batch_producer.send_message(body) for _ in range(3)]
+  batch_producer.flush(timeout=5)
+
+  # Assert
+  assert all(future.result() for future in futures)
+  sizes = [
+    len(call.kwargs["Entries"])
+    for call in batch_producer.client.send_message_batch.call_args_list
+  ]
+  assert sizes == [2, 1]
+
+
+def test_only_failed_entries_are_retried(batch_producer):
+  # Arrange
+  batch_producer.client.send_message_batch.side_effect = [
+    {
+      "Successful": [{"Id": "0", "MessageId": "id-0"}],
+      "Failed": [{"Id": "1", "SenderFault": False, "Code": "InternalError"}],
+    },
+    {"Successful": [{"Id": "0", "MessageId": "id-1"}], "Failed": []},
+  ]
+
+  # Act
+  futures = [batch_producer.send_message(index) for index in range(2)]
+  batch_producer.flush(timeout=5)
+
+  # Assert
+  assert [future.result() for future in futures] == ["id-0", "id-1"]
+  retried = batch_producer.client.send_message_batch.call_args.kwargs["Entries"]
+  assert retried == [{"Id": "0", "MessageBody": "1"}]
+  assert batch_producer.stats()["retried"] == 1
+
+
+def test_sender_fault_fails_the_future(batch_producer):
+  # Arrange
+  batch_producer.client.send_message_batch.side_effect = None
+  batch_producer.client.send_message_batch.return_value = {
+    "Successful": [],
+    "Failed": [
+      {"Id": "0", "SenderFault": True, "Code": "InvalidMessageContents"},
+    ],
+  }
+
+  # Act
+  future = batch_producer.send_message({"test": "message"})
+  batch_producer.flush(timeout=5)
+
+  # Assert
+  with pytest.raises(ClientError):
+    future.result()
+  assert batch_producer.stats()["failed"] == 1
+
+
+def test_oversized_message_fails_immediately(batch_producer):
+  # Act
+  future = batch_producer.send_message("x" * (256 * 1024 + 1))
+
+  # Assert
+  with pytest.raises(ValueError):
+    future.result(timeout=0)
+  batch_producer.client.send_message_batch.assert_not_called()
+
+
+def test_codec_encodes_large_bodies(batch_producer):
+  # Arrange
+  batch_producer.codec = BodyCodec(compress_above=100)
+  message_body = {"data": "x" * 1000}
+
+  # Act
+  batch_producer.send_message(message_body)
+  batch_producer.send_message({"small": True})
+  assert batch_producer.flush(timeout=5)
+
+  # Assert
+  large, small = batch_producer.client.send_message_batch.call_args.kwargs["Entries"]
+  assert large["MessageAttributes"]["BodyEncoding"]["StringValue"] == "gzip"
+  assert json.loads(batch_producer.codec.decode(large["MessageBody"])) == message_body
+  assert small == {"Id": "1", "MessageBody": '{"small": true}'}
+
+
+def test_cancelled_futures_are_dropped_and_flush_completes(batch_producer):
+  # Arrange
+  cancelled = batch_producer.send_message({"id": "cancelled"})
+  kept = batch_producer.send_message({"id": "kept"})
+
+  # Act
+  assert cancelled.cancel()
+  flushed = batch_producer.flush(timeout=2)
+
+  # Assert
+  assert flushed
+  assert kept.result() == 'id-{"id": "kept"}'
+  entries = batch_producer.client.send_message_batch.call_args.kwargs["Entries"]
+  assert [entry["MessageBody"] for entry in entries] == ['{"id": "kept"}']
+
+
+def test_flush_completes_when_every_future_is_cancelled(batch_producer):
+  # Arrange
+  future = batch_producer.send_message({"id": "cancelled"})
+  future.cancel()
+
+  # Act
+  flushed = batch_producer.flush(timeout=2)
+
+  # Assert
+  assert flushed
+  batch_producer.client.send_message_batch.assert_not_called()
@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from concurrent.futures import Future
+from unittest.mock import Mock
+
+from core.metrics import MetricsRegistry
+from models.message import Message
+from sources.in_memory_sqs import InMemorySqs
+from sources.sqs_batch_producer import SqsBatchProducer
+from sources.sqs_bridge import SqsBridge
+
+INPUT_QUEUE_URL = "http://localhost/000000000000/input"
+OUTPUT_QUEUE_URL = "http://localhost/000000000000/output"
+
+
+def _send_inputs(sqs, count):
+  for index in range(count):
+    sqs.send_message(
+      QueueUrl=INPUT_QUEUE_URL,
+      MessageBody=json.dumps(
+        {"id": str(index), "payload": {"n": index}, "timestamp": "2025-06-01"}
+      ),
+    )
+
+
+def _bridge(sqs, transform, producer, **kwargs):
+  return SqsBridge(
+    INPUT_QUEUE_URL,
+    transform,
+    producer,
+    wait_time_seconds=0,
+    client=sqs,
+    metrics=MetricsRegistry(),
+    **kwargs,
+  )
+
+
+def _run_until_empty(bridge, sqs, timeout=5):
+  thread = threading.Thread(target=bridge.run)
+  thread.start()
+  deadline = time.monotonic() + timeout
+  while sqs.count(INPUT_QUEUE_URL) and time.monotonic() < deadline:
+    time.sleep(0.01)
+  bridge.stop()
+  thread.join()
+
+
+def _double(message):
+  return {"id": message.id, "payload": {"n": message.payload["n"] * 2}}
+
+
+def test_bridge_publishes_transformed_messages_and_deletes_inputs():
+  # Arrange
+  sqs = InMemorySqs()
+  _send_inputs(sqs, 50)
+  producer = SqsBatchProducer(
+    OUTPUT_QUEUE_URL, linger=0.01, client=sqs, metrics=MetricsRegistry()
+  )
+  bridge = _bridge(sqs, _double, producer, max_workers=4)
+
+  # Act
+  with producer:
+    _run_until_empty(bridge, sqs)
+
+  # Assert
+  outputs = [json.loads(body) for body in sqs.bodies(OUTPUT_QUEUE_URL)]
+  assert sorted(output["payload"]["n"] for output in outputs) == list(range(0, 100, 2))
+  assert sqs.count(INPUT_QUEUE_URL) == 0
+  # send_message only sent the inputs.
+  assert sqs.calls["send_message"] == 50
+  assert "delete_message" not in sqs.calls
+  stats = bridge.stats()
+  assert stats["transformed"] == 50
+  assert stats["producer_sent"] == 50
+
+
+def test_forward_fails_messages_whose_sends_fail():
+  # Arrange
+  failed = Future()
+  failed.set_exception(RuntimeError("send failed"))
+  sent = Future()
+  sent.set_result("message-id")
+  producer = Mock(spec=["send_message", "queue_url"])
+  producer.send_message.side_effect = [sent, failed]
+  bridge = _bridge(InMemorySqs(), _double, producer)
+  messages = [
+    Message(id=str(index), source="sqs", payload={"n": index}, timestamp="t")
+    for index in range(2)
+  ]
+
+  # Act
+  results = bridge.forward(messages)
+
+  # Assert
+  assert results == [True, False]
+  assert bridge.stats()["send_errors"] == 1
+
+
+def test_forward_fails_transform_errors_and_acknowledges_dropped_messages():
+  # Arrange
+  producer = Mock(spec=["send_message", "queue_url"])
+
+  def transform(message):
+    if message.id == "0":
+      raise ValueError("bad message")
+    return None
+
+  bridge = _bridge(InMemorySqs(), transform, producer)
+  messages = [
+    Message(id=str(index), source="sqs", payload={}, timestamp="t")
+    for index in range(2)
+  ]
+
+  # Act
+  results = bridge.forward(messages)
+
+  # Assert
+  assert results == [False, True]
+  producer.send_message.assert_not_called()
+  assert bridge.stats()["transform_errors"] == 1
+  assert bridge.stats()["dropped"] == 1
+
+
+def test_bridge_keeps_inputs_whose_outputs_were_not_sent():
+  # Arrange
+  sqs = InMemorySqs()
+  _send_inputs(sqs, 3)
+  failed = Future()
+  failed.set_exception(RuntimeError("send failed"))
+  producer = Mock(spec=["send_message", "queue_url"], queue_url=OUTPUT_QUEUE_URL)
+  producer.send_message.return_value = failed
+  bridge = _bridge(sqs, _double, producer, visibility_timeout=30)
+
+  # Act
+  _run_until_empty(bridge, sqs, timeout=0.2)
+
+  # Assert
+  assert sqs.count(INPUT_QUEUE_URL) == 3
+  assert bridge.stats()["send_errors"] == 3
+
+
+def test_bridge_publishes_str_outputs_unchanged():
+  # Arrange
+  sqs = InMemorySqs()
+  _send_inputs(sqs, 3)
+  producer = SqsBatchProducer(
+    OUTPUT_QUEUE_URL, linger=0.01, client=sqs, metrics=MetricsRegistry()
+  )
+  bridge = _bridge(sqs, lambda message: f"order {message.id}", producer)
+
+  # Act
+  with producer:
+    _run_until_empty(bridge, sqs)
+
+  # Assert
+  assert sorted(sqs.bodies(OUTPUT_QUEUE_URL)) == ["order 0", "order 1", "order 2"]
+
+
+def test_bridge_deletes_inputs_before_they_reappear_during_long_polls():
+  # Arrange
+  sqs = InMemorySqs()
+  _send_inputs(sqs, 1)
+  producer = SqsBatchProducer(
+    OUTPUT_QUEUE_URL, linger=0.01, client=sqs, metrics=MetricsRegistry()
+  )
+  bridge = SqsBridge(
+    INPUT_QUEUE_URL,
+    _double,
+    producer,
+    wait_time_seconds=20,
+    visibility_timeout=1,
+    ack_max_delay=0.1,
+    client=sqs,
+    metrics=MetricsRegistry(),
+  )
+  thread = threading.Thread(target=bridge.run)
+
+  # Act
+  with producer:
+    thread.start()
+    # The bridge sits in a long poll for longer than the visibility timeout.
+    time.sleep(1.5)
+    bridge.stop()
+    # Wake the long poll up.
+    _send_inputs(sqs, 1)
+    thread.join()
+
+  # Assert
+  assert bridge.stats()["transformed"] == 2
+  assert len(sqs.bodies(OUTPUT_QUEUE_URL)) == 2
+  assert sqs.count(INPUT_QUEUE_URL) == 0
@@ -1,9 +1,19 @@
+import json
+import threading
+import time
 from unittest.mock import Mock, call, patch
 
 import pytest
 
+from core.backoff import ExponentialBackoff
 from core.handler import MessageHandler
+from core.limits import AimdLimiter
+from core.metrics import MetricsRegistry
+from parsers.sqs_parser import SQSParser
+from sources.in_memory_sqs import InMemorySqs
 from sources.sqs_consumer import SqsConsumer
+from sources.sqs_producer import SqsProducer
+from sources.sqs_retry_policy import SqsRetryPolicy
 
 
 @pytest.fixture
@@ -88,3 +98,746 @@ def test_poll_sqs_handles_message_processing_error(sqs_consumer, mock_handler):
   # Assert
   mock_handler.handle.assert_called_once_with('{"test": "message"}')
   sqs_consumer.client.delete_message.assert_not_called()
+
+
+def test_poll_sqs_batches_acknowledgements(sqs_consumer, mock_handler):
+  # Arrange
+  sqs_consumer.batch_acks = True
+  messages = [
+    {"Body": '{"test": "message1"}', "ReceiptHandle": "receipt1"},
+    {"Body": '{"test": "message2"}', "ReceiptHandle": "receipt2"},
+  ]
+  sqs_consumer.client.receive_message.side_effect = [
+    {"Messages": messages},
+    Exception("Stop iteration"),
+  ]
+  sqs_consumer.client.delete_message_batch.return_value = {
+    "Successful": [{"Id": "0"}, {"Id": "1"}],
+    "Failed": [],
+  }
+
+  # Act
+  with pytest.raises(Exception, match="Stop iteration"):
+    sqs_consumer.poll_sqs()
+
+  # Assert
+  sqs_consumer.client.delete_message.assert_not_called()
+  sqs_consumer.client.delete_message_batch.assert_called_once_with(
+    QueueUrl="http://test-queue",
+    Entries=[
+      {"Id": "0", "ReceiptHandle": "receipt1"},
+      {"Id": "1", "ReceiptHandle": "receipt2"},
+    ],
+  )
+  assert sqs_consumer.stats()["batched_deletes"] == 2
+  assert sqs_consumer.stats()["individual_deletes"] == 0
+
+
+def test_poll_sqs_uses_long_polling(mock_handler):
+  # Arrange
+  with patch("boto3.client") as mock_client:
+    consumer = SqsConsumer(
+      queue_url="http://test-queue",
+      number_of_messages=10,
+      handler=mock_handler,
+      wait_time_seconds=20,
+    )
+  consumer.client.receive_message.side_effect = [
+    {"Messages": []},
+    Exception("Stop iteration"),
+  ]
+
+  # Act
+  with pytest.raises(Exception, match="Stop iteration"):
+    consumer.poll_sqs()
+
+  # Assert
+  mock_client.return_value.receive_message.assert_called_with(
+    QueueUrl="http://test-queue", MaxNumberOfMessages=10, WaitTimeSeconds=20
+  )
+
+
+def test_poll_sqs_backs_off_on_consecutive_empty_receives(sqs_consumer):
+  # Arrange
+  sqs_consumer.idle_backoff = ExponentialBackoff(initial=1.0, maximum=4.0)
+  sqs_consumer._stop_event = Mock()
+  sqs_consumer._stop_event.is_set.return_value = False
+  sqs_consumer.client.receive_message.side_effect = [
+    {"Messages": []},
+    {"Messages": []},
+    {"Messages": [{"Body": "{}", "ReceiptHandle": "receipt1"}]},
+    {"Messages": []},
+    Exception("Stop iteration"),
+  ]
+
+  # Act
+  with pytest.raises(Exception, match="Stop iteration"):
+    sqs_consumer.poll_sqs()
+
+  # Assert
+  assert sqs_consumer._stop_event.wait.call_args_list == [
+    call(1.0),
+    call(2.0),
+    call(1.0),
+  ]
+  assert sqs_consumer.stats()["empty_receives"] == 3
+  assert sqs_consumer.stats()["non_empty_receives"] == 1
+
+
+def test_stop_ends_polling(sqs_consumer, mock_handler):
+  # Arrange
+  def receive_and_stop(**kwargs):
+    sqs_consumer.stop()
+    return {"Messages": [{"Body": "{}", "ReceiptHandle": "receipt1"}]}
+
+  sqs_consumer.client.receive_message.side_effect = receive_and_stop
+
+  # Act
+  sqs_consumer.poll_sqs()
+
+  # Assert
+  sqs_consumer.client.receive_message.assert_called_once()
+  mock_handler.handle.assert_called_once_with("{}")
+
+
+def test_poll_sqs_handles_messages_concurrently(sqs_consumer, mock_handler):
+  # Arrange
+  sqs_consumer.max_workers = 2
+  sqs_consumer.max_in_flight = 2
+  barrier = threading.Barrier(2, timeout=5)
+  mock_handler.handle.side_effect = lambda body: barrier.wait()
+  messages = [
+    {"Body": '{"test": "message1"}', "ReceiptHandle": "receipt1"},
+    {"Body": '{"test": "message2"}', "ReceiptHandle": "receipt2"},
+  ]
+
+  def receive(**kwargs):
+    if sqs_consumer.client.receive_message.call_count == 1:
+      return {"Messages": messages}
+    sqs_consumer.stop()
+    return {"Messages": []}
+
+  sqs_consumer.client.receive_message.side_effect = receive
+
+  # Act
+  sqs_consumer.poll_sqs()
+
+  # Assert
+  assert mock_handler.handle.call_count == 2
+  sqs_consumer.client.delete_message.assert_has_calls(
+    [
+      call(QueueUrl="http://test-queue", ReceiptHandle="receipt1"),
+      call(QueueUrl="http://test-queue", ReceiptHandle="receipt2"),
+    ],
+    any_order=True,
+  )
+
+
+def test_poll_sqs_limits_receives_to_free_capacity(sqs_consumer, mock_handler):
+  # Arrange
+  sqs_consumer.max_workers = 2
+  sqs_consumer.max_in_flight = 3
+  release = threading.Event()
+  mock_handler.handle.side_effect = lambda body: release.wait(5)
+
+  def receive(**kwargs):
+    if sqs_consumer.client.receive_message.call_count == 1:
+      return {"Messages": [{"Body": "{}", "ReceiptHandle": "receipt1"}]}
+    sqs_consumer.stop()
+    release.set()
+    return {"Messages": []}
+
+  sqs_consumer.client.receive_message.side_effect = receive
+
+  # Act
+  sqs_consumer.poll_sqs()
+
+  # Assert
+  assert [
+    kwargs["MaxNumberOfMessages"]
+    for _, kwargs in sqs_consumer.client.receive_message.call_args_list
+  ] == [3, 2]
+
+
+def test_poll_sqs_concurrent_does_not_delete_failed_messages(
+  sqs_consumer, mock_handler
+):
+  # Arrange
+  sqs_consumer.max_workers = 4
+
+  def handle(body):
+    if body == "bad":
+      raise Exception("Processing error")
+
+  mock_handler.handle.side_effect = handle
+  messages = [
+    {"Body": "good", "ReceiptHandle": "receipt1"},
+    {"Body": "bad", "ReceiptHandle": "receipt2"},
+  ]
+
+  def receive(**kwargs):
+    if sqs_consumer.client.receive_message.call_count == 1:
+      return {"Messages": messages}
+    sqs_consumer.stop()
+    return {"Messages": []}
+
+  sqs_consumer.client.receive_message.side_effect = receive
+
+  # Act
+  sqs_consumer.poll_sqs()
+
+  # Assert
+  sqs_consumer.client.delete_message.assert_called_once_with(
+    QueueUrl="http://test-queue", ReceiptHandle="receipt1"
+  )
+
+
+def test_poll_sqs_records_receive_and_delete_metrics(mock_handler):
+  # Arrange
+  metrics = MetricsRegistry()
+  client = Mock()
+  client.receive_message.side_effect = [
+    {"Messages": [{"Body": "{}", "ReceiptHandle": "receipt1"}]},
+    Exception("Stop iteration"),
+  ]
+  consumer = SqsConsumer(
+    queue_url="http://localhost/000000000000/orders",
+    number_of_messages=10,
+    handler=mock_handler,
+    client=client,
+    metrics=metrics,
+  )
+
+  # Act
+  with pytest.raises(Exception):
+    consumer.poll_sqs()
+
+  # Assert
+  snapshot = metrics.snapshot()
+  receive = 'sqs_request_seconds{operation="receive_message",queue="orders"}'
+  delete = 'sqs_request_seconds{operation="delete_message",queue="orders"}'
+  assert snapshot[receive]["count"] == 2
+  assert snapshot[delete]["count"] == 1
+  assert snapshot['sqs_messages_received_total{queue="orders"}'] == 1
+  assert snapshot['sqs_messages_deleted_total{queue="orders"}'] == 1
+  errors = 'sqs_request_errors_total{operation="receive_message",queue="orders"}'
+  assert snapshot[errors] == 1
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_poll_sqs_passes_batches_and_deletes_succeeded_messages(max_workers):
+  # Arrange
+  client = Mock()
+  messages = [
+    {"Body": f'{{"id": "{index}"}}', "ReceiptHandle": f"receipt{index}"}
+    for index in range(3)
+  ]
+  client.receive_message.side_effect = [
+    {"Messages": messages},
+    Exception("Stop iteration"),
+  ]
+  client.delete_message_batch.return_value = {"Successful": [{"Id": "0"}, {"Id": "1"}]}
+  handler = Mock(spec=MessageHandler)
+  handler.batch_processor = Mock()
+  handler.handle_batch.return_value = [True, False, True]
+  consumer = SqsConsumer(
+    queue_url="http://test-queue",
+    number_of_messages=10,
+    handler=handler,
+    max_workers=max_workers,
+    client=client,
+  )
+
+  # Act
+  with pytest.raises(Exception):
+    consumer.poll_sqs()
+
+  # Assert
+  handler.handle_batch.assert_called_once_with(
+    [message["Body"] for message in messages]
+  )
+  handler.handle.assert_not_called()
+  client.delete_message_batch.assert_called_once_with(
+    QueueUrl="http://test-queue",
+    Entries=[
+      {"Id": "0", "ReceiptHandle": "receipt0"},
+      {"Id": "1", "ReceiptHandle": "receipt2"},
+    ],
+  )
+  client.delete_message.assert_not_called()
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_poll_sqs_logs_batch_errors_and_untracks_the_batch(max_workers):
+  # Arrange
+  client = Mock()
+  messages = [
+    {"Body": f'{{"id": "{index}"}}', "ReceiptHandle": f"receipt{index}"}
+    for index in range(2)
+  ]
+  client.receive_message.side_effect = [
+    {"Messages": messages},
+    Exception("Stop iteration"),
+  ]
+  handler = Mock(spec=MessageHandler)
+  handler.batch_processor = Mock()
+  handler.handle_batch.side_effect = RuntimeError("batch failed")
+  consumer = SqsConsumer(
+    queue_url="http://test-queue",
+    number_of_messages=10,
+    handler=handler,
+    max_workers=max_workers,
+    client=client,
+    visibility_timeout=30,
+    heartbeat=True,
+  )
+  consumer.heartbeat.untrack = Mock(wraps=consumer.heartbeat.untrack)
+
+  # Act
+  with patch("sources.sqs_consumer.message_logger") as mock_logger:
+    with pytest.raises(Exception, match="Stop iteration"):
+      consumer.poll_sqs()
+
+  # Assert
+  mock_logger.exception.assert_called_once()
+  consumer.heartbeat.untrack.assert_has_calls(
+    [call("receipt0"), call("receipt1")], any_order=True
+  )
+  client.delete_message_batch.assert_not_called()
+
+
+def test_poll_sqs_retries_failed_messages_and_dead_letters_them():
+  # Arrange
+  sqs = InMemorySqs()
+  queue_url = "http://localhost/000000000000/orders"
+  dlq_url = "http://localhost/000000000000/orders-dlq"
+  for message_id in ("ok", "poison"):
+    sqs.send_message(
+      QueueUrl=queue_url,
+      MessageBody=json.dumps(
+        {"id": message_id, "payload": {}, "timestamp": "2025-06-01T10:00:00"}
+      ),
+    )
+  attempts = []
+
+  def processor(message):
+    attempts.append(message.id)
+    if message.id == "poison":
+      raise ValueError("cannot process")
+
+  consumer = SqsConsumer(
+    queue_url,
+    number_of_messages=10,
+    handler=MessageHandler(SQSParser(), processor),
+    wait_time_seconds=0,
+    ack_max_delay=0,
+    client=sqs,
+    retry_policy=SqsRetryPolicy(
+      backoff=ExponentialBackoff(initial=0, maximum=0),
+      max_attempts=3,
+      dead_letter_producer=SqsProducer(dlq_url, client=sqs),
+    ),
+  )
+  thread = threading.Thread(target=consumer.poll_sqs)
+
+  # Act
+  thread.start()
+  deadline = time.monotonic() + 5
+  while sqs.count(queue_url) and time.monotonic() < deadline:
+    time.sleep(0.01)
+  consumer.stop()
+  thread.join()
+
+  # Assert
+  assert attempts.count("ok") == 1
+  assert attempts.count("poison") == 3
+  assert sqs.count(queue_url) == 0
+  assert [json.loads(body)["id"] for body in sqs.bodies(dlq_url)] == ["poison"]
+  stats = consumer.stats()
+  assert stats["retries_scheduled"] == 2
+  assert stats["dead_lettered"] == 1
+  assert stats["visibility_changes"] == 2
+
+
+def test_poll_sqs_dead_letters_fifo_messages_with_their_group():
+  # Arrange
+  sqs = InMemorySqs()
+  queue_url = "http://localhost/000000000000/orders.fifo"
+  dlq_url = "http://localhost/000000000000/orders-dlq.fifo"
+  sqs.send_message(
+    QueueUrl=queue_url,
+    MessageBody=json.dumps(
+      {"id": "poison", "payload": {}, "timestamp": "2025-06-01T10:00:00"}
+    ),
+    MessageGroupId="customer-1",
+  )
+
+  def processor(message):
+    raise ValueError("cannot process")
+
+  consumer = SqsConsumer(
+    queue_url,
+    number_of_messages=10,
+    handler=MessageHandler(SQSParser(), processor),
+    wait_time_seconds=0,
+    ack_max_delay=0,
+    client=sqs,
+    retry_policy=SqsRetryPolicy(
+      backoff=ExponentialBackoff(initial=0, maximum=0),
+      max_attempts=1,
+      dead_letter_producer=SqsProducer(dlq_url, client=sqs),
+    ),
+  )
+
+  # Act
+  run_until_empty(consumer, sqs, queue_url)
+
+  # Assert
+  assert sqs.count(queue_url) == 0
+  dead_letter = sqs.receive_message(QueueUrl=dlq_url)["Messages"][0]
+  assert json.loads(dead_letter["Body"])["id"] == "poison"
+  assert dead_letter["Attributes"]["MessageGroupId"] == "customer-1"
+  assert dead_letter["Attributes"]["MessageDeduplicationId"]
+  assert consumer.stats()["dead_lettered"] == 1
+
+
+def test_poll_sqs_schedules_retries_from_the_receive_count(sqs_consumer, mock_handler):
+  # Arrange
+  sqs_consumer.retry_policy = SqsRetryPolicy(
+    backoff=ExponentialBackoff(initial=5, maximum=60)
+  )
+  sqs_consumer.client.receive_message.side_effect = [
+    {
+      "Messages": [
+        {
+          "Body": "{}",
+          "ReceiptHandle": "receipt1",
+          "Attributes": {"ApproximateReceiveCount": "3"},
+        }
+      ]
+    },
+    Exception("Stop iteration"),
+  ]
+  sqs_consumer.client.change_message_visibility_batch.return_value = {
+    "Successful": [{"Id": "0"}]
+  }
+  mock_handler.handle.side_effect = Exception("Processing error")
+
+  # Act
+  with pytest.raises(Exception, match="Stop iteration"):
+    sqs_consumer.poll_sqs()
+
+  # Assert
+  sqs_consumer.client.receive_message.assert_called_with(
+    QueueUrl="http://test-queue",
+    MaxNumberOfMessages=10,
+    MessageSystemAttributeNames=["ApproximateReceiveCount"],
+  )
+  sqs_consumer.client.change_message_visibility_batch.assert_called_once_with(
+    QueueUrl="http://test-queue",
+    Entries=[{"Id": "0", "ReceiptHandle": "receipt1", "VisibilityTimeout": 20}],
+  )
+  sqs_consumer.client.delete_message.assert_not_called()
+
+
+def test_poll_sqs_heartbeat_keeps_slow_messages_invisible():
+  # Arrange
+  sqs = InMemorySqs()
+  queue_url = "http://localhost/000000000000/orders"
+  sqs.send_message(
+    QueueUrl=queue_url,
+    MessageBody=json.dumps(
+      {"id": "slow", "payload": {}, "timestamp": "2025-06-01T10:00:00"}
+    ),
+  )
+  attempts = []
+  consumer = None
+
+  def processor(message):
+    attempts.append(message.id)
+    time.sleep(1.5)
+    consumer.stop()
+
+  consumer = SqsConsumer(
+    queue_url,
+    number_of_messages=10,
+    handler=MessageHandler(SQSParser(), processor),
+    wait_time_seconds=0,
+    max_workers=2,
+    client=sqs,
+    visibility_timeout=1,
+    heartbeat=True,
+  )
+
+  # Act
+  consumer.poll_sqs()
+
+  # Assert
+  assert attempts == ["slow"]
+  assert sqs.count(queue_url) == 0
+  assert consumer.stats()["visibility_extensions"] >= 2
+  assert consumer.heartbeat.tracked == 0
+
+
+def test_poll_sqs_heartbeat_extends_messages_until_their_delete_is_sent():
+  # Arrange
+  sqs = InMemorySqs()
+  queue_url = "http://localhost/000000000000/orders"
+  handled = []
+
+  def send(message_id):
+    sqs.send_message(
+      QueueUrl=queue_url,
+      MessageBody=json.dumps(
+        {"id": message_id, "payload": {}, "timestamp": "2025-06-01T10:00:00"}
+      ),
+    )
+
+  consumer = SqsConsumer(
+    queue_url,
+    number_of_messages=10,
+    handler=MessageHandler(SQSParser(), lambda message: handled.append(message.id)),
+    batch_acks=True,
+    # Longer than the visibility timeout: only the heartbeat hides the message.
+    ack_max_delay=1.5,
+    wait_time_seconds=20,
+    client=sqs,
+    visibility_timeout=1,
+    heartbeat=True,
+  )
+  thread = threading.Thread(target=consumer.poll_sqs)
+  send("a")
+
+  # Act
+  thread.start()
+  time.sleep(2)
+  consumer.stop()
+  send("end")
+  thread.join()
+
+  # Assert
+  assert handled == ["a", "end"]
+  assert sqs.count(queue_url) == 0
+  assert consumer.stats()["visibility_extensions"] >= 1
+  assert consumer.heartbeat.tracked == 0
+
+
+def test_heartbeat_requires_visibility_timeout(mock_handler):
+  # Act & Assert
+  with pytest.raises(ValueError):
+    SqsConsumer("http://test-queue", 10, mock_handler, client=Mock(), heartbeat=True)
+
+
+def test_consumer_requires_a_queue_url(mock_handler):
+  # Act & Assert
+  with pytest.raises(ValueError, match="queue_url"):
+    SqsConsumer(None, 10, mock_handler, client=Mock())
+
+
+def send_fifo_messages(sqs, queue_url, groups, per_group):
+  for index in range(per_group):
+    for group in groups:
+      sqs.send_message(
+        QueueUrl=queue_url,
+        MessageBody=json.dumps(
+          {
+            "id": f"{group}-{index}",
+            "payload": {"group": group, "index": index},
+            "timestamp": "2025-06-01T10:00:00",
+          }
+        ),
+        MessageGroupId=group,
+      )
+
+
+def run_until_empty(consumer, sqs, queue_url, timeout=5):
+  thread = threading.Thread(target=consumer.poll_sqs)
+  thread.start()
+  deadline = time.monotonic() + timeout
+  while sqs.count(queue_url) and time.monotonic() < deadline:
+    time.sleep(0.01)
+  consumer.stop()
+  thread.join()
+
+
+def test_poll_sqs_handles_fifo_groups_concurrently_and_in_order():
+  # Arrange
+  sqs = InMemorySqs()
+  queue_url = "http://localhost/000000000000/orders.fifo"
+  send_fifo_messages(sqs, queue_url, groups=["a", "b", "c"], per_group=3)
+  handled = []
+  active = []
+  max_active = []
+  lock = threading.Lock()
+
+  def processor(message):
+    with lock:
+      active.append(message.id)
+      max_active.append(len(active))
+    time.sleep(0.02)
+    with lock:
+      active.remove(message.id)
+      handled.append((message.payload["group"], message.payload["index"]))
+
+  consumer = SqsConsumer(
+    queue_url,
+    number_of_messages=10,
+    handler=MessageHandler(SQSParser(), processor),
+    wait_time_seconds=0,
+    max_workers=3,
+    max_in_flight=10,
+    client=sqs,
+  )
+
+  # Act
+  run_until_empty(consumer, sqs, queue_url)
+
+  # Assert
+  assert consumer.fifo
+  for group in "abc":
+    assert [index for name, index in handled if name == group] == [0, 1, 2]
+  assert max(max_active) > 1
+
+
+def test_poll_sqs_skips_the_rest_of_a_fifo_group_after_a_failure():
+  # Arrange
+  sqs = InMemorySqs()
+  queue_url = "http://localhost/000000000000/orders.fifo"
+  send_fifo_messages(sqs, queue_url, groups=["a", "b"], per_group=3)
+  handled = []
+  failures = []
+
+  def processor(message):
+    if message.id == "a-1" and not failures:
+      failures.append(message.id)
+      raise ValueError("temporary failure")
+    handled.append(message.id)
+
+  consumer = SqsConsumer(
+    queue_url,
+    number_of_messages=10,
+    handler=MessageHandler(SQSParser(), processor),
+    wait_time_seconds=0,
+    client=sqs,
+    retry_policy=SqsRetryPolicy(backoff=ExponentialBackoff(initial=0, maximum=0)),
+    ack_max_delay=0,
+  )
+
+  # Act
+  run_until_empty(consumer, sqs, queue_url)
+
+  # Assert
+  assert [message_id for message_id in handled if message_id[0] == "a"] == [
+    "a-0",
+    "a-1",
+    "a-2",
+  ]
+  assert [message_id for message_id in handled if message_id[0] == "b"] == [
+    "b-0",
+    "b-1",
+    "b-2",
+  ]
+  assert consumer.stats()["skipped_messages"] == 1
+
+
+def test_poll_sqs_sizes_receives_by_the_handler_limiter(sqs_consumer):
+  # Arrange
+  limiter = AimdLimiter(initial=3, maximum=10)
+  sqs_consumer.handler = MessageHandler(SQSParser(), Mock(), limiter=limiter)
+  sqs_consumer.limiter = limiter
+  sqs_consumer.client.receive_message.side_effect = [
+    {"Messages": []},
+    Exception("Stop iteration"),
+  ]
+
+  # Act
+  with pytest.raises(Exception, match="Stop iteration"):
+    sqs_consumer.poll_sqs()
+
+  # Assert
+  sqs_consumer.client.receive_message.assert_called_with(
+    QueueUrl="http://test-queue", MaxNumberOfMessages=3
+  )
+
+
+def test_poll_sqs_keeps_in_flight_messages_within_the_limit():
+  # Arrange
+  sqs = InMemorySqs()
+  queue_url = "http://localhost/000000000000/orders"
+  for index in range(40):
+    sqs.send_message(QueueUrl=queue_url, MessageBody=json.dumps({"id": str(index)}))
+  limiter = AimdLimiter(initial=2, maximum=4)
+  active = []
+  max_active = []
+  lock = threading.Lock()
+
+  def processor(message):
+    with lock:
+      active.append(message.id)
+      max_active.append(len(active))
+    time.sleep(0.005)
+    with lock:
+      active.remove(message.id)
+
+  handler = MessageHandler(
+    SQSParser(), processor, metrics=MetricsRegistry(), limiter=limiter
+  )
+  consumer = SqsConsumer(
+    queue_url,
+    10,
+    handler,
+    max_workers=8,
+    max_in_flight=8,
+    wait_time_seconds=0,
+    client=sqs,
+    metrics=MetricsRegistry(),
+  )
+
+  # Act
+  run_until_empty(consumer, sqs, queue_url)
+
+  # Assert
+  assert len(max_active) == 40
+  assert max(max_active) <= 4
+  assert consumer.stats()["limit"] == 4
+
+
+def test_poll_sqs_flushes_batched_acks_during_long_polls():
+  # Arrange
+  sqs = InMemorySqs()
+  queue_url = "http://localhost/000000000000/orders"
+  handled = []
+
+  def send(message_id):
+    sqs.send_message(
+      QueueUrl=queue_url,
+      MessageBody=json.dumps(
+        {"id": message_id, "payload": {}, "timestamp": "2025-06-01T10:00:00"}
+      ),
+    )
+
+  consumer = SqsConsumer(
+    queue_url,
+    number_of_messages=10,
+    handler=MessageHandler(SQSParser(), lambda message: handled.append(message.id)),
+    batch_acks=True,
+    ack_max_delay=0.1,
+    wait_time_seconds=20,
+    client=sqs,
+    visibility_timeout=1,
+  )
+  thread = threading.Thread(target=consumer.poll_sqs)
+  send("a")
+
+  # Act
+  thread.start()
+  # The consumer sits in a long poll for longer than the visibility timeout.
+  time.sleep(1.5)
+  consumer.stop()
+  send("end")
+  thread.join()
+
+  # Assert
+  assert handled == ["a", "end"]
+  assert sqs.count(queue_url) == 0
+  assert consumer.stats()["failed_deletes"] == 0
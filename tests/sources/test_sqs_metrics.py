@@ -0,0 +1,21 @@
+import pytest
+
+from core.metrics import MetricsRegistry
+from sources.sqs_metrics import SqsMetrics
+
+
+@pytest.mark.parametrize(
+  "queue_url, expected_queue",
+  [
+    ("http://localhost:4566/000000000000/orders", "orders"),
+    ("http://localhost:4566/000000000000/orders/", "orders"),
+    (None, "unknown"),
+    ("", "unknown"),
+  ],
+)
+def test_queue_label_is_the_last_url_segment(queue_url, expected_queue):
+  # Act
+  metrics = SqsMetrics(queue_url, MetricsRegistry())
+
+  # Assert
+  assert metrics.queue == expected_queue
@@ -1,8 +1,10 @@
+import json
 from unittest.mock import patch
 
 import pytest
 from botocore.exceptions import ClientError
 
+from core.codec import BodyCodec
 from sources.sqs_producer import SqsProducer
 
 
@@ -86,3 +88,35 @@ def test_send_message_with_different_payloads(sqs_producer, message_body):
   # Assert
   assert message_id == expected_message_id
   sqs_producer.client.send_message.assert_called_once()
+
+
+def test_send_message_encodes_large_bodies(sqs_producer):
+  # Arrange
+  sqs_producer.codec = BodyCodec(compress_above=100)
+  sqs_producer.client.send_message.return_value = {"MessageId": "test-message-id"}
+  message_body = {"data": "x" * 1000}
+
+  # Act
+  sqs_producer.send_message(message_body)
+
+  # Assert
+  params = sqs_producer.client.send_message.call_args.kwargs
+  assert params["MessageAttributes"]["BodyEncoding"]["StringValue"] == "gzip"
+  assert json.loads(sqs_producer.codec.decode(params["MessageBody"])) == message_body
+
+
+@pytest.mark.parametrize(
+  "raw, expected_body", [(False, json.dumps('{"id": "1"}')), (True, '{"id": "1"}')]
+)
+def test_send_message_converts_str_bodies_to_json_unless_raw(
+  sqs_producer, raw, expected_body
+):
+  # Arrange
+  sqs_producer.client.send_message.return_value = {"MessageId": "test-message-id"}
+
+  # Act
+  sqs_producer.send_message('{"id": "1"}', raw=raw)
+
+  # Assert
+  params = sqs_producer.client.send_message.call_args.kwargs
+  assert params["MessageBody"] == expected_body
@@ -0,0 +1,41 @@
+from unittest.mock import Mock
+
+import pytest
+
+from core.backoff import ExponentialBackoff
+from sources.sqs_retry_policy import SqsRetryPolicy, receive_count
+
+
+def test_visibility_timeout_follows_backoff_in_whole_seconds():
+  # Arrange
+  policy = SqsRetryPolicy(backoff=ExponentialBackoff(initial=0.5, maximum=100_000))
+
+  # Act & Assert
+  assert policy.visibility_timeout(1) == 1
+  assert policy.visibility_timeout(3) == 2
+  assert policy.visibility_timeout(40) == 43_200
+
+
+def test_exhausted_after_max_attempts():
+  # Arrange
+  policy = SqsRetryPolicy(max_attempts=3, dead_letter_producer=Mock())
+
+  # Act & Assert
+  assert not policy.exhausted(2)
+  assert policy.exhausted(3)
+  assert not SqsRetryPolicy().exhausted(1000)
+
+
+@pytest.mark.parametrize(
+  "kwargs", [{"max_attempts": 0, "dead_letter_producer": Mock()}, {"max_attempts": 3}]
+)
+def test_rejects_invalid_max_attempts(kwargs):
+  # Act & Assert
+  with pytest.raises(ValueError):
+    SqsRetryPolicy(**kwargs)
+
+
+def test_receive_count_defaults_to_one():
+  # Act & Assert
+  assert receive_count({"Attributes": {"ApproximateReceiveCount": "4"}}) == 4
+  assert receive_count({}) == 1
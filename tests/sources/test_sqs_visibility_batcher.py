@@ -0,0 +1,81 @@
+from unittest.mock import Mock
+
+import pytest
+
+from sources.sqs_visibility_batcher import SqsVisibilityBatcher
+
+
+@pytest.fixture
+def client():
+  return Mock()
+
+
+@pytest.fixture
+def batcher(client):
+  return SqsVisibilityBatcher(client, queue_url="http://test-queue", max_delay=60)
+
+
+def _successful(entries):
+  return {"Successful": [{"Id": entry["Id"]} for entry in entries], "Failed": []}
+
+
+def test_change_flushes_when_batch_is_full(batcher, client):
+  # Arrange
+  client.change_message_visibility_batch.side_effect = lambda **kwargs: _successful(
+    kwargs["Entries"]
+  )
+
+  # Act
+  for index in range(10):
+    batcher.change(f"receipt{index}", index)
+
+  # Assert
+  client.change_message_visibility_batch.assert_called_once()
+  entries = client.change_message_visibility_batch.call_args.kwargs["Entries"]
+  assert entries[3] == {"Id": "3", "ReceiptHandle": "receipt3", "VisibilityTimeout": 3}
+  assert batcher.pending == 0
+  assert batcher.stats()["visibility_changes"] == 10
+
+
+def test_change_holds_changes_until_flush(batcher, client):
+  # Arrange
+  client.change_message_visibility_batch.side_effect = lambda **kwargs: _successful(
+    kwargs["Entries"]
+  )
+
+  # Act
+  batcher.change("receipt1", 5)
+  batcher.flush_if_due()
+
+  # Assert
+  client.change_message_visibility_batch.assert_not_called()
+  batcher.flush()
+  client.change_message_visibility_batch.assert_called_once_with(
+    QueueUrl="http://test-queue",
+    Entries=[{"Id": "0", "ReceiptHandle": "receipt1", "VisibilityTimeout": 5}],
+  )
+
+
+def test_change_counts_failed_entries_and_errors(batcher, client):
+  # Arrange
+  client.change_message_visibility_batch.side_effect = [
+    {
+      "Successful": [{"Id": "0"}],
+      "Failed": [{"Id": "1", "SenderFault": True, "Code": "ReceiptHandleIsInvalid"}],
+    },
+    Exception("Connection reset"),
+  ]
+
+  # Act
+  batcher.change("receipt1", 5)
+  batcher.change("receipt2", 5)
+  batcher.flush()
+  batcher.change("receipt3", 5)
+  batcher.flush()
+
+  # Assert
+  assert batcher.stats() == {
+    "visibility_changes": 1,
+    "failed_visibility_changes": 2,
+    "visibility_batch_calls": 2,
+  }
@@ -0,0 +1,67 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from sources.sqs_visibility_heartbeat import SqsVisibilityHeartbeat
+
+
+@pytest.fixture
+def batcher():
+  return Mock()
+
+
+def test_beat_extends_handles_not_extended_during_the_last_interval(batcher):
+  # Arrange
+  heartbeat = SqsVisibilityHeartbeat(batcher, visibility_timeout=30)
+  with patch("sources.sqs_visibility_heartbeat.time.monotonic", return_value=100.0):
+    heartbeat.track("receipt1")
+  with patch("sources.sqs_visibility_heartbeat.time.monotonic", return_value=105.0):
+    heartbeat.track("receipt2")
+
+  # Act
+  with patch("sources.sqs_visibility_heartbeat.time.monotonic", return_value=110.0):
+    heartbeat.beat()
+
+  # Assert
+  batcher.change_batch.assert_called_once_with([("receipt1", 30)])
+  assert heartbeat.stats()["visibility_extensions"] == 1
+
+
+def test_beat_skips_untracked_handles(batcher):
+  # Arrange
+  heartbeat = SqsVisibilityHeartbeat(batcher, visibility_timeout=30, interval=0.01)
+  heartbeat.track("receipt1")
+  heartbeat.untrack("receipt1")
+
+  # Act
+  with patch("sources.sqs_visibility_heartbeat.time.monotonic", return_value=1e9):
+    heartbeat.beat()
+
+  # Assert
+  batcher.change_batch.assert_not_called()
+  assert heartbeat.tracked == 0
+
+
+def test_beat_stops_extending_after_max_extension(batcher):
+  # Arrange
+  heartbeat = SqsVisibilityHeartbeat(batcher, visibility_timeout=30, max_extension=60)
+  with patch("sources.sqs_visibility_heartbeat.time.monotonic", return_value=100.0):
+    heartbeat.track("receipt1")
+
+  # Act
+  with patch("sources.sqs_visibility_heartbeat.time.monotonic", return_value=160.0):
+    heartbeat.beat()
+
+  # Assert
+  batcher.change_batch.assert_not_called()
+  assert heartbeat.tracked == 0
+  assert heartbeat.stats()["expired_extensions"] == 1
+
+
+@pytest.mark.parametrize(
+  "kwargs", [{"visibility_timeout": 0}, {"visibility_timeout": 30, "interval": 30}]
+)
+def test_rejects_invalid_timing(batcher, kwargs):
+  # Act & Assert
+  with pytest.raises(ValueError):
+    SqsVisibilityHeartbeat(batcher, **kwargs)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from core.backoff import ExponentialBackoff
+from sources.supervisor import ConsumerSupervisor
+
+
+class CountingConsumer:
+  def __init__(self):
+    self.processed = 0
+    self._stop_event = threading.Event()
+
+  def poll_sqs(self):
+    while not self._stop_event.wait(0.01):
+      self.processed += 1
+
+  def stop(self):
+    self._stop_event.set()
+
+  def stats(self):
+    return {"processed": self.processed, "healthy": True}
+
+
+class CrashingConsumer(CountingConsumer):
+  def poll_sqs(self):
+    self.processed = 1
+    raise RuntimeError("processor bug")
+
+
+def run_until(supervisor, condition, timeout=10.0):
+  runner = threading.Thread(target=supervisor.run, kwargs={"check_interval": 0.05})
+  runner.start()
+  deadline = time.monotonic() + timeout
+  try:
+    while not condition(supervisor.stats()):
+      assert time.monotonic() < deadline, supervisor.stats()
+      time.sleep(0.05)
+  finally:
+    supervisor.stop()
+    runner.join(timeout)
+
+
+def test_supervisor_aggregates_worker_stats_and_stops_cleanly():
+  # Arrange
+  supervisor = ConsumerSupervisor(
+    CountingConsumer, workers=2, stats_interval=0.05, start_method="fork"
+  )
+
+  # Act
+  run_until(supervisor, lambda stats: stats.get("processed", 0) >= 10)
+  stats = supervisor.stats()
+
+  # Assert
+  assert stats["processed"] >= 10
+  assert "healthy" not in stats
+  assert stats["workers"] == 0
+  assert stats["restarts"] == 0
+  assert all(slot.process is None for slot in supervisor._slots)
+
+
+def test_supervisor_restarts_crashed_workers():
+  # Arrange
+  supervisor = ConsumerSupervisor(
+    CrashingConsumer,
+    workers=1,
+    restart_backoff=ExponentialBackoff(initial=0.01, maximum=0.01),
+    stats_interval=0.05,
+    start_method="fork",
+  )
+
+  # Act
+  run_until(supervisor, lambda stats: stats["restarts"] >= 2)
+  stats = supervisor.stats()
+
+  # Assert
+  assert stats["restarts"] >= 2
+  assert stats["processed"] >= 3
+
+
+def test_supervisor_rejects_invalid_worker_count():
+  with pytest.raises(ValueError):
+    ConsumerSupervisor(CountingConsumer, workers=-1)
@@ -0,0 +1,100 @@
+import io
+import logging
+import threading
+
+import pytest
+
+from logger import SamplingFilter, configure_logging, handler, logger, message_logger
+
+
+@pytest.fixture
+def restore_logging():
+  yield
+  configure_logging(level="DEBUG")
+
+
+def make_record(level: int) -> logging.LogRecord:
+  return logging.LogRecord(
+    "message_handler.messages", level, __file__, 1, "msg", (), None
+  )
+
+
+def test_sampling_keeps_every_nth_record():
+  # Arrange
+  sampling_filter = SamplingFilter(sample_rates={"INFO": 0.25})
+
+  # Act
+  kept = [sampling_filter.filter(make_record(logging.INFO)) for _ in range(8)]
+
+  # Assert
+  assert kept == [True, False, False, False, True, False, False, False]
+  assert sampling_filter.dropped == 6
+
+
+def test_sampling_reports_dropped_lines_and_ignores_other_levels():
+  # Arrange
+  sampling_filter = SamplingFilter(sample_rates={logging.DEBUG: 0.5})
+  records = [make_record(logging.DEBUG) for _ in range(3)]
+
+  # Act
+  kept = [sampling_filter.filter(record) for record in records]
+
+  # Assert
+  assert kept == [True, False, True]
+  assert records[2].msg == "msg (1 similar lines dropped)"
+  assert sampling_filter.filter(make_record(logging.ERROR))
+
+
+def test_rate_limit_applies_below_warning():
+  # Arrange
+  sampling_filter = SamplingFilter(max_per_second=2)
+
+  # Act
+  kept = [sampling_filter.filter(make_record(logging.INFO)) for _ in range(4)]
+
+  # Assert
+  assert kept == [True, True, False, False]
+  assert sampling_filter.filter(make_record(logging.WARNING))
+
+
+def test_sampling_filter_rejects_invalid_rates():
+  with pytest.raises(ValueError):
+    SamplingFilter(sample_rates={"INFO": 2})
+
+
+def test_background_logging_formats_on_the_listener(restore_logging, monkeypatch):
+  # Arrange
+  class Expensive:
+    formatted_on = None
+
+    def __str__(self):
+      Expensive.formatted_on = threading.current_thread().name
+      return "expensive"
+
+  stream = io.StringIO()
+  monkeypatch.setattr(handler, "stream", stream)
+  configure_logging(level="INFO", background=True, sample_rates={"INFO": 0.5})
+
+  # Act
+  message_logger.info("first %s", Expensive())
+  message_logger.info("second %s", Expensive())
+  message_logger.debug("hidden %s", Expensive())
+  configure_logging(level="INFO")
+
+  # Assert
+  output = stream.getvalue()
+  assert "first expensive" in output
+  assert "second" not in output
+  assert "hidden" not in output
+  assert Expensive.formatted_on != "MainThread"
+
+
+def test_level_defaults_to_environment(restore_logging, monkeypatch):
+  # Arrange
+  monkeypatch.setenv("MESSAGE_HANDLER_LOG_LEVEL", "warning")
+
+  # Act
+  configure_logging()
+
+  # Assert
+  assert logger.level == logging.WARNING